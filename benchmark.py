@@ -0,0 +1,898 @@
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+from PIL import Image, ImageChops
+
+def create_sample_images(folder, count, size=(800, 600)):
+    """Create a set of gradient test images and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+
+    for i in range(count):
+        # Vary the colours so every image decodes to different pixels
+        img = Image.linear_gradient("L").resize(size)
+        img = Image.merge("RGB", (img, img.rotate(90), Image.new("L", size, (i * 37) % 256)))
+        path = os.path.join(folder, f"sample_{i:04d}.png")
+        img.save(path)
+        paths.append(path)
+
+    return paths
+
+def print_timings(label, timings):
+    """Print median, p95 and max of a list of timings in seconds"""
+    ordered = sorted(timings)
+    median = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<28} n={len(ordered):<5} median={median * 1000:8.2f}ms  "
+          f"p95={p95 * 1000:8.2f}ms  max={ordered[-1] * 1000:8.2f}ms")
+
+def bench_preview_switch(count=200):
+    """
+    Measure preview-switch latency while browsing through many images.
+
+    Needs a display; on headless machines run it under Xvfb:
+        xvfb-run python benchmark.py preview
+    """
+    import tkinter as tk
+    from gui import ImageResizerApp
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        paths = create_sample_images(temp_dir, count)
+
+        root = tk.Tk()
+        app = ImageResizerApp(root)
+        root.update()
+
+        def switch_to(path):
+            start = time.perf_counter()
+            app.selected_image_path = path
+            app.update_preview()
+            app.manage_image_cache()
+            root.update_idletasks()
+            return time.perf_counter() - start
+
+        # First pass decodes every image, second pass revisits the most recent ones
+        cold = [switch_to(path) for path in paths]
+        warm = [switch_to(path) for path in paths[-10:] * 20]
+
+        print_timings("preview switch (decode)", cold)
+        print_timings("preview switch (cached)", warm)
+
+        root.destroy()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def bench_linear_light(rounds=5, source_size=1024):
+    """Compare linear-light resizing against the plain sRGB path for the default size set"""
+    from idc.formats import DEFAULT_SIZES
+    from idc.engine import resize_to_size
+    from idc.resample import to_linear_light
+
+    img = Image.radial_gradient("L").resize((source_size, source_size))
+    img = Image.merge("RGBA", (img, img.rotate(90), img.rotate(180), img.rotate(270)))
+
+    def plain():
+        for size in DEFAULT_SIZES:
+            resize_to_size(img, size)
+
+    def linear():
+        # Conversion to linear light is part of the cost of each job
+        source = to_linear_light(img)
+        for size in DEFAULT_SIZES:
+            source.resize(size)
+
+    results = {}
+    for label, run in (("plain sRGB", plain), ("linear light", linear)):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        print_timings(f"{label} ({source_size}px RGBA)", timings)
+        results[label] = sorted(timings)[len(timings) // 2]
+
+    print(f"linear/plain ratio: {results['linear light'] / results['plain sRGB']:.2f}x")
+
+def bench_raw_input(rounds=3, source_size=(8000, 6000)):
+    """
+    Compare a full decode against the memory-mapped, reduce-while-loading
+    path for a large uncompressed scan, including peak RSS.
+
+    Each run is a fresh process so peak RSS is measured per path (Unix only).
+    """
+    import subprocess
+
+    script = (
+        "import sys, time, resource\n"
+        "from PIL import Image\n"
+        "from idc.formats import DEFAULT_SIZES\n"
+        "from idc.engine import load_image\n"
+        "from idc.rawinput import REDUCING_GAP\n"
+        "min_size = max(DEFAULT_SIZES) * REDUCING_GAP if sys.argv[2] == 'mapped' else None\n"
+        "start = time.perf_counter()\n"
+        "img, _ = load_image(sys.argv[1], min_size)\n"
+        "for size in DEFAULT_SIZES:\n"
+        "    img.resize((size, size), Image.LANCZOS)\n"
+        "print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+
+    # Peak RSS carries over from the parent, so even the sample is created in a child process
+    create_script = (
+        "import sys\n"
+        "from PIL import Image\n"
+        "size = (int(sys.argv[2]), int(sys.argv[3]))\n"
+        "img = Image.linear_gradient('L').resize(size)\n"
+        "img = Image.merge('RGB', (img, img.transpose(Image.FLIP_LEFT_RIGHT), Image.new('L', size, 90)))\n"
+        "img.save(sys.argv[1])\n"
+    )
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        path = os.path.join(temp_dir, "scan.tif")
+        subprocess.run([sys.executable, "-c", create_script, path, str(source_size[0]), str(source_size[1])],
+                       check=True)
+
+        repo_dir = os.path.dirname(os.path.abspath(__file__))
+        for label in ("full", "mapped"):
+            timings = []
+            peak_rss = 0
+            for _ in range(rounds):
+                result = subprocess.run([sys.executable, "-c", script, path, label], cwd=repo_dir,
+                                        capture_output=True, text=True, check=True)
+                seconds, rss = result.stdout.split()
+                timings.append(float(seconds))
+                peak_rss = max(peak_rss, int(rss))
+            print_timings(f"{label} load + resize", timings)
+            print(f"{'':<28} peak RSS={peak_rss / 1024:.0f}MB")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def import_times(statement, repo_dir):
+    """
+    Run statement in a fresh interpreter with -X importtime.
+
+    Returns:
+        List of (module name, nesting level, cumulative microseconds) in import order
+    """
+    import subprocess
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=repo_dir,
+                            capture_output=True, text=True, check=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", nested imports are indented
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), level, int(cumulative)))
+    return entries
+
+# Statement, modules it must not import, and its import time budget in milliseconds
+IMPORT_CHECKS = [
+    ("import idc", ("PIL", "tkinter"), 10),
+    ("import idc.cli", ("PIL", "tkinter"), 30),
+    ("from idc import resize_image", ("tkinter", "numpy"), 150),
+]
+
+def bench_import_time(rounds=5):
+    """
+    Import-time regression check for the headless engine, using python -X importtime.
+
+    Fails (returns False) when a statement imports a forbidden module or its
+    median import time exceeds the budget.
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    # Modules the interpreter imports at startup do not count
+    startup_modules = {name for name, _, _ in import_times("pass", repo_dir)}
+    success = True
+
+    for statement, forbidden, budget_ms in IMPORT_CHECKS:
+        timings = []
+        for _ in range(rounds):
+            entries = import_times(statement, repo_dir)
+            timings.append(sum(cumulative for name, level, cumulative in entries
+                               if level == 0 and name not in startup_modules) / 1e6)
+        print_timings(statement, timings)
+
+        imported = {name.split(".")[0] for name, _, _ in entries}
+        found = [name for name in forbidden if name in imported]
+        median_ms = sorted(timings)[len(timings) // 2] * 1000
+        if found:
+            print(f"  FAIL: imports {', '.join(found)}")
+            success = False
+        if median_ms > budget_ms:
+            print(f"  FAIL: median {median_ms:.1f}ms is over the {budget_ms}ms budget")
+            success = False
+
+    print("Import check passed" if success else "Import check failed")
+    return success
+
+# Output formats covered by the determinism check (None keeps the original format)
+DETERMINISM_FORMATS = [None, "PNG", "JPEG", "WEBP", "ICO", "GIF", "AUTO"]
+
+def create_metadata_images(folder):
+    """Create sources carrying EXIF, comments, text chunks and ICC profiles, and return their paths"""
+    from PIL import ImageCms, PngImagePlugin
+
+    os.makedirs(folder, exist_ok=True)
+    size = (320, 240)
+    gradient = Image.linear_gradient("L").resize(size)
+    photo = Image.merge("RGB", (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT), Image.new("L", size, 60)))
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+    exif = Image.Exif()
+    exif[0x0132] = time.strftime("%Y:%m:%d %H:%M:%S")  # DateTime
+    exif[0x0131] = "benchmark"  # Software
+    photo_path = os.path.join(folder, "photo.jpg")
+    photo.save(photo_path, exif=exif, icc_profile=icc_profile, comment=b"created by the benchmark")
+
+    text = PngImagePlugin.PngInfo()
+    text.add_text("Title", f"logo {time.time()}")
+    logo_path = os.path.join(folder, "logo.png")
+    photo.convert("RGBA").save(logo_path, pnginfo=text, icc_profile=icc_profile)
+
+    frames = [photo.rotate(angle) for angle in (0, 90, 180)]
+    animation_path = os.path.join(folder, "spin.gif")
+    frames[0].save(animation_path, save_all=True, append_images=frames[1:], duration=80,
+                   comment=b"created by the benchmark")
+
+    return [photo_path, logo_path, animation_path]
+
+def convert_deterministic(job):
+    """Convert sources in deterministic mode and return {output name: SHA-256} (runs in pool workers too)"""
+    import io
+    import hashlib
+    import contextlib
+    from idc import resize_image
+
+    input_paths, output_folder = job
+    with contextlib.redirect_stdout(io.StringIO()):
+        for output_format in DETERMINISM_FORMATS:
+            folder = os.path.join(output_folder, output_format or "original")
+            for input_path in input_paths:
+                resize_image(input_path, folder, [16, 48, 96], output_format=output_format, deterministic=True)
+
+    digests = {}
+    for root, _, names in os.walk(output_folder):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                digests[os.path.relpath(path, output_folder)] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+def bench_deterministic(workers=2):
+    """
+    Check that deterministic mode gives byte-identical outputs across runs
+    and process-pool workers, with metadata stripped.
+
+    Fails (returns False) on any difference.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        input_paths = create_metadata_images(os.path.join(temp_dir, "sources"))
+
+        start = time.perf_counter()
+        runs = {"run 1": convert_deterministic((input_paths, os.path.join(temp_dir, "run1")))}
+        print_timings("deterministic conversion", [time.perf_counter() - start])
+        runs["run 2"] = convert_deterministic((input_paths, os.path.join(temp_dir, "run2")))
+        # Converting into the same folder again must leave every file as it is
+        runs["run 1 again"] = convert_deterministic((input_paths, os.path.join(temp_dir, "run1")))
+
+        # Fresh interpreters, so nothing is shared with this process
+        jobs = [(input_paths, os.path.join(temp_dir, f"worker{index}")) for index in range(workers)]
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for index, digests in enumerate(pool.map(convert_deterministic, jobs)):
+                runs[f"worker {index}"] = digests
+
+        success = True
+        expected = runs["run 1"]
+        for label, digests in runs.items():
+            differing = sorted(name for name in set(expected) | set(digests) if expected.get(name) != digests.get(name))
+            if differing:
+                print(f"  FAIL: {label} differs in {len(differing)} files, e.g. {differing[0]}")
+                success = False
+
+        # Comments, EXIF and text chunks must not reach the outputs
+        for name in expected:
+            with Image.open(os.path.join(temp_dir, "run1", name)) as img:
+                leaked = [key for key in ("exif", "comment", "xmp", "Title") if key in img.info]
+            if leaked:
+                print(f"  FAIL: {name} keeps {', '.join(leaked)}")
+                success = False
+
+        print(f"Compared {len(expected)} outputs across {len(runs)} runs")
+        print("Determinism check passed" if success else "Determinism check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def bench_size_plan(rounds=3, source_size=3000, tolerance=4):
+    """
+    Compare resizing every default size from the source against resizing
+    largest first from earlier results (ResizeChain).
+
+    Fails (returns False) if a chained output differs from the direct one
+    by more than tolerance levels in any channel, or if a source that
+    upscale="skip" leaves no size for is not skipped cleanly.
+    """
+    import json
+    import contextlib
+    from idc.engine import resize_image
+    from idc.report import RunReport
+    from idc.formats import DEFAULT_SIZES
+    from idc.rawinput import REDUCING_GAP
+    from idc.resample import ResizeChain, prepare_source, resize_prepared
+
+    noise = Image.effect_noise((256, 256), 64).resize((source_size, source_size), Image.BICUBIC)
+    img = Image.merge("RGBA", (noise, noise.rotate(90), noise.rotate(180),
+                               Image.linear_gradient("L").resize((source_size, source_size))))
+    sizes = sorted(DEFAULT_SIZES, reverse=True)
+    source = prepare_source(img)
+
+    def direct():
+        return [resize_prepared(source, size) for size in sizes]
+
+    def chained():
+        chain = ResizeChain(source, REDUCING_GAP)
+        return [chain.resize(size) for size in sizes]
+
+    results = {}
+    outputs = {}
+    for label, resize in (("direct", direct), ("chained", chained)):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            outputs[label] = resize()
+            timings.append(time.perf_counter() - start)
+        print_timings(f"{label} ({source_size}px RGBA, {len(sizes)} sizes)", timings)
+        results[label] = sorted(timings)[len(timings) // 2]
+
+    print(f"direct/chained ratio: {results['direct'] / results['chained']:.2f}x")
+
+    success = True
+    for size, direct, chained in zip(sizes, outputs["direct"], outputs["chained"]):
+        # Colour of almost transparent pixels carries no weight, so compare premultiplied values
+        direct, chained = direct.convert("RGBa"), chained.convert("RGBa")
+        difference = max(high for _, high in ImageChops.difference(direct, chained).getextrema())
+        if difference > tolerance:
+            print(f"  FAIL: {size}px differs by {difference} levels")
+            success = False
+
+    # Every requested size is larger than the source
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        small_path = os.path.join(temp_dir, "small.png")
+        Image.new("RGB", (16, 16), "red").save(small_path)
+        report_path = os.path.join(temp_dir, "report.jsonl")
+        report = RunReport(report_path)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            converted = resize_image(small_path, os.path.join(temp_dir, "out"), [32, 64], upscale="skip",
+                                     report=report)
+        report.close()
+        with open(report_path) as f:
+            records = [json.loads(line) for line in f]
+        statuses = sorted(record["status"] for record in records if record["type"] != "summary")
+        if not converted or statuses != ["skipped"] * 3:
+            print(f"  FAIL: upscale=\"skip\" with no size left returned {converted}, recorded {statuses}")
+            success = False
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    print("Size plan check passed" if success else "Size plan check failed")
+    return success
+
+def percentile(timings, fraction):
+    """Value below which the given fraction of timings falls"""
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_interactive_load(input_paths, output_folder, interactive_priority, interactive_tenant,
+                         backlog=6, interactive_count=15, think_time=0.05, workers=2):
+    """
+    Run interactive jobs one after another while a bulk tenant keeps backlog jobs queued.
+
+    Returns the latencies of the interactive jobs in seconds.
+    """
+    import threading
+    from idc.formats import DEFAULT_SIZES
+    from idc.scheduler import JobScheduler
+
+    scheduler = JobScheduler(workers)
+    stop = threading.Event()
+
+    def feed_bulk():
+        index = 0
+        while not stop.is_set():
+            if scheduler.stats()["queued"]["bulk"] < backlog:
+                scheduler.submit(input_paths[index % len(input_paths)], os.path.join(output_folder, "bulk"),
+                                 DEFAULT_SIZES, tenant="batch", priority="bulk")
+                index += 1
+            else:
+                time.sleep(0.002)
+
+    feeder = threading.Thread(target=feed_bulk, daemon=True)
+    feeder.start()
+    try:
+        latencies = []
+        for index in range(interactive_count):
+            time.sleep(think_time)
+            job = scheduler.submit(input_paths[index % len(input_paths)], os.path.join(output_folder, "interactive"),
+                                   [64, 32], tenant=interactive_tenant, priority=interactive_priority)
+            job.wait()
+            latencies.append(job.latency)
+        return latencies
+    finally:
+        stop.set()
+        feeder.join()
+        # The queued bulk jobs are cancelled, which also exercises cancellation tokens
+        scheduler.shutdown(cancel_pending=True)
+
+def bench_scheduler():
+    """
+    Load test: latency of interactive jobs under constant bulk load, with
+    the priority scheduler compared to one shared FIFO queue.
+
+    Fails (returns False) if the scheduled p99 is not below the FIFO p50.
+    """
+    import contextlib
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        input_paths = create_sample_images(os.path.join(temp_dir, "sources"), 8, size=(1024, 768))
+
+        results = {}
+        for label, priority, tenant in (("fifo", "bulk", "batch"), ("scheduled", "interactive", "alice")):
+            # Conversions print a line per output; keep the benchmark output readable
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                latencies = run_interactive_load(input_paths, os.path.join(temp_dir, label), priority, tenant)
+            results[label] = latencies
+            print(f"{label:<10} interactive latency  n={len(latencies)}  p50={percentile(latencies, 0.5) * 1000:8.2f}ms  "
+                  f"p99={percentile(latencies, 0.99) * 1000:8.2f}ms")
+
+        success = percentile(results["scheduled"], 0.99) < percentile(results["fifo"], 0.5)
+        print("Scheduler check passed" if success else "Scheduler check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def bench_source_cache(jobs=24, tolerance=4):
+    """
+    Resize a few popular sources to varying size sets, without a cache,
+    with a SourceCache and with a SourceCache keeping 1024px masters.
+
+    Fails (returns False) if cached outputs differ from uncached ones by
+    more than tolerance levels.
+    """
+    import contextlib
+    from idc.cache import SourceCache
+    from idc.engine import resize_image
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        input_paths = create_sample_images(os.path.join(temp_dir, "sources"), 3, size=(2400, 1600))
+        size_sets = [[64, 32, 16], [128, 48], [96, 24]]
+
+        outputs = {}
+        for label, cache in (("no cache", None), ("cache", SourceCache()),
+                             ("cache + master", SourceCache(master_size=1024))):
+            output_folder = os.path.join(temp_dir, label.replace(" ", ""))
+            timings = []
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                for index in range(jobs):
+                    start = time.perf_counter()
+                    resize_image(input_paths[index % len(input_paths)], output_folder,
+                                 size_sets[index % len(size_sets)], source_cache=cache)
+                    timings.append(time.perf_counter() - start)
+            print_timings(f"{label} (per job)", timings)
+            if cache is not None:
+                stats = cache.stats()
+                print(f"  hit ratio {stats['hit_ratio']:.2f}, {stats['items']} entries, "
+                      f"{stats['bytes'] / 1024 / 1024:.1f} MB cached")
+            outputs[label] = output_folder
+
+        success = True
+        reference = outputs["no cache"]
+        for label, output_folder in outputs.items():
+            for name in sorted(os.listdir(reference)):
+                with Image.open(os.path.join(reference, name)) as expected, \
+                        Image.open(os.path.join(output_folder, name)) as actual:
+                    difference = ImageChops.difference(expected.convert("RGB"), actual.convert("RGB"))
+                    worst = max(high for _, high in difference.getextrema())
+                if worst > tolerance:
+                    print(f"  FAIL: {label} {name} differs by {worst} levels")
+                    success = False
+
+        print("Source cache check passed" if success else "Source cache check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def create_icon_images(folder, count, size=128):
+    """Create small RGBA icons, half with soft edges and half with noisy alpha, and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+
+    for i in range(count):
+        noise = Image.effect_noise((16, 16), 48 + i % 32).resize((size, size), Image.BICUBIC)
+        if i % 2:
+            # Almost transparent pixels next to opaque ones show every rounding difference
+            mask = Image.effect_noise((size, size), 128)
+        else:
+            mask = Image.radial_gradient("L").resize((size, size)).point(lambda value: 255 - value)
+        img = Image.merge("RGBA", (noise, noise.rotate(90), Image.new("L", (size, size), (i * 37) % 256), mask))
+        path = os.path.join(folder, f"icon_{i:04d}.png")
+        img.save(path)
+        paths.append(path)
+
+    return paths
+
+def bench_batch_small(count=256, source_size=128, rounds=5, min_speedup=1.2):
+    """
+    Compare converting many small icons one at a time against converting
+    them on several threads (resize_images(batch_small=True)).
+
+    Fails (returns False) if a batched output differs from the per-file
+    one, if an ICO run without a valid size is not rejected like the
+    per-file one, or, with more than one CPU, if the batched run is less
+    than min_speedup times faster.
+    """
+    import contextlib
+    from idc.batch import BATCH_WORKERS
+    from idc.engine import resize_images
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        input_paths = create_icon_images(os.path.join(temp_dir, "icons"), count, source_size)
+        sizes = [64, 48, 32, 24, 16]
+
+        results = {}
+        for label, batch_small in (("per file", False), ("batched", True)):
+            timings = []
+            for _ in range(rounds):
+                output_folder = os.path.join(temp_dir, label.replace(" ", ""))
+                shutil.rmtree(output_folder, ignore_errors=True)
+                with contextlib.redirect_stdout(open(os.devnull, "w")):
+                    start = time.perf_counter()
+                    resize_images(input_paths, output_folder, sizes, dedup=False, batch_small=batch_small)
+                    timings.append(time.perf_counter() - start)
+            results[label] = sorted(timings)[len(timings) // 2]
+            print(f"{label:<10} {results[label]:6.2f}s  {count / results[label]:7.1f} sources/s  "
+                  f"({count} {source_size}px sources, {len(sizes)} sizes)")
+        speedup = results["per file"] / results["batched"]
+        print(f"per file/batched ratio: {speedup:.2f}x on {BATCH_WORKERS} threads")
+
+        success = True
+        if BATCH_WORKERS < 2:
+            print("  One CPU: --batch-small converts one at a time, so the speed is not checked")
+        elif speedup < min_speedup:
+            print(f"  FAIL: batching is {speedup:.2f}x, less than {min_speedup}x faster")
+            success = False
+
+        reference = os.path.join(temp_dir, "perfile")
+        names = sorted(os.listdir(reference))
+        if names != sorted(os.listdir(os.path.join(temp_dir, "batched"))):
+            print("  FAIL: the batched run wrote different files")
+            success = False
+        for name in names:
+            with Image.open(os.path.join(reference, name)) as expected, \
+                    Image.open(os.path.join(temp_dir, "batched", name)) as actual:
+                difference = ImageChops.difference(expected.convert("RGBA"), actual.convert("RGBA"))
+                worst = max(high for _, high in difference.getextrema())
+            if worst:
+                print(f"  FAIL: {name} differs by {worst} levels")
+                success = False
+
+        # No valid ICO size: every source fails, batched or not
+        for batch_small in (False, True):
+            output_folder = os.path.join(temp_dir, f"ico{int(batch_small)}")
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                converted = resize_images(input_paths[:4], output_folder, [20], output_format="ICO",
+                                          dedup=False, batch_small=batch_small)
+            written = os.listdir(output_folder) if os.path.isdir(output_folder) else []
+            if converted or written:
+                print(f"  FAIL: ICO at 20px {'batched' if batch_small else 'per file'} converted {converted} "
+                      f"sources and wrote {len(written)} files")
+                success = False
+
+        print("Batch check passed" if success else "Batch check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def create_bad_inputs(folder, size=(2400, 1600)):
+    """Create inputs that fail to convert to PNG, each for a different reason, and return their paths"""
+    import struct
+    import zlib
+
+    os.makedirs(folder, exist_ok=True)
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    paths = []
+
+    # Cut off a third of the pixel data
+    for ext in (".png", ".jpg", ".bmp", ".webp"):
+        buffer = io.BytesIO()
+        img.save(buffer, format=Image.registered_extensions()[ext])
+        data = buffer.getvalue()
+        paths.append(os.path.join(folder, f"truncated_{ext[1:]}{ext}"))
+        with open(paths[-1], "wb") as f:
+            f.write(data[:len(data) * 2 // 3])
+
+    # A PNG header announcing 12000x12000 pixels
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    paths.append(os.path.join(folder, "bomb.png"))
+    with open(paths[-1], "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 12000, 12000, 8, 2, 0, 0, 0))
+                + chunk(b"IEND", b""))
+
+    paths.append(os.path.join(folder, "not_an_image.png"))
+    with open(paths[-1], "w") as f:
+        f.write("<html>Not found</html>")
+
+    # PNG cannot hold CMYK
+    paths.append(os.path.join(folder, "cmyk.jpg"))
+    img.convert("CMYK").save(paths[-1])
+    return paths
+
+def create_trailing_inputs(folder, size=(2400, 1600)):
+    """Create complete JPEG and PNG files with data after their end marker and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    img = Image.linear_gradient("L").resize(size).convert("RGB")
+    # Stand-in for the video a Motion Photo appends after the JPEG
+    trailer = b"\x00\x00\x00\x18ftypmp42" + os.urandom(64 * 1024)
+    paths = []
+
+    for ext in (".jpg", ".png"):
+        paths.append(os.path.join(folder, f"trailing_{ext[1:]}{ext}"))
+        img.save(paths[-1])
+        with open(paths[-1], "ab") as f:
+            f.write(trailer)
+    return paths
+
+def bench_preflight(good_count=24):
+    """
+    Convert a batch with broken inputs mixed in, with and without the
+    header-only preflight, and time how long rejecting the broken inputs takes.
+
+    Fails (returns False) if the preflight rejects a good input, including
+    files with data after their end marker, or lets a broken one through.
+    """
+    import contextlib
+    from idc.engine import resize_images
+    from idc.preflight import preflight
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        good_paths = create_sample_images(os.path.join(temp_dir, "good"), good_count, size=(2400, 1600))
+        good_paths += create_trailing_inputs(os.path.join(temp_dir, "trailing"))
+        bad_paths = create_bad_inputs(os.path.join(temp_dir, "bad"))
+        input_paths = sorted(good_paths + bad_paths, key=os.path.basename)
+        sizes = [256, 64, 16]
+
+        start = time.perf_counter()
+        results = preflight(input_paths, sizes, "PNG")
+        preflight_seconds = time.perf_counter() - start
+
+        # What the broken inputs cost when they are only found while converting
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            start = time.perf_counter()
+            resize_images(bad_paths, os.path.join(temp_dir, "late"), sizes, output_format="PNG", dedup=False)
+            late_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            converted = resize_images(input_paths, os.path.join(temp_dir, "checked"), sizes, output_format="PNG",
+                                      dedup=False, preflight=True)
+            checked_seconds = time.perf_counter() - start
+
+        print(f"Preflight of {len(input_paths)} inputs: {preflight_seconds * 1000:.1f}ms "
+              f"({preflight_seconds / len(input_paths) * 1000:.2f}ms per input)")
+        print(f"Failing {len(bad_paths)} broken inputs while converting: {late_seconds * 1000:.1f}ms")
+        print(f"Batch with preflight: {checked_seconds:.2f}s, converted {converted} of {len(input_paths)}")
+
+        success = True
+        for result in results:
+            expected_ok = result.path in good_paths
+            if result.ok != expected_ok:
+                print(f"  FAIL: {os.path.basename(result.path)} was {'rejected' if expected_ok else 'accepted'}"
+                      f"{': ' + '; '.join(result.errors) if result.errors else ''}")
+                success = False
+            elif not result.ok:
+                print(f"  rejected {os.path.basename(result.path)}: {result.errors[0][:70]}")
+            elif result.warnings:
+                print(f"  accepted {os.path.basename(result.path)}: {result.warnings[0][:70]}")
+        if converted != len(good_paths):
+            print(f"  FAIL: converted {converted} of {len(good_paths)} good inputs")
+            success = False
+
+        print("Preflight check passed" if success else "Preflight check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def create_lookalike_pairs(folder):
+    """
+    Create pairs of images that a greyscale-only perceptual hash would confuse,
+    and pairs that are real near duplicates.
+
+    Returns:
+        List of (name, first path, second path, whether they should be grouped)
+    """
+    os.makedirs(folder, exist_ok=True)
+
+    def save(name, img, **params):
+        path = os.path.join(folder, name)
+        img.save(path, **params)
+        return path
+
+    still = Image.new("P", (64, 64), 0)
+    still.putpalette([0, 0, 0, 255, 0, 0] + [0] * 762)
+    still.paste(1, (16, 16, 48, 48))
+    frames = [still.copy() for _ in range(4)]
+    for index, frame in enumerate(frames[1:], 1):
+        frame.paste(1, (index * 4, 0, index * 4 + 8, 8))
+
+    photo = Image.linear_gradient("L").resize((400, 300))
+    photo = Image.merge("RGB", (photo, photo.rotate(90), photo.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+
+    return [
+        ("animated vs still", save("anim.gif", frames[0], save_all=True, append_images=frames[1:]),
+         save("still.gif", still, transparency=0), False),
+        ("flat grey with alpha vs flat black I;16", save("grey_alpha.png", Image.new("LA", (64, 64), (128, 200))),
+         save("black_16bit.png", Image.new("I;16", (64, 64), 0)), False),
+        ("flat grey vs flat black", save("grey.png", Image.new("RGB", (64, 64), (128, 128, 128))),
+         save("black.png", Image.new("RGB", (64, 64), (0, 0, 0))), False),
+        ("flat red vs flat green", save("red.png", Image.new("RGB", (64, 64), (200, 0, 0))),
+         save("green.png", Image.new("RGB", (64, 64), (0, 100, 0))), False),
+        ("PNG vs JPEG re-encode", save("photo.png", photo), save("photo.jpg", photo, quality=90), True),
+        ("PNG vs slightly smaller copy", save("photo_a.png", photo),
+         save("photo_b.png", photo.resize((380, 285), Image.LANCZOS)), True),
+    ]
+
+def bench_dedup(count=200):
+    """
+    Time perceptual hashing of a batch and check which look-alike pairs get grouped.
+
+    Fails (returns False) if a pair that must be converted separately is
+    grouped, or if a real near duplicate is not.
+    """
+    from idc.dedup import find_duplicate_groups, perceptual_hash
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        paths = create_sample_images(os.path.join(temp_dir, "samples"), count)
+        timings = []
+        for path in paths:
+            start = time.perf_counter()
+            perceptual_hash(path)
+            timings.append(time.perf_counter() - start)
+        print_timings("perceptual_hash 800x600", timings)
+
+        success = True
+        for name, first, second, expected in create_lookalike_pairs(os.path.join(temp_dir, "pairs")):
+            grouped = len(find_duplicate_groups([first, second], perceptual=True)) == 1
+            print(f"  {name}: {'grouped' if grouped else 'separate'}")
+            if grouped != expected:
+                print(f"  FAIL: {name} should be {'grouped' if expected else 'separate'}")
+                success = False
+
+        print("Dedup check passed" if success else "Dedup check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def create_mode_samples(folder, size=300):
+    """Create sources in modes that AUTO's formats cannot all write as they are, and return their paths"""
+    os.makedirs(folder, exist_ok=True)
+    gradient = Image.linear_gradient("L").resize((size, size))
+    noise = Image.effect_noise((size, size), 64)
+    photo = Image.merge("RGB", (gradient, noise, gradient.rotate(90)))
+
+    # A 16-bit gradient over the full range, which clipping to 8 bits would turn white
+    deep = Image.new("I", (size, size))
+    deep.putdata([x * 65535 // (size - 1) for _ in range(size) for x in range(size)])
+    paletted = photo.convert("P", palette=Image.Palette.ADAPTIVE, colors=64)
+    paletted.info["transparency"] = 0
+
+    samples = {"deep.png": deep.convert("I;16"), "cmyk.jpg": photo.convert("CMYK"), "paletted.png": paletted,
+               "bilevel.png": gradient.convert("1"), "grey_alpha.png": Image.merge("LA", (gradient, noise))}
+    paths = []
+    for name, img in samples.items():
+        path = os.path.join(folder, name)
+        img.save(path)
+        paths.append(path)
+    return paths
+
+def bench_auto_modes(sizes=(256, 64, 16)):
+    """
+    Convert sources in unusual modes (16-bit, CMYK, palette, bilevel) with AUTO.
+
+    Fails (returns False) if the preflight rejects one of them, an output
+    cannot be written, or the 16-bit source is clipped instead of scaled.
+    """
+    import contextlib
+    from idc.engine import resize_image
+    from idc.preflight import check_input
+
+    temp_dir = tempfile.mkdtemp(prefix="idc_bench_")
+    try:
+        success = True
+        for path in create_mode_samples(os.path.join(temp_dir, "sources")):
+            name = os.path.basename(path)
+            result = check_input(path, list(sizes), "AUTO")
+            if not result.ok:
+                print(f"  FAIL: preflight rejected {name}: {'; '.join(result.errors)}")
+                success = False
+
+            outputs = []
+            output_folder = os.path.join(temp_dir, "out")
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                converted = resize_image(path, output_folder, list(sizes), output_format="AUTO", outputs=outputs)
+            seconds = time.perf_counter() - start
+
+            formats = ", ".join(f"{size}: {os.path.splitext(output_path)[1][1:].upper()}"
+                                for size, _, output_path in outputs)
+            print(f"{name:<16} {result.mode:<5} {seconds * 1000:7.1f}ms  {formats}")
+            if not converted:
+                print(f"  FAIL: {name} was not converted")
+                success = False
+                continue
+
+            if result.mode.startswith("I;16"):
+                with Image.open(outputs[0][2]) as img:
+                    low, high = img.convert("L").getextrema()
+                if high - low < 200:
+                    print(f"  FAIL: the 16-bit source came out with levels {low} to {high}")
+                    success = False
+
+        print("AUTO mode check passed" if success else "AUTO mode check failed")
+        return success
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+BENCHMARKS = {
+    "preview": bench_preview_switch,
+    "linear": bench_linear_light,
+    "raw": bench_raw_input,
+    "imports": bench_import_time,
+    "deterministic": bench_deterministic,
+    "plan": bench_size_plan,
+    "scheduler": bench_scheduler,
+    "cache": bench_source_cache,
+    "batch": bench_batch_small,
+    "preflight": bench_preflight,
+    "dedup": bench_dedup,
+    "auto": bench_auto_modes,
+}
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}. Available: {', '.join(BENCHMARKS)}")
+            return
+
+    failed = False
+    for name in names:
+        print("=" * 60)
+        print(f"Benchmark: {name}")
+        print("=" * 60)
+        # Checks return False when they fail
+        if BENCHMARKS[name]() is False:
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,195 @@
 import os
 import sys
+import json
+import time
 import shutil
+import argparse
 import subprocess
-from icon import create_app_icon
 
-def build_app():
-    """Build the Image Dimension Converter application"""
+APP_NAME = "Image Dimension Converter"
+
+# Build profiles. "slim" leaves out the SLIM_EXCLUDES an import trace of the app
+# never loaded, strips symbols from the binaries and skips UPX, whose compressed
+# libraries have to be unpacked again on every launch. A slim build fails unless
+# the frozen app starts
+BUILD_PROFILES = {
+    "full": {"trace": False, "strip": False, "upx": True, "require_startup": False},
+    "slim": {"trace": True, "strip": sys.platform != "win32", "upx": False, "require_startup": True},
+}
+
+# Packages the slim profile may leave out: test suites, developer tools and
+# packaging, which the app never uses at run time. Anything else PyInstaller
+# finds is always bundled, because a trace cannot cover every code path
+SLIM_EXCLUDES = ("unittest", "doctest", "pydoc", "pydoc_data", "pdb", "test", "tkinter.test",
+                 "idlelib", "turtledemo", "lib2to3", "distutils", "setuptools", "pkg_resources",
+                 "pip", "IPython", "pytest", "_pytest", "numpy.testing", "numpy.f2py",
+                 "numpy.distutils", "PyInstaller")
+
+# Output formats the trace converts to; None keeps the input format
+TRACE_FORMATS = (None, "PNG", "JPEG", "GIF", "ICO", "WEBP", "BMP", "AUTO")
+
+REPORT_PATH = os.path.join("dist", "build_report.json")
+
+def trace_imports(output_path):
+    """
+    Run a scripted session of the converter and write the modules it imported to output_path.
+
+    A sample of every input format is converted to every output format,
+    with and without the resize options the GUI offers. If Tk can open a
+    window, the GUI is started, shown an image and the results dialog, and
+    closed again. Runs in its own process, see build_app.
+    """
+    import io
+    import tempfile
+    import contextlib
+    from PIL import Image
+    from idc import resize_images
+    from idc.formats import IMAGE_EXTENSIONS
+
+    gui_traced = False
+    with tempfile.TemporaryDirectory() as folder, contextlib.redirect_stdout(io.StringIO()):
+        inputs = []
+        for ext in sorted(IMAGE_EXTENSIONS):
+            mode = "RGBA" if ext in (".png", ".webp", ".ico", ".tif", ".tiff") else "RGB"
+            path = os.path.join(folder, f"sample_{ext[1:]}{ext}")
+            Image.new(mode, (96, 96), (40, 120, 200, 160)[:len(mode)]).save(path)
+            inputs.append(path)
+        frames = [Image.new("P", (96, 96), index) for index in range(3)]
+        frames[0].save(os.path.join(folder, "sample_animated.gif"), save_all=True, append_images=frames[1:])
+        inputs.append(os.path.join(folder, "sample_animated.gif"))
+
+        results = []
+        for output_format in TRACE_FORMATS:
+            for options in ({}, {"linear_light": True, "sharpen": True, "pixel_snap": True}):
+                results = []
+                resize_images(inputs, os.path.join(folder, "out"), [16, 48], output_format=output_format,
+                              results=results, **options)
+
+        try:
+            import tkinter as tk
+            root = tk.Tk()
+        except Exception:
+            root = None
+        import gui
+        if root is not None:
+            app = gui.ImageResizerApp(root)
+            app.add_to_queue(inputs)
+            app.select_queue_image(inputs[0])
+            root.update()
+            app.show_results(results, "Import trace")
+            root.update()
+            root.destroy()
+            gui_traced = True
+
+    with open(output_path, "w") as f:
+        json.dump({"modules": sorted(sys.modules), "gui": gui_traced}, f)
+
+def find_static_modules(script="gui.py", packages=("idc",)):
+    """
+    Modules an import analysis of script finds, like PyInstaller's, whether they are ever imported or not.
+
+    Every submodule of packages is analysed too, as --collect-submodules
+    bundles them, along with their dependencies, such as NumPy.
+    """
+    import pkgutil
+    import importlib
+    from modulefinder import ModuleFinder
+
+    finder = ModuleFinder()
+    finder.run_script(script)
+    for package in packages:
+        path = importlib.import_module(package).__path__
+        for module in pkgutil.walk_packages(path, package + "."):
+            finder.import_hook(module.name)
+    # Built-in modules are part of the interpreter, so excluding them saves nothing
+    return {name for name, module in finder.modules.items() if module.__file__ and name != "__main__"}
+
+def compute_excludes(static_modules, traced_modules, candidates=SLIM_EXCLUDES):
+    """
+    Work out the --exclude-module names among candidates that the trace did not load.
+
+    A candidate is only listed if PyInstaller would bundle it or something
+    inside it, and it stays if any module inside it was loaded. A
+    candidate inside another excluded one is not listed, so the list is as
+    short as it can be.
+
+    Returns:
+        Sorted list of module names
+    """
+    needed = set(traced_modules)
+    for name in traced_modules:
+        parts = name.split(".")
+        needed.update(".".join(parts[:index]) for index in range(1, len(parts)))
+
+    excludes = set()
+    # Sorted, so packages come before the modules inside them
+    for name in sorted(candidates):
+        if name in needed or not any(module == name or module.startswith(name + ".") for module in static_modules):
+            continue
+        parts = name.split(".")
+        if any(".".join(parts[:index]) in excludes for index in range(1, len(parts))):
+            continue
+        excludes.add(name)
+    return sorted(excludes)
+
+def measure_bundle(folder, largest=10):
+    """Total size and file count of a built bundle, with its largest files"""
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            files.append((os.path.getsize(path), os.path.relpath(path, folder)))
+    files.sort(reverse=True)
+    return {"bytes": sum(size for size, _ in files), "files": len(files),
+            "largest": [{"path": path, "bytes": size} for size, path in files[:largest]]}
+
+def measure_startup(exe_path, runs=5, timeout=60):
+    """
+    Time launches of the built app, from start until its window is idle.
+
+    With IDC_STARTUP_CHECK set, the app closes itself as soon as Tk is idle.
+    The first launch is the closest to a cold start a build can measure;
+    the median of the others is the warm start time.
+
+    Returns:
+        Dict of launch times in seconds, or of the error that stopped a launch
+    """
+    env = dict(os.environ, IDC_STARTUP_CHECK="1")
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            subprocess.run([exe_path], env=env, timeout=timeout, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.SubprocessError) as e:
+            return {"error": str(e), "seconds": times}
+        times.append(time.perf_counter() - started)
+
+    warm = sorted(times[1:])
+    return {"seconds": times, "first_seconds": times[0],
+            "warm_median_seconds": warm[len(warm) // 2] if warm else None}
+
+def format_megabytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+def build_app(profile="full", startup_runs=5):
+    """
+    Build the Image Dimension Converter application.
+
+    Args:
+        profile: Name of a BUILD_PROFILES entry
+        startup_runs: Launches of the built app to time; 0 to skip timing
+
+    Returns:
+        True if the build succeeded, False otherwise
+    """
+    settings = BUILD_PROFILES[profile]
     print("=" * 60)
-    print("Building Image Dimension Converter")
+    print(f"Building Image Dimension Converter ({profile} profile)")
     print("=" * 60)
     
     # Step 1: Check dependencies
-    print("\n[1/5] Checking dependencies...")
+    print("\n[1/6] Checking dependencies...")
     try:
         import PyInstaller
         print("✓ PyInstaller is installed")
@@ -27,14 +205,55 @@ def build_app():
         subprocess.check_call([sys.executable, "-m", "pip", "install", "pillow"])
     
     # Step 2: Create application icon
-    print("\n[2/5] Creating application icon...")
+    print("\n[2/6] Creating application icon...")
+    from icon import create_app_icon
     if create_app_icon():
         print("✓ Application icon created successfully")
     else:
         print("⚠ Could not create icon, will use default")
     
-    # Step 3: Create executable with PyInstaller
-    print("\n[3/5] Building executable...")
+    # Step 3: Find the modules the app needs
+    print("\n[3/6] Tracing imports...")
+    excludes = []
+    traced_count = None
+    if settings["trace"]:
+        # A fresh process, so only what the app itself imports is recorded.
+        # The trace has to run on the platform being built for
+        trace_path = os.path.abspath("import_trace.json")
+        try:
+            subprocess.check_call([sys.executable, os.path.abspath(__file__), "--trace-imports", trace_path])
+            with open(trace_path) as f:
+                trace = json.load(f)
+        except (subprocess.CalledProcessError, OSError, ValueError) as e:
+            print(f"⚠ Error tracing imports: {e}")
+            return False
+        finally:
+            if os.path.exists(trace_path):
+                os.remove(trace_path)
+        
+        # Without the GUI, the trace misses what the app imports for its window
+        if not trace["gui"]:
+            print("⚠ The trace could not open the GUI; build the slim profile with a display "
+                  "(on Linux, under xvfb-run)")
+            return False
+        traced_count = len(trace["modules"])
+        excludes = compute_excludes(find_static_modules("gui.py"), trace["modules"])
+        print(f"✓ {traced_count} modules imported, {len(excludes)} unused packages excluded: "
+              f"{', '.join(excludes) or 'none'}")
+    else:
+        print("Skipped for the full profile")
+    
+    # Step 4: Create executable with PyInstaller
+    print("\n[4/6] Building executable...")
+    
+    # The last report, to compare the new build with
+    previous = None
+    if os.path.exists(REPORT_PATH):
+        try:
+            with open(REPORT_PATH) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            pass
     
     # Check if dist and build directories exist and remove them
     if os.path.exists("dist"):
@@ -47,7 +266,7 @@ def build_app():
     # Build the executable
     build_cmd = [
         "pyinstaller", 
-        "--name=Image Dimension Converter",
+        f"--name={APP_NAME}",
         "--windowed",  # No console window
         "--onedir",    # Create a directory with the executable
         "--clean",     # Clean build files
@@ -58,6 +277,15 @@ def build_app():
     if os.path.exists("icon.ico"):
         build_cmd.append("--icon=icon.ico")
         
+    # The idc package resolves its exports lazily, so PyInstaller cannot see its submodules
+    build_cmd.append("--collect-submodules=idc")
+    
+    build_cmd.extend(f"--exclude-module={name}" for name in excludes)
+    if settings["strip"]:
+        build_cmd.append("--strip")
+    if not settings["upx"]:
+        build_cmd.append("--noupx")
+        
     # Add main script
     build_cmd.append("gui.py")
     
@@ -69,11 +297,11 @@ def build_app():
         print(f"⚠ Error building executable: {e}")
         return False
     
-    # Step 4: Create output directory and copy files
-    print("\n[4/5] Creating distribution package...")
+    # Step 5: Create output directory and copy files
+    print("\n[5/6] Creating distribution package...")
     
     # Create output directory
-    output_dir = "dist/Image Dimension Converter"
+    output_dir = os.path.join("dist", APP_NAME)
     if not os.path.exists(output_dir):
         print(f"Output directory not found: {output_dir}")
         return False
@@ -83,15 +311,42 @@ def build_app():
         shutil.copy("README.md", output_dir)
         print("✓ Copied README.md")
         
-    # Step 5: Test the executable
-    print("\n[5/5] Verifying executable...")
-    exe_path = os.path.join(output_dir, "Image Dimension Converter.exe")
+    # Step 6: Test the executable
+    print("\n[6/6] Verifying executable...")
+    exe_path = os.path.join(output_dir, APP_NAME + (".exe" if sys.platform == "win32" else ""))
     if os.path.exists(exe_path):
         print(f"✓ Executable created: {exe_path}")
     else:
         print(f"⚠ Executable not found: {exe_path}")
         return False
     
+    bundle = measure_bundle(output_dir)
+    print(f"✓ Bundle: {format_megabytes(bundle['bytes'])} in {bundle['files']} files")
+    if previous:
+        change = bundle["bytes"] - previous["bundle"]["bytes"]
+        print(f"  {'+' if change >= 0 else '-'}{format_megabytes(abs(change))} compared with the last "
+              f"build ({previous['profile']} profile)")
+    
+    startup = None
+    if startup_runs or settings["require_startup"]:
+        # At least one launch, so a slim build that cannot start fails here
+        startup = measure_startup(exe_path, max(startup_runs, 1))
+        if "error" in startup:
+            print(f"⚠ The built app did not start: {startup['error']}")
+            if settings["require_startup"]:
+                return False
+        else:
+            print(f"✓ Startup: {startup['first_seconds']:.2f}s first launch", end="")
+            if startup["warm_median_seconds"] is not None:
+                print(f", {startup['warm_median_seconds']:.2f}s median of the next {startup_runs - 1}", end="")
+            print()
+    
+    report = {"profile": profile, "command": build_cmd, "traced_modules": traced_count,
+              "excludes": excludes, "bundle": bundle, "startup": startup}
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Build report written to {REPORT_PATH}")
+    
     # Final success message
     print("\n" + "=" * 60)
     print("✓ Build completed successfully!")
@@ -100,5 +355,20 @@ def build_app():
     
     return True
 
+def main():
+    parser = argparse.ArgumentParser(description="Build the Image Dimension Converter executable")
+    parser.add_argument("--profile", choices=sorted(BUILD_PROFILES), default="full",
+                        help="full bundles everything PyInstaller finds; slim leaves out modules the app never imports")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="Launches of the built app to time (default: 5, 0 to skip)")
+    # Used by the slim profile to trace imports in a fresh process
+    parser.add_argument("--trace-imports", metavar="OUT_JSON", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trace_imports:
+        trace_imports(args.trace_imports)
+        return 0
+    return 0 if build_app(args.profile, args.startup_runs) else 1
+
 if __name__ == "__main__":
-    build_app() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
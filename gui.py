@@ -1,17 +1,145 @@
+import io
 import os
+import queue
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk
 import sys
 import math
-from main import resize_image
-import re
+from idc import resize_images, plan_outputs
+from idc.engine import add_content_keys
+from idc.resample import premultiply_alpha, unpremultiply_alpha
+from idc.naming import FIELDS, compile_template, find_collisions
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import time
 
+# Longest side of the smallest preview level; every level above it doubles
+PREVIEW_BASE_LEVEL = 256
+
+# Memory the cached previews may use together, in bytes
+PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# Outputs shown in the results window; only these keep their encoded bytes
+RESULT_CELLS = 120
+
+class ConversionResults(list):
+    """
+    Results of one conversion, as filled in by resize_images.
+    
+    Only the first keep_data outputs keep their encoded bytes for the results
+    window. Later ones keep their metadata only, so converting a large queue
+    does not hold every output in memory.
+    """
+    
+    def __init__(self, keep_data=RESULT_CELLS):
+        super().__init__()
+        self.keep_data = keep_data
+    
+    def append(self, result):
+        if len(self) >= self.keep_data:
+            result = {key: value for key, value in result.items() if key != "data"}
+        super().append(result)
+
+class PreviewPyramid:
+    """
+    Preview scales of one image, decoded once.
+    
+    Levels are the image reduced to a longest side of max_side (or its own
+    size), then halved down to PREVIEW_BASE_LEVEL. A preview of any size is
+    resampled from the smallest level that is at least as large, so making
+    the window smaller never decodes the file again; a preview larger than
+    the top level decodes the file once more at that size. Levels with
+    alpha are kept premultiplied, so halving them does not bleed the colour
+    of transparent pixels into edges. PhotoImages of recent display sizes
+    are kept as well.
+    """
+
+    def __init__(self, path, max_side, max_photos=4):
+        self.path = path
+        self.max_photos = max_photos
+        self.photos = {}
+        self.build(max_side)
+
+    def build(self, max_side):
+        """Decode the image and build the levels up to a longest side of max_side"""
+        with Image.open(self.path) as img:
+            self.dimensions = img.size
+            
+            # JPEGs can be decoded at a fraction of their size right away
+            img.draft(img.mode, (max_side, max_side))
+            has_alpha = "A" in img.getbands() or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+        
+        # Largest first
+        self.levels = [premultiply_alpha(img)]
+        while max(self.levels[-1].size) >= PREVIEW_BASE_LEVEL * 2:
+            self.levels.append(self.levels[-1].reduce(2))
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the levels and the cached PhotoImages"""
+        levels = sum(level.width * level.height * len(level.getbands()) for level in self.levels)
+        return levels + sum(photo.width() * photo.height() * 4 for photo in self.photos.values())
+
+    def display_size(self, box, magnify=1):
+        """
+        Size the image is shown at in a box of (width, height) pixels.
+        
+        Larger images are fitted into the box. Smaller ones are not upscaled,
+        except by the whole factor magnify, so they keep their physical size
+        on high DPI displays.
+        """
+        width, height = self.dimensions
+        fit = min(box[0] / width, box[1] / height)
+        if fit >= 1:
+            factor = max(1, min(magnify, int(fit)))
+            return width * factor, height * factor
+        return max(1, int(width * fit)), max(1, int(height * fit))
+
+    def level_for(self, size):
+        """Smallest level that covers size, or the largest level"""
+        for level in reversed(self.levels):
+            if level.width >= size[0] and level.height >= size[1]:
+                return level
+        return self.levels[0]
+
+    def photo(self, box, magnify=1):
+        """PhotoImage of the image fitted into box, from the nearest level"""
+        size = self.display_size(box, magnify)
+        if size in self.photos:
+            # Most recently used last
+            self.photos[size] = self.photos.pop(size)
+            return self.photos[size]
+        
+        top = self.levels[0]
+        if (size[0] > top.width or size[1] > top.height) and max(top.size) < max(self.dimensions):
+            # The preview grew past the top level, and the file has more detail
+            self.build(max(size))
+        
+        level = self.level_for(size)
+        if level.size == size:
+            img = level
+        elif size[0] > level.width:
+            # Magnified small images keep hard pixel edges
+            img = level.resize(size, Image.NEAREST)
+        else:
+            img = level.resize(size, Image.LANCZOS)
+        
+        photo = ImageTk.PhotoImage(unpremultiply_alpha(img))
+        self.photos[size] = photo
+        while len(self.photos) > self.max_photos:
+            del self.photos[next(iter(self.photos))]
+        return photo
+
 class ImageResizerApp:
-    # Class-level cache for images
+    # Class-level cache of preview pyramids by path
     _image_cache = {}
+    # Class-level cache for decoded filmstrip thumbnails (PIL images)
+    _thumbnail_cache = {}
 
     def __init__(self, root):
         self.root = root
@@ -25,6 +153,9 @@ class ImageResizerApp:
         self.root.resizable(True, True)
         
         self.selected_image_path = None
+        # (path, mtime, size) and SHA-256 of the last file the naming preview hashed
+        self.preview_hash = (None, None)
+        self.image_queue = []
         self.output_folder = "resized_images"
         self.sizes = [16, 24, 32, 48, 64, 128, 256, 512]
         
@@ -46,6 +177,25 @@ class ImageResizerApp:
         
         # Add a touch of animation
         self.animation_frame = 0
+        self.footer_color = None
+        
+        # Registry of widgets that are updated after setup (avoids tree walks)
+        self.widgets = {}
+        
+        # Filmstrip state - only visible cells hold a PhotoImage
+        self.thumbnail_size = 72
+        self.filmstrip_cell_width = 96
+        self.filmstrip_cell_height = 104
+        self._filmstrip_cells = {}
+        
+        # Preview state - the preview follows the size of its container
+        self._preview_box = None
+        self._preview_refresh = None
+        
+        # Thumbnails are decoded off the UI thread and handed back through a queue
+        self.thumbnail_pool = ThreadPoolExecutor(max_workers=4)
+        self._thumbnail_results = queue.Queue()
+        self._thumbnail_pending = set()
         
         # Set up custom styles for futuristic metal theme
         self.setup_styles()
@@ -57,6 +207,12 @@ class ImageResizerApp:
         
         # Start animations
         self.animate_elements()
+        
+        # Start collecting finished thumbnails
+        self.poll_thumbnails()
+        
+        # Stop background work when the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def animate_elements(self):
         """Add subtle animations with optimized performance"""
@@ -66,23 +222,17 @@ class ImageResizerApp:
         self.animation_frame = (self.animation_frame + 1) % 100
         pulse_factor = 0.5 + math.sin(self.animation_frame / 15) * 0.05
         
-        # Cache widget references to improve performance
-        if not hasattr(self, '_cached_widgets'):
-            self._cached_widgets = {}
-            
-            # Find and cache the footer text widget
-            for widget in self.root.winfo_children():
-                if isinstance(widget, ttk.Label) and "Ready" in str(widget):
-                    self._cached_widgets['footer'] = widget
-                    break
-        
-        # Animate only if the cached widget exists
-        if 'footer' in self._cached_widgets:
+        # Animate only if the footer widget has been registered
+        footer = self.widgets.get('footer')
+        if footer is not None:
             r = int(min(160, max(100, 130 + pulse_factor * 30)))
             g = int(min(160, max(100, 130 + pulse_factor * 30)))
             b = int(min(190, max(130, 160 + pulse_factor * 30)))
             color = f"#{r:02x}{g:02x}{b:02x}"
-            self._cached_widgets['footer'].configure(foreground=color)
+            # The pulse only spans a few colours, so most frames change nothing
+            if color != self.footer_color:
+                footer.configure(foreground=color)
+                self.footer_color = color
         
         # Schedule the next animation frame
         self.root.after(animation_interval, self.animate_elements)
@@ -491,7 +641,7 @@ class ImageResizerApp:
         
         pattern_help = ttk.Label(
             pattern_help_frame,
-            text="• {name} = original filename\n• {num} = sequential number",
+            text="\n".join(f"• {{{field}}} = {description}" for field, description in FIELDS.items()),
             font=("Arial", 8),
             foreground="#BBBBBB",
             background=self.panel_bg,
@@ -639,7 +789,8 @@ class ImageResizerApp:
             {"value": "JPEG", "text": "JPG", "desc": "Smaller file size"},
             {"value": "GIF", "text": "GIF", "desc": "Limited colors"},
             {"value": "ICO", "text": "ICO", "desc": "Windows icons"},
-            {"value": "WEBP", "text": "WEBP", "desc": "Web optimized"}
+            {"value": "WEBP", "text": "WEBP", "desc": "Web optimized"},
+            {"value": "AUTO", "text": "AUTO", "desc": "Smallest per size"}
         ]
         
         # Format radio button variable
@@ -679,6 +830,40 @@ class ImageResizerApp:
                 background=self.panel_bg
             ).pack(side=tk.LEFT)
         
+        # Resampling quality options
+        quality_frame = ttk.Frame(format_frame, style="Panel.TFrame")
+        quality_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
+        
+        self.linear_light_var = tk.BooleanVar(value=False)
+        linear_light_cb = tk.Checkbutton(
+            quality_frame,
+            text="Gamma-correct resizing (linear light)",
+            variable=self.linear_light_var,
+            bg=self.panel_bg,
+            fg="white",
+            selectcolor="#333333",
+            activebackground=self.panel_bg,
+            activeforeground=self.accent_color,
+            font=("Arial", 9)
+        )
+        linear_light_cb.pack(anchor=tk.W)
+        
+        self.sharpen_var = tk.BooleanVar(value=False)
+        self.pixel_snap_var = tk.BooleanVar(value=False)
+        for text, variable in (("Sharpen downscaled outputs", self.sharpen_var),
+                               ("Snap edges of small icons (32px and below)", self.pixel_snap_var)):
+            tk.Checkbutton(
+                quality_frame,
+                text=text,
+                variable=variable,
+                bg=self.panel_bg,
+                fg="white",
+                selectcolor="#333333",
+                activebackground=self.panel_bg,
+                activeforeground=self.accent_color,
+                font=("Arial", 9)
+            ).pack(anchor=tk.W)
+        
         # Right panel - Preview console (row 1, column 1)
         right_frame = ttk.Frame(self.root, style="Panel.TFrame")
         right_frame.grid(row=1, column=1, sticky="nsew", padx=(5, 10), pady=(5, 10))
@@ -690,6 +875,7 @@ class ImageResizerApp:
         preview_frame.grid(row=0, column=0, sticky="nsew")
         preview_frame.grid_columnconfigure(0, weight=1)
         preview_frame.grid_rowconfigure(0, weight=1)
+        self.widgets['preview_frame'] = preview_frame
         
         # Container for preview with tech-themed background
         self.preview_container = ttk.Frame(preview_frame, style="Preview.TFrame")
@@ -715,6 +901,57 @@ class ImageResizerApp:
         self.preview_label.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
         self.preview_label.lower()  # Initially keep it behind the message
         
+        # Re-render the preview once the window has stopped resizing
+        self.preview_container.bind("<Configure>", self.schedule_preview_refresh)
+        
+        # Image queue console with a virtualized thumbnail filmstrip
+        queue_frame = ttk.LabelFrame(right_frame, text="IMAGE QUEUE", padding="10")
+        queue_frame.grid(row=1, column=0, sticky="ew", pady=(8, 0))
+        queue_frame.grid_columnconfigure(0, weight=1)
+        
+        self.filmstrip = tk.Canvas(
+            queue_frame,
+            height=self.filmstrip_cell_height,
+            background=self.preview_bg,
+            highlightthickness=0,
+            xscrollincrement=self.filmstrip_cell_width
+        )
+        self.filmstrip.grid(row=0, column=0, columnspan=2, sticky="ew")
+        
+        filmstrip_scrollbar = ttk.Scrollbar(queue_frame, orient="horizontal", command=self.filmstrip.xview)
+        filmstrip_scrollbar.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(5, 5))
+        
+        # Re-render whenever the visible part of the filmstrip changes
+        def on_filmstrip_scroll(first, last):
+            filmstrip_scrollbar.set(first, last)
+            self.render_filmstrip()
+        
+        self.filmstrip.configure(xscrollcommand=on_filmstrip_scroll)
+        self.filmstrip.bind("<Configure>", lambda e: self.render_filmstrip())
+        self.filmstrip.bind("<Button-1>", self.on_filmstrip_click)
+        self.filmstrip.bind("<MouseWheel>", lambda e: self.filmstrip.xview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.filmstrip.bind("<Button-4>", lambda e: self.filmstrip.xview_scroll(-1, "units"))
+        self.filmstrip.bind("<Button-5>", lambda e: self.filmstrip.xview_scroll(1, "units"))
+        
+        self.queue_label = ttk.Label(
+            queue_frame,
+            text="No images queued",
+            font=("Arial", 9),
+            foreground="#BBBBBB",
+            background=self.panel_bg
+        )
+        self.queue_label.grid(row=2, column=0, sticky="w")
+        
+        clear_queue_btn = tk.Button(
+            queue_frame,
+            text="CLEAR QUEUE",
+            command=self.clear_queue,
+            font=("Arial", 8, "bold"),
+            cursor="hand2"
+        )
+        self.beautify_button(clear_queue_btn, "#444444", "#555555", "#333333")
+        clear_queue_btn.grid(row=2, column=1, sticky="e")
+        
         # Command console - prominent convert button
         command_frame = ttk.Frame(self.root, padding="10 15 10 15", style="Panel.TFrame")
         command_frame.grid(row=2, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 5))
@@ -750,6 +987,7 @@ class ImageResizerApp:
             background=self.bg_color
         )
         self.status_text.grid(row=0, column=1, sticky="w")
+        self.widgets['footer'] = self.status_text
         
         # Right-aligned build info
         build_info = ttk.Label(
@@ -811,18 +1049,204 @@ class ImageResizerApp:
             ("All files", "*.*")
         ]
         
-        file_path = filedialog.askopenfilename(
-            title="Select Image",
+        file_paths = filedialog.askopenfilenames(
+            title="Select Images",
             filetypes=filetypes
         )
         
-        if file_path:
-            self.selected_image_path = file_path
-            self.path_var.set(file_path)
-            self.update_preview()
+        if file_paths:
+            self.add_to_queue(file_paths)
+            self.select_queue_image(file_paths[0])
+    
+    def select_queue_image(self, file_path):
+        """Show a queued image in the preview panel"""
+        self.selected_image_path = file_path
+        self.path_var.set(file_path)
+        self.update_preview()
+        self.update_naming_preview()
+        
+        # Manage cache size
+        self.manage_image_cache()
+        
+        # Move the selection highlight
+        self.render_filmstrip()
+    
+    def add_to_queue(self, file_paths):
+        """Add images to the conversion queue, skipping ones already queued"""
+        queued = set(self.image_queue)
+        for file_path in file_paths:
+            if file_path not in queued:
+                self.image_queue.append(file_path)
+                queued.add(file_path)
+        
+        self.update_queue_view()
+    
+    def clear_queue(self):
+        """Remove all images from the conversion queue"""
+        self.image_queue = []
+        self._filmstrip_cells = {}
+        self.filmstrip.delete("all")
+        self.update_queue_view()
+        self.status_text.config(text="Image queue cleared")
+    
+    def update_queue_view(self):
+        """Resize the filmstrip scroll region and refresh the queue count"""
+        strip_width = len(self.image_queue) * self.filmstrip_cell_width
+        self.filmstrip.configure(scrollregion=(0, 0, strip_width, self.filmstrip_cell_height))
+        
+        if self.image_queue:
+            self.queue_label.config(text=f"{len(self.image_queue)} images queued")
+        else:
+            self.queue_label.config(text="No images queued")
+        
+        self.render_filmstrip()
+    
+    def render_filmstrip(self):
+        """Create canvas items only for the filmstrip cells that are visible"""
+        cell_width = self.filmstrip_cell_width
+        left = self.filmstrip.canvasx(0)
+        right = left + self.filmstrip.winfo_width()
+        visible = range(max(0, int(left // cell_width)),
+                        min(len(self.image_queue), int(right // cell_width) + 1))
+        
+        # Drop cells (and their PhotoImages) that scrolled out of view
+        for index in list(self._filmstrip_cells):
+            if index not in visible:
+                for item in self._filmstrip_cells.pop(index)["items"]:
+                    self.filmstrip.delete(item)
+        
+        for index in visible:
+            cell = self._filmstrip_cells.get(index)
+            if cell is None:
+                cell = self.create_filmstrip_cell(index)
+                self._filmstrip_cells[index] = cell
             
-            # Manage cache size
-            self.manage_image_cache()
+            if cell["path"] == self.selected_image_path:
+                self.filmstrip.itemconfig(cell["frame"], outline=self.accent_color)
+            else:
+                self.filmstrip.itemconfig(cell["frame"], outline=self.highlight_color)
+    
+    def create_filmstrip_cell(self, index):
+        """Create the canvas items for one filmstrip cell"""
+        path = self.image_queue[index]
+        x0 = index * self.filmstrip_cell_width
+        center_x = x0 + self.filmstrip_cell_width // 2
+        thumb_center_y = 4 + self.thumbnail_size // 2
+        
+        frame = self.filmstrip.create_rectangle(
+            x0 + 4, 2, x0 + self.filmstrip_cell_width - 4, self.thumbnail_size + 8,
+            outline=self.highlight_color, width=2
+        )
+        image_item = self.filmstrip.create_image(center_x, thumb_center_y)
+        placeholder = self.filmstrip.create_text(
+            center_x, thumb_center_y, text="...", fill="#666666", font=("Arial", 9)
+        )
+        
+        # Truncated filename under the thumbnail
+        name = os.path.basename(path)
+        if len(name) > 14:
+            name = name[:11] + "..."
+        label = self.filmstrip.create_text(
+            center_x, self.thumbnail_size + 18, text=name, fill="#BBBBBB", font=("Arial", 7)
+        )
+        
+        cell = {
+            "path": path,
+            "frame": frame,
+            "image_item": image_item,
+            "placeholder": placeholder,
+            "photo": None,
+            "items": [frame, image_item, placeholder, label]
+        }
+        
+        if path in self.__class__._thumbnail_cache:
+            self.show_filmstrip_thumbnail(cell)
+        else:
+            self.request_thumbnail(path)
+        
+        return cell
+    
+    def show_filmstrip_thumbnail(self, cell):
+        """Attach a cached thumbnail to a visible filmstrip cell"""
+        thumbnail = self.__class__._thumbnail_cache.get(cell["path"])
+        if thumbnail is None:
+            # Decoding failed, leave a marker instead of the image
+            self.filmstrip.itemconfig(cell["placeholder"], text="⚠", fill=self.warning_color)
+            return
+        
+        photo = ImageTk.PhotoImage(thumbnail)
+        self.filmstrip.itemconfig(cell["image_item"], image=photo)
+        self.filmstrip.itemconfig(cell["placeholder"], text="")
+        cell["photo"] = photo  # Keep a reference while the cell is visible
+    
+    def request_thumbnail(self, path):
+        """Decode a thumbnail on the background pool"""
+        if path in self._thumbnail_pending:
+            return
+        
+        self._thumbnail_pending.add(path)
+        pyramid = self.__class__._image_cache.get(path)
+        if pyramid is not None:
+            # The preview already decoded this image; its smallest level is plenty
+            future = self.thumbnail_pool.submit(self.thumbnail_from_level, pyramid.levels[-1],
+                                                self.thumbnail_size)
+        else:
+            future = self.thumbnail_pool.submit(self.load_thumbnail, path, self.thumbnail_size)
+        future.add_done_callback(lambda f, path=path: self._thumbnail_results.put((path, f)))
+    
+    @staticmethod
+    def load_thumbnail(path, size):
+        """Decode a small thumbnail of an image (runs on a worker thread)"""
+        # thumbnail() loads the pixels, so the file can be closed right after
+        with Image.open(path) as img:
+            # Let JPEG decode at a reduced scale when possible
+            img.draft("RGB", (size, size))
+            img.thumbnail((size, size), Image.LANCZOS)
+        
+        if img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA")
+        return img
+    
+    @staticmethod
+    def thumbnail_from_level(level, size):
+        """Reduce a premultiplied preview level to a thumbnail (runs on a worker thread)"""
+        img = level.copy()
+        img.thumbnail((size, size), Image.LANCZOS)
+        return unpremultiply_alpha(img)
+    
+    def poll_thumbnails(self):
+        """Hand finished thumbnails from the worker pool to the filmstrip"""
+        while True:
+            try:
+                path, future = self._thumbnail_results.get_nowait()
+            except queue.Empty:
+                break
+            
+            self._thumbnail_pending.discard(path)
+            try:
+                thumbnail = future.result()
+            except Exception as e:
+                print(f"Thumbnail error for {path}: {e}")
+                thumbnail = None
+            
+            self.__class__._thumbnail_cache[path] = thumbnail
+            for cell in self._filmstrip_cells.values():
+                if cell["path"] == path:
+                    self.show_filmstrip_thumbnail(cell)
+        
+        self.manage_thumbnail_cache()
+        self.root.after(50, self.poll_thumbnails)
+    
+    def on_filmstrip_click(self, event):
+        """Select the queued image under the mouse"""
+        index = int(self.filmstrip.canvasx(event.x) // self.filmstrip_cell_width)
+        if 0 <= index < len(self.image_queue):
+            self.select_queue_image(self.image_queue[index])
+    
+    def on_close(self):
+        """Stop the thumbnail workers and close the window"""
+        self.thumbnail_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
     
     def browse_output_folder(self):
         folder_path = filedialog.askdirectory(
@@ -833,93 +1257,87 @@ class ImageResizerApp:
             self.output_folder = folder_path
             self.output_var.set(folder_path)
     
+    def dpi_scale(self):
+        """Display scaling relative to 96 DPI, e.g. 2.0 on a 4K laptop screen at 200%"""
+        try:
+            return max(1.0, self.root.winfo_fpixels("1i") / 96)
+        except tk.TclError:
+            return 1.0
+    
+    def preview_size(self):
+        """Pixels available for the preview image inside its container"""
+        width = self.preview_container.winfo_width() - 10
+        height = self.preview_container.winfo_height() - 10
+        if width < 50 or height < 50:
+            # Not laid out yet
+            side = int(400 * self.dpi_scale())
+            return side, side
+        return width, height
+    
+    def schedule_preview_refresh(self, event=None):
+        """Debounce resize events: only the last one within 150 ms re-renders the preview"""
+        if self._preview_refresh is not None:
+            self.root.after_cancel(self._preview_refresh)
+        self._preview_refresh = self.root.after(150, self.refresh_preview)
+    
+    def refresh_preview(self):
+        """Fit the current preview to a changed container size, from the cached levels"""
+        self._preview_refresh = None
+        pyramid = self.__class__._image_cache.get(self.selected_image_path)
+        if pyramid is None or self.preview_size() == self._preview_box:
+            return
+        self.show_preview_photo(pyramid)
+    
+    def show_preview_photo(self, pyramid):
+        """Show the pyramid's image fitted into the preview container"""
+        self._preview_box = self.preview_size()
+        photo = pyramid.photo(self._preview_box, int(self.dpi_scale()))
+        
+        # Update label
+        self.preview_label.config(image=photo)
+        self.preview_label.image = photo  # Keep a reference
+        
+        # Hide the message and raise the image
+        self.preview_msg.place_forget()
+        self.preview_label.lift()
+    
     def update_preview(self):
         if not self.selected_image_path:
             return
         
         try:
-            # Check if image is already in cache
-            cache_key = self.selected_image_path
-            
-            if cache_key in self.__class__._image_cache:
-                # Use cached photo
-                photo = self.__class__._image_cache[cache_key]
-                
-                # Update label
-                self.preview_label.config(image=photo)
-                self.preview_label.image = photo  # Keep a reference
-                
-                # Hide the message and raise the image
-                self.preview_msg.place_forget()
-                self.preview_label.lift()
-                
-                # Display cached image info
-                filename = os.path.basename(self.selected_image_path)
-                dimensions = self.__class__._image_cache.get(f"{cache_key}_dimensions", "Unknown dimensions")
-                self.update_preview_title(f"IMAGE PREVIEW - ORIGINAL: {dimensions} PIXELS")
-                self.status_text.config(text=f"Image loaded: {filename} (cached)")
-                return
-            
-            # Open image and create thumbnail for preview
-            img = Image.open(self.selected_image_path)
-            
-            # Calculate the aspect ratio
-            width, height = img.size
-            aspect_ratio = width / height
-            
-            # Store dimensions for caching
-            dimensions = f"{width}x{height}"
-            self.__class__._image_cache[f"{cache_key}_dimensions"] = dimensions
-            
-            # Maximum preview size
-            max_width = 400  # Larger preview
-            max_height = 400
-            
-            # Determine new dimensions while maintaining aspect ratio
-            if aspect_ratio > 1:  # Wider than tall
-                new_width = min(width, max_width)
-                new_height = int(new_width / aspect_ratio)
-            else:  # Taller than wide
-                new_height = min(height, max_height)
-                new_width = int(new_height * aspect_ratio)
-            
-            # Resize for preview - use LANCZOS for better quality
-            img_preview = img.resize((new_width, new_height), Image.LANCZOS)
-            
-            # Convert to PhotoImage and cache it
-            photo = ImageTk.PhotoImage(img_preview)
-            self.__class__._image_cache[cache_key] = photo
+            filename = os.path.basename(self.selected_image_path)
+            cache = self.__class__._image_cache
             
-            # Update label
-            self.preview_label.config(image=photo)
-            self.preview_label.image = photo  # Keep a reference
+            # Check if image is already in cache
+            pyramid = cache.pop(self.selected_image_path, None)
+            cached = pyramid is not None
+            if not cached:
+                # Levels up to the current preview size; a larger window builds larger ones
+                pyramid = PreviewPyramid(self.selected_image_path, max(self.preview_size()))
+            # Most recently used last
+            cache[self.selected_image_path] = pyramid
             
-            # Hide the message and raise the image
-            self.preview_msg.place_forget()
-            self.preview_label.lift()
+            self.show_preview_photo(pyramid)
             
             # Update window title with image name
-            filename = os.path.basename(self.selected_image_path)
             self.root.title(f"Image Dimension Converter - {filename}")
             
             # Show image dimensions in the preview frame title
-            dimensions = f"IMAGE PREVIEW - ORIGINAL: {width}x{height} PIXELS"
-            self.update_preview_title(dimensions)
+            width, height = pyramid.dimensions
+            self.update_preview_title(f"IMAGE PREVIEW - ORIGINAL: {width}x{height} PIXELS")
             
             # Update status
-            self.status_text.config(text=f"Image loaded: {filename}")
+            self.status_text.config(text=f"Image loaded: {filename}" + (" (cached)" if cached else ""))
             
         except Exception as e:
             messagebox.showerror("Preview Error", f"Error loading preview: {e}")
     
     def update_preview_title(self, new_title):
         """Update the preview frame title dynamically"""
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Frame):
-                for child in widget.winfo_children():
-                    if isinstance(child, ttk.LabelFrame) and "PREVIEW" in str(child) or "Preview" in str(child):
-                        child.configure(text=new_title)
-                        return
+        preview_frame = self.widgets.get('preview_frame')
+        if preview_frame is not None:
+            preview_frame.configure(text=new_title)
     
     def toggle_naming_options(self):
         """Enable or disable naming options based on checkbox"""
@@ -994,6 +1412,9 @@ class ImageResizerApp:
             messagebox.showwarning("No Image", "Please select an image first.")
             return
         
+        # Convert the whole queue, or just the selected image
+        input_paths = list(self.image_queue) or [self.selected_image_path]
+        
         # Get output folder
         output_folder = self.output_var.get()
         
@@ -1019,6 +1440,30 @@ class ImageResizerApp:
         if output_format == "ORIGINAL":
             output_format = None
         
+        # Refuse patterns that are invalid or would make different outputs overwrite each other
+        try:
+            planned = [
+                (output_path, f"{os.path.basename(input_path)} at {size}x{size}", input_path, size)
+                for input_path in input_paths
+                for size, _, output_path in plan_outputs(input_path, output_folder, selected_sizes,
+                                                         naming_pattern, start_number,
+                                                         include_dimensions, output_format)
+            ]
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Invalid Pattern", str(e))
+            return
+        
+        collisions = find_collisions(add_content_keys(planned))
+        if collisions:
+            output_path, owners = next(iter(collisions.items()))
+            messagebox.showerror(
+                "Name Collision",
+                f"{len(collisions)} output files would be written more than once, e.g.\n"
+                f"{os.path.basename(output_path)}: {', '.join(owners)}\n\n"
+                "Add {num}, {w} or {hash} to the pattern, or include the dimensions."
+            )
+            return
+        
         # Show processing indicator with improved animation
         self.root.config(cursor="wait")
         self.status_text.config(text="Converting dimensions... Please wait")
@@ -1040,17 +1485,25 @@ class ImageResizerApp:
         pulse_indicator()
         self.root.update()
         
+        # Outputs for the results window, with the encoded bytes of the ones it shows
+        results = ConversionResults()
+        
         try:
-            # Process the image with naming options and format
-            success = resize_image(
-                self.selected_image_path, 
+            # Process the images with naming options and format
+            converted_count = resize_images(
+                input_paths, 
                 output_folder, 
                 selected_sizes,
                 naming_pattern,
                 start_number,
                 include_dimensions,
-                output_format
+                output_format,
+                linear_light=self.linear_light_var.get(),
+                sharpen=self.sharpen_var.get(),
+                pixel_snap=self.pixel_snap_var.get(),
+                results=results
             )
+            success = converted_count == len(input_paths)
             
             # Stop the pulsing animation
             if hasattr(self, "_pulse_animation"):
@@ -1074,20 +1527,26 @@ class ImageResizerApp:
                 
                 # Show format info in status text
                 format_info = output_format if output_format else "original format"
-                self.status_text.config(text=f"Converted {len(selected_sizes)} images to {format_info}")
+                self.status_text.config(
+                    text=f"Converted {len(input_paths)} images x {len(selected_sizes)} dimensions to {format_info}"
+                )
                 
-                messagebox.showinfo(
-                    "Conversion Complete", 
-                    f"Successfully created {len(selected_sizes)} image dimensions in {output_folder}"
+                self.show_results(
+                    results,
+                    f"Successfully created {len(selected_sizes)} image dimensions "
+                    f"for {len(input_paths)} images in {output_folder}"
                 )
             else:
-                self.status_text.config(text="Conversion failed")
+                self.status_text.config(text=f"Conversion failed for {len(input_paths) - converted_count} images")
                 self.status_indicator.itemconfig(1, fill="#FF0000")  # Red for error
                 
                 messagebox.showerror(
                     "Conversion Failed",
-                    "An error occurred during dimension conversion."
+                    f"An error occurred during dimension conversion.\n"
+                    f"Converted {converted_count} of {len(input_paths)} images."
                 )
+                if results:
+                    self.show_results(results, f"Converted {converted_count} of {len(input_paths)} images")
         except Exception as e:
             # Stop the pulsing animation
             if hasattr(self, "_pulse_animation"):
@@ -1099,6 +1558,174 @@ class ImageResizerApp:
             self.status_indicator.itemconfig(1, fill="#FF0000")  # Red for error
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    @staticmethod
+    def format_bytes(count):
+        """Human readable byte count"""
+        if count < 1024:
+            return f"{count} B"
+        if count < 1024 * 1024:
+            return f"{count / 1024:.1f} KB"
+        return f"{count / 1024 / 1024:.1f} MB"
+
+    @staticmethod
+    def checkerboard(size, cell=8):
+        """Grey checkerboard that shows transparency behind zoomed outputs"""
+        board = Image.new("RGBA", size, (60, 60, 60, 255))
+        light = Image.new("RGBA", (cell, cell), (90, 90, 90, 255))
+        for y in range(0, size[1], cell):
+            for x in range((y // cell) % 2 * cell, size[0], cell * 2):
+                board.paste(light, (x, y))
+        return board
+
+    def decode_result(self, result):
+        """Decode an output once, from its encoded bytes or else its file; the grid and the zoom view share it"""
+        if "image" not in result:
+            img = Image.open(io.BytesIO(result["data"]) if "data" in result else result["path"])
+            img.load()
+            result["image"] = img.convert("RGBA")
+        return result["image"]
+
+    def show_results(self, results, summary, max_cells=RESULT_CELLS):
+        """
+        Show every output of the last conversion in a grid, decoded from the
+        encoded buffers the conversion produced instead of the written files.
+        
+        Clicking an output shows it zoomed with nearest-neighbour scaling, so
+        every pixel of the encoded result can be inspected.
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Conversion Results")
+        dialog.geometry("980x640")
+        dialog.configure(background=self.panel_bg)
+        dialog.grid_columnconfigure(0, weight=1)
+        dialog.grid_rowconfigure(1, weight=1)
+        # PhotoImages of the dialog, kept alive as long as it is open
+        dialog.photos = []
+        
+        shown = results[:max_cells]
+        total_bytes = sum(result["bytes"] for result in results)
+        total_encode = sum(result["encode_seconds"] for result in results)
+        info = f"{summary}\n{len(results)} outputs, {self.format_bytes(total_bytes)}, {total_encode * 1000:.1f} ms encoding"
+        if len(shown) < len(results):
+            info += f" (showing the first {len(shown)})"
+        ttk.Label(
+            dialog,
+            text=info,
+            font=("Arial", 10),
+            foreground=self.text_color,
+            background=self.panel_bg,
+            justify=tk.LEFT
+        ).grid(row=0, column=0, columnspan=2, sticky="w", padx=10, pady=10)
+        
+        # Scrollable grid of outputs
+        grid_frame = ttk.Frame(dialog, style="Panel.TFrame")
+        grid_frame.grid(row=1, column=0, sticky="nsew", padx=(10, 5), pady=(0, 10))
+        grid_canvas = tk.Canvas(grid_frame, background=self.preview_bg, highlightthickness=0)
+        grid_scrollbar = ttk.Scrollbar(grid_frame, orient="vertical", command=grid_canvas.yview)
+        cells_frame = tk.Frame(grid_canvas, background=self.preview_bg)
+        cells_frame.bind("<Configure>", lambda e: grid_canvas.configure(scrollregion=grid_canvas.bbox("all")))
+        grid_canvas.create_window((0, 0), window=cells_frame, anchor="nw")
+        grid_canvas.configure(yscrollcommand=grid_scrollbar.set)
+        grid_canvas.pack(side="left", fill="both", expand=True)
+        grid_scrollbar.pack(side="right", fill="y")
+        
+        # Pixel-exact zoom view
+        zoom_frame = ttk.Frame(dialog, style="Panel.TFrame")
+        zoom_frame.grid(row=1, column=1, sticky="ns", padx=(5, 10), pady=(0, 10))
+        zoom_title = ttk.Label(zoom_frame, text="Click an output to zoom", font=("Arial", 10, "bold"),
+                               foreground=self.accent_secondary, background=self.panel_bg)
+        zoom_title.pack(anchor=tk.W, pady=(0, 5))
+        zoom_canvas = tk.Canvas(zoom_frame, width=400, height=400, background=self.preview_bg,
+                                highlightthickness=0)
+        zoom_canvas.pack()
+        zoom_controls = ttk.Frame(zoom_frame, style="Panel.TFrame")
+        zoom_controls.pack(fill=tk.X, pady=(5, 0))
+        
+        zoom_state = {"result": None, "factor": 1, "photo": None}
+        
+        def render_zoom():
+            result = zoom_state["result"]
+            if result is None:
+                return
+            img = self.decode_result(result)
+            factor = zoom_state["factor"]
+            zoomed_size = (img.width * factor, img.height * factor)
+            
+            # Nearest neighbour keeps every output pixel a sharp factor x factor block
+            zoomed = img.resize(zoomed_size, Image.NEAREST)
+            view = self.checkerboard(zoomed_size, max(4, factor))
+            view.alpha_composite(zoomed)
+            # Only the visible part is turned into a PhotoImage
+            left = max(0, (zoomed_size[0] - 400) // 2)
+            top = max(0, (zoomed_size[1] - 400) // 2)
+            view = view.crop((left, top, min(zoomed_size[0], left + 400), min(zoomed_size[1], top + 400)))
+            
+            zoom_state["photo"] = ImageTk.PhotoImage(view)
+            zoom_canvas.delete("all")
+            zoom_canvas.create_image(200, 200, image=zoom_state["photo"], anchor="center")
+            zoom_title.config(
+                text=f"{os.path.basename(result['path'])} - {img.width}x{img.height} at {factor}x"
+            )
+        
+        def change_zoom(step):
+            zoom_state["factor"] = min(32, max(1, zoom_state["factor"] + step))
+            render_zoom()
+        
+        def select(result):
+            img = self.decode_result(result)
+            zoom_state["result"] = result
+            # Largest whole factor that fits the view
+            zoom_state["factor"] = max(1, min(32, 400 // max(img.width, img.height)))
+            render_zoom()
+        
+        for text, step in (("−", -1), ("+", 1)):
+            button = tk.Button(zoom_controls, text=text, width=3, command=lambda step=step: change_zoom(step),
+                               font=("Arial", 10, "bold"), cursor="hand2")
+            self.beautify_button(button, self.accent_color, "#0088E8", "#0064C0")
+            button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        columns = 4
+        cell_size = 128
+        for index, result in enumerate(shown):
+            cell = tk.Frame(cells_frame, background=self.panel_bg, padx=6, pady=6, cursor="hand2")
+            cell.grid(row=index // columns, column=index % columns, padx=4, pady=4, sticky="n")
+            
+            try:
+                img = self.decode_result(result)
+            except Exception as e:
+                tk.Label(cell, text=f"Cannot decode:\n{e}", foreground=self.error_color,
+                         background=self.panel_bg, wraplength=cell_size).pack()
+                continue
+            
+            # Small outputs are shown 1:1; larger ones are scaled down to fit the cell
+            thumbnail = img
+            if max(img.size) > cell_size:
+                thumbnail = img.copy()
+                thumbnail.thumbnail((cell_size, cell_size), Image.LANCZOS)
+            photo = ImageTk.PhotoImage(thumbnail)
+            dialog.photos.append(photo)
+            
+            image_label = tk.Label(cell, image=photo, background=self.preview_bg,
+                                   width=cell_size, height=cell_size)
+            image_label.pack()
+            details = (f"{os.path.basename(result['source'])}\n"
+                       f"{img.width}x{img.height} {result['format'] or ''}\n"
+                       f"{self.format_bytes(result['bytes'])} · {result['encode_seconds'] * 1000:.1f} ms")
+            text_label = tk.Label(cell, text=details, font=("Consolas", 8), foreground="#BBBBBB",
+                                  background=self.panel_bg, justify=tk.CENTER)
+            text_label.pack()
+            
+            for widget in (cell, image_label, text_label):
+                widget.bind("<Button-1>", lambda e, result=result: select(result))
+        
+        if shown:
+            select(shown[0])
+        
+        close_btn = tk.Button(dialog, text="CLOSE", command=dialog.destroy, font=("Arial", 10, "bold"),
+                              cursor="hand2")
+        self.beautify_button(close_btn, self.accent_color, "#0088E8", "#0064C0")
+        close_btn.grid(row=2, column=0, columnspan=2, pady=(0, 10))
+
     def update_naming_preview(self, *args):
         """Update the naming preview as the user types"""
         if hasattr(self, "naming_preview_label") and self.custom_naming_var.get():
@@ -1111,20 +1738,38 @@ class ImageResizerApp:
             else:
                 original_name = "sample"
             
-            # Replace placeholders
-            preview = pattern.replace("{name}", original_name)
-            preview = preview.replace("{num}", str(self.start_number_var.get()))
-            
-            # Add dimensions if selected
-            ext = ".png"
-            if self.include_dimensions_var.get():
-                preview = f"{preview}_64x64{ext}"
-            else:
-                preview = f"{preview}{ext}"
+            # Render the name the engine would give the 64x64 PNG output
+            try:
+                template = compile_template(pattern, self.include_dimensions_var.get())
+                source_hash = self.selected_content_hash() if template.uses_hash else None
+                preview = template.render(original_name, self.start_number_var.get(), 64, ".png", source_hash)
+            except (ValueError, tk.TclError) as e:
+                preview = f"Invalid pattern: {e}"
+            except OSError as e:
+                preview = f"Cannot read the image for {{hash}}: {e}"
             
             # Update the preview label
             self.naming_preview_label.config(text=preview)
 
+    def selected_content_hash(self):
+        """
+        SHA-256 of the selected image's bytes, as the conversion fills in {hash}.
+        
+        The file is hashed again only when it changes, so typing a pattern
+        does not read it on every key. Without a selected image, the hash of
+        the placeholder name stands in.
+        """
+        from idc.dedup import content_hash
+        
+        if not self.selected_image_path:
+            return hashlib.sha256(b"sample").hexdigest()
+        
+        stat = os.stat(self.selected_image_path)
+        key = (self.selected_image_path, stat.st_mtime, stat.st_size)
+        if self.preview_hash[0] != key:
+            self.preview_hash = (key, content_hash(self.selected_image_path))
+        return self.preview_hash[1]
+    
     def test_naming_pattern(self):
         """Show a dialog with example filenames using current pattern"""
         if not self.custom_naming_var.get():
@@ -1135,10 +1780,15 @@ class ImageResizerApp:
         include_dims = self.include_dimensions_var.get()
         
         # Check if pattern is valid
-        if not pattern or not re.search(r"\{name\}|\{num\}", pattern):
+        try:
+            template = compile_template(pattern, include_dims)
+        except ValueError as e:
+            messagebox.showerror("Invalid Pattern", str(e))
+            return
+        if not template.fields & {"name", "num", "hash"}:
             messagebox.showerror(
                 "Invalid Pattern", 
-                "Pattern must include at least one placeholder:\n{name} or {num}"
+                "Pattern must include at least one placeholder:\n{name}, {num} or {hash}"
             )
             return
             
@@ -1176,6 +1826,26 @@ class ImageResizerApp:
             background=self.panel_bg
         ).pack(anchor=tk.W)
         
+        # Generate sample filenames
+        sample_names = ["logo", "icon", "banner", "thumbnail", "profile"]
+        sizes = [16, 32, 64, 128, 256]
+        sample_hashes = {name: hashlib.sha256(name.encode()).hexdigest() for name in sample_names}
+        
+        # Check the whole sample batch the way a conversion would
+        collisions = find_collisions(
+            (template.render(name, start_num + index, size, ".png", sample_hashes[name]), f"{name} {size}px")
+            for name in sample_names
+            for index, size in enumerate(sizes)
+        )
+        if collisions:
+            ttk.Label(
+                info_frame,
+                text=f"⚠ {len(collisions)} names collide across sizes or images",
+                font=("Arial", 9),
+                foreground="#FF6060",
+                background=self.panel_bg
+            ).pack(anchor=tk.W)
+        
         # Sample files frame
         samples_frame = ttk.Frame(test_dialog, style="Panel.TFrame", padding=10)
         samples_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=(0, 10))
@@ -1198,24 +1868,13 @@ class ImageResizerApp:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        # Generate sample filenames
-        sample_names = ["logo", "icon", "banner", "thumbnail", "profile"]
-        sizes = [16, 32, 64, 128, 256]
-        
         for i, name in enumerate(sample_names):
             frame = ttk.Frame(scrollable_frame, style="Panel.TFrame")
             frame.pack(fill=tk.X, padx=5, pady=3)
             
             # Generate name using pattern
-            current_num = start_num + i
-            custom_name = pattern.replace("{name}", name)
-            custom_name = custom_name.replace("{num}", str(current_num))
-            
-            if include_dims:
-                sample_size = sizes[i % len(sizes)]
-                filename = f"{custom_name}_{sample_size}x{sample_size}.png"
-            else:
-                filename = f"{custom_name}.png"
+            sample_size = sizes[i % len(sizes)]
+            filename = template.render(name, start_num + i, sample_size, ".png", sample_hashes[name])
             
             # Sample icon
             icon_label = ttk.Label(
@@ -1314,26 +1973,37 @@ class ImageResizerApp:
         
         return button
 
-    def manage_image_cache(self, max_items=10):
-        """Keep the image cache from growing too large"""
+    def manage_thumbnail_cache(self, max_items=500):
+        """Keep the thumbnail cache from growing too large"""
+        cache = self.__class__._thumbnail_cache
+        
+        # Dicts keep insertion order, so the first keys are the oldest thumbnails
+        while len(cache) > max_items:
+            del cache[next(iter(cache))]
+
+    def manage_image_cache(self, max_items=10, max_bytes=PREVIEW_CACHE_BYTES):
+        """Keep the preview cache from growing too large, by count and by memory"""
         cache = self.__class__._image_cache
         
-        # If cache is getting too large, remove oldest items
-        if len(cache) > max_items * 2:  # Account for dimension entries too
-            # Get keys excluding dimension entries
-            image_keys = [k for k in cache.keys() if not k.endswith("_dimensions")]
-            
-            # Sort by recently used (if we tracked that) or just remove first ones
-            if len(image_keys) > max_items:
-                for old_key in image_keys[:len(image_keys) - max_items]:
-                    if old_key in cache:
-                        del cache[old_key]
-                    if f"{old_key}_dimensions" in cache:
-                        del cache[f"{old_key}_dimensions"]
+        # Used entries are moved to the end, so the first keys are the least recently used.
+        # The current preview stays even if it is larger than max_bytes on its own
+        total = sum(pyramid.nbytes for pyramid in cache.values())
+        while len(cache) > max_items or (len(cache) > 1 and total > max_bytes):
+            total -= cache.pop(next(iter(cache))).nbytes
 
 def main():
+    if sys.platform == "win32":
+        # Draw at the monitor's real resolution instead of being bitmap-scaled by Windows
+        try:
+            import ctypes
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except Exception:
+            pass
     root = tk.Tk()
     app = ImageResizerApp(root)
+    # Set by build.py to time the startup: quit as soon as the window is ready
+    if os.environ.get("IDC_STARTUP_CHECK"):
+        root.after_idle(root.destroy)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+"""
+Image Dimension Converter engine.
+
+Importing the package is cheap: names are resolved on first use (PEP 562),
+so Pillow and the other submodules are only imported once they are needed.
+The Tk GUI lives outside the package, in gui.py.
+
+    from idc import resize_image
+    resize_image("logo.png", "resized_images", [16, 32, 64])
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "DEFAULT_SIZES": "formats",
+    "VALID_ICO_SIZES": "formats",
+    "IMAGE_EXTENSIONS": "formats",
+    "ANIMATED_FORMATS": "formats",
+    "is_image_file": "formats",
+    "get_output_format": "formats",
+    "resize_image": "engine",
+    "resize_images": "engine",
+    "copy_outputs": "engine",
+    "resize_to_size": "engine",
+    "save_resized_image": "engine",
+    "encode_image": "engine",
+    "build_output_path": "engine",
+    "load_image": "engine",
+    "plan_outputs": "engine",
+    "NamingTemplate": "naming",
+    "compile_template": "naming",
+    "find_collisions": "naming",
+    "plan_targets": "planning",
+    "UPSCALE_POLICIES": "planning",
+    "find_duplicate_groups": "dedup",
+    "resize_batched": "batch",
+    "check_input": "preflight",
+    "build_atlas": "atlas",
+    "RunReport": "report",
+    "JobScheduler": "scheduler",
+    "SourceCache": "cache",
+    "LRUCache": "cache",
+    "Job": "scheduler",
+    "watch_folder": "watcher",
+    "serve": "server",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
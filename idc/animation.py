@@ -0,0 +1,159 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageSequence
+from .formats import DETERMINISTIC_PARAMS, strip_metadata
+from .resample import prepare_source, resize_prepared, post_filter
+
+# APNG dispose ops mapped to GIF disposal methods, and back
+APNG_TO_GIF_DISPOSAL = {0: 1, 1: 2, 2: 3}
+GIF_TO_APNG_DISPOSAL = {0: 0, 1: 0, 2: 1, 3: 2}
+
+def frame_disposal(img):
+    """Disposal method of the current frame, expressed as a GIF disposal method"""
+    if img.format == "GIF":
+        return getattr(img, "disposal_method", 0)
+    if img.format == "PNG":
+        return APNG_TO_GIF_DISPOSAL.get(getattr(img, "dispose_op", 0), 1)
+    return 0
+
+class SpilledFrames:
+    """
+    The resized frames of one size, spilled to a temporary file as raw pixels.
+
+    Indexing and iterating read frames back one at a time, so an animation
+    is only in memory while it is encoded, instead of every size at once.
+    A slice is a view on the same file, which encoders can iterate more
+    than once.
+    """
+
+    def __init__(self, file=None, frames=None):
+        self.file = file if file is not None else tempfile.TemporaryFile()
+        # (mode, size, info, offset, byte count) of every frame, in order
+        self.frames = frames if frames is not None else []
+
+    def append(self, img):
+        if img.mode == "P":
+            # Raw pixels do not carry the palette
+            img = img.convert("RGBA")
+        data = img.tobytes()
+        self.file.seek(0, os.SEEK_END)
+        self.frames.append((img.mode, img.size, dict(img.info), self.file.tell(), len(data)))
+        self.file.write(data)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SpilledFrames(self.file, self.frames[index])
+        mode, size, info, offset, length = self.frames[index]
+        self.file.seek(offset)
+        img = Image.frombytes(mode, size, self.file.read(length))
+        img.info.update(info)
+        return img
+
+    def __iter__(self):
+        for index in range(len(self.frames)):
+            yield self[index]
+
+    def close(self):
+        self.file.close()
+
+def resize_frame(frame, sizes, linear_light=False, sharpen=False, pixel_snap=False):
+    """Resize one frame to every target size (runs on a worker thread)"""
+    source = prepare_source(frame, None, linear_light)
+
+    resized_frames = []
+    for size in sizes:
+        resized_frame = resize_prepared(source, size)
+        if sharpen or pixel_snap:
+            resized_frame = post_filter(resized_frame, source.size, size, sharpen, pixel_snap)
+        resized_frames.append(resized_frame)
+
+    return resized_frames
+
+def save_animation(frames, output, save_format, durations, disposals, loop=0, deterministic=False):
+    """
+    Save resized frames as one animation with the original timing and disposal.
+
+    frames is a list of frames or a SpilledFrames. With deterministic=True,
+    metadata other than colour and transparency is stripped and every
+    encoder setting is pinned.
+    """
+    first = frames[0]
+    params = {
+        "save_all": True,
+        "append_images": frames[1:],
+        "duration": durations,
+        "loop": loop,
+    }
+
+    if save_format == "GIF":
+        params["disposal"] = disposals
+    elif save_format == "PNG":
+        params["disposal"] = [GIF_TO_APNG_DISPOSAL.get(disposal, 0) for disposal in disposals]
+
+    if deterministic:
+        strip_metadata(first)
+        params = dict(DETERMINISTIC_PARAMS.get(save_format, {}), **params)
+
+    first.save(output, format=save_format, **params)
+
+def resize_animation(img, sizes, linear_light=False, sharpen=False, pixel_snap=False, workers=None):
+    """
+    Resize every frame of an animated image to all target sizes.
+
+    Frames are decoded once, in order, and resized on a pool of worker
+    threads. Only a few source frames are in flight at a time, and resized
+    frames are spilled to one temporary file per size as they come in, so
+    the caller can encode one size after the other with save_animation.
+    Close the SpilledFrames of each size once it is encoded.
+
+    Args:
+        img: Opened animated image
+        sizes: List of sizes (width/height in pixels)
+        linear_light: Resize in linear light instead of on sRGB values
+        sharpen: Sharpen each frame with strength scaled by the reduction ratio
+        pixel_snap: Snap alpha edges of outputs up to 32px
+        workers: Number of worker threads (defaults to the CPU count, at most 8)
+
+    Returns:
+        Tuple of (frames, durations, disposals, loop), where frames holds the
+        SpilledFrames of each size
+    """
+    workers = workers or min(8, os.cpu_count() or 1)
+    frames = [SpilledFrames() for _ in sizes]
+    durations = []
+    disposals = []
+    pending = deque()
+
+    def collect(future):
+        for size_frames, resized_frame in zip(frames, future.result()):
+            size_frames.append(resized_frame)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for frame in ImageSequence.Iterator(img):
+                # Converting copies the frame, so the decoder can move on to the next one
+                rgba_frame = frame.convert("RGBA")
+
+                # Read timing after the frame is loaded (WEBP only sets it then)
+                durations.append(frame.info.get("duration", 100))
+                disposals.append(frame_disposal(img))
+
+                pending.append(pool.submit(resize_frame, rgba_frame, sizes, linear_light, sharpen, pixel_snap))
+
+                # Collect in order, keeping only a few source frames in memory
+                if len(pending) >= workers * 2:
+                    collect(pending.popleft())
+
+            while pending:
+                collect(pending.popleft())
+    except Exception:
+        for size_frames in frames:
+            size_frames.close()
+        raise
+
+    return frames, durations, disposals, img.info.get("loop", 0)
@@ -0,0 +1,215 @@
+import io
+import os
+import re
+import json
+import math
+from PIL import Image
+from .engine import encode_image, load_image, write_output
+from .naming import compile_template, find_collisions
+from .planning import plan_targets, unique_sizes
+from .rawinput import REDUCING_GAP
+from .resample import ResizeChain, prepare_source, post_filter
+
+# Formats an atlas can be written in; both keep transparency
+ATLAS_FORMATS = {"PNG": ".png", "WEBP": ".webp"}
+
+# Atlas WEBPs are lossless: lossy blocks would blur sprite edges into their
+# neighbours across the padding. Every setting is pinned, as in deterministic mode
+ATLAS_WEBP_PARAMS = {"lossless": True, "quality": 80, "method": 4, "exact": False}
+
+def pack_shelves(sizes, padding=1):
+    """
+    Place rectangles on shelves: rows filled left to right, tallest first.
+
+    The row width is about the square root of the total area, so the atlas
+    comes out roughly square.
+
+    Args:
+        sizes: List of (width, height)
+        padding: Empty pixels around every rectangle, so neighbours do not
+            bleed into each other when the atlas is scaled
+
+    Returns:
+        Tuple of ([(x, y)] in the order of sizes, (atlas width, atlas height))
+    """
+    if not sizes:
+        return [], (0, 0)
+
+    padded = [(width + 2 * padding, height + 2 * padding) for width, height in sizes]
+    area = sum(width * height for width, height in padded)
+    row_width = max(max(width for width, _ in padded), math.ceil(math.sqrt(area)))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = used_width = 0
+    for index in sorted(range(len(sizes)), key=lambda index: padded[index][1], reverse=True):
+        width, height = padded[index]
+        if x + width > row_width:
+            # Start a new shelf below the current one
+            y += shelf_height
+            x = shelf_height = 0
+        positions[index] = (x + padding, y + padding)
+        x += width
+        shelf_height = max(shelf_height, height)
+        used_width = max(used_width, x)
+
+    return positions, (used_width, y + shelf_height)
+
+def css_name(name):
+    """Turn a sprite name into something usable in a CSS class name"""
+    return re.sub(r"[^A-Za-z0-9_-]", "-", name)
+
+def atlas_css(image_name, sprites, prefix="sprite"):
+    """CSS with one class per sprite, positioned on the shared background image"""
+    lines = [f".{prefix} {{ background-image: url({image_name}); background-repeat: no-repeat; "
+             "display: inline-block; }"]
+    for name, sprite in sprites.items():
+        lines.append(f".{prefix}-{css_name(name)} {{ width: {sprite['w']}px; height: {sprite['h']}px; "
+                     f"background-position: -{sprite['x']}px -{sprite['y']}px; }}")
+    return "\n".join(lines) + "\n"
+
+def encode_atlas(atlas, output_format, deterministic=False):
+    """Encode an atlas in memory as PNG, or as lossless WEBP, and return the bytes"""
+    if output_format == "WEBP":
+        buffer = io.BytesIO()
+        atlas.save(buffer, format="WEBP", **ATLAS_WEBP_PARAMS)
+        return buffer.getvalue()
+    return encode_image(atlas, output_format, max(atlas.size), output_format, deterministic)
+
+def build_atlas(input_paths, output_folder, sizes, atlas_name="atlas", output_format="PNG",
+                naming_pattern=None, start_number=1, include_dimensions=True, padding=1,
+                linear_light=False, sharpen=False, pixel_snap=False, deterministic=False,
+                upscale="allow", source_cache=None):
+    """
+    Resize images to multiple dimensions and pack every output into one atlas image.
+
+    Writes <atlas_name>.png (or .webp) with a JSON index and a CSS file of
+    the sprite rectangles next to it, so a page needs one request instead
+    of one per size. Animated sources contribute their first frame.
+
+    Args:
+        input_paths: Paths of the input images
+        output_folder: Folder to save the atlas and its index
+        sizes: List of sizes (width/height in pixels)
+        atlas_name: File name of the atlas without extension
+        output_format: 'PNG', 'WEBP', or 'AUTO' for the smaller of both
+        naming_pattern: Optional pattern for sprite names (see naming.FIELDS)
+        start_number: Starting number for sequential numbering
+        include_dimensions: Whether to include dimensions in sprite names
+        padding: Empty pixels around every sprite
+        linear_light: Resize in linear light (gamma correct) instead of on sRGB values
+        sharpen: Sharpen each sprite with strength scaled by the reduction ratio
+        pixel_snap: Snap alpha edges of sprites up to 32px
+        deterministic: Byte-identical atlases for identical inputs
+        upscale: Sizes larger than a source: "allow", "skip", or "copy-nearest", which
+            points their index entries at the nearest sprite instead of adding one
+        source_cache: Optional cache.SourceCache for decoded sources
+
+    Returns:
+        True if the atlas and its index were written, False otherwise
+    """
+    output_format = (output_format or "PNG").upper()
+    if output_format not in ATLAS_FORMATS and output_format != "AUTO":
+        print(f"Error: Atlases can be written as {', '.join(ATLAS_FORMATS)} or AUTO, not {output_format}")
+        return False
+
+    try:
+        template = compile_template(naming_pattern, include_dimensions)
+        sizes = unique_sizes(sizes)
+
+        # Name every sprite before anything is decoded
+        jobs = []
+        for input_path in input_paths:
+            filename = os.path.splitext(os.path.basename(input_path))[0]
+            source_hash = None
+            if template.uses_hash:
+                from .dedup import content_hash
+                source_hash = content_hash(input_path)
+
+            jobs.append((input_path, [(size, start_number + index,
+                                       template.render(filename, start_number + index, size, "", source_hash))
+                                      for index, size in enumerate(sizes)]))
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+    if not sizes:
+        print("Error: No sizes to pack into the atlas")
+        return False
+
+    # Every sprite needs its own name in the index
+    collisions = find_collisions((name, f"{os.path.basename(input_path)} at {size}x{size}")
+                                 for input_path, targets in jobs for size, _, name in targets)
+    if collisions:
+        print("Error: These sprite names are used more than once. Change the naming pattern or "
+              "include the dimensions:")
+        for name, owners in list(collisions.items())[:10]:
+            print(f"  {name}: {', '.join(owners)}")
+        return False
+
+    sprites = []
+    aliases = []
+    load = load_image if source_cache is None else source_cache.load
+    try:
+        min_size = None if linear_light else max(sizes) * REDUCING_GAP
+        for input_path, targets in jobs:
+            img, source_size = load(input_path, min_size)
+            plan = plan_targets(targets, source_size, upscale)
+            if plan.skipped:
+                print(f"Skipping upscales of {os.path.basename(input_path)}: "
+                      f"{', '.join(str(size) for size, _, _ in plan.skipped)}")
+
+            # Largest first, so smaller sprites resample earlier results
+            chain = ResizeChain(prepare_source(img, None, linear_light), REDUCING_GAP)
+            for size, _, name in plan.work:
+                render_size = plan.render_size(size)
+                sprite = chain.resize(render_size)
+                if sharpen or pixel_snap:
+                    sprite = post_filter(sprite, source_size, render_size, sharpen, pixel_snap)
+                sprites.append((name, input_path, size, sprite.convert("RGBA")))
+                aliases.extend((copy_name, input_path, copy_size, name)
+                               for copy_size, _, copy_name in plan.copies.get(name, []))
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+    if not sprites:
+        print("Error: Nothing to pack into the atlas")
+        return False
+
+    positions, atlas_size = pack_shelves([sprite.size for _, _, _, sprite in sprites], padding)
+    atlas = Image.new("RGBA", atlas_size, (0, 0, 0, 0))
+    index = {}
+    for (name, input_path, size, sprite), (x, y) in zip(sprites, positions):
+        atlas.paste(sprite, (x, y))
+        index[name] = {"x": x, "y": y, "w": sprite.width, "h": sprite.height,
+                       "source": os.path.basename(input_path), "size": size}
+    for name, input_path, size, target in aliases:
+        index[name] = dict(index[target], size=size, alias_of=target)
+
+    try:
+        if output_format == "AUTO":
+            # One encode of each format; the atlas is a single file, so there is no budget to keep
+            encoded = {candidate: encode_atlas(atlas, candidate, deterministic) for candidate in ATLAS_FORMATS}
+            output_format = min(encoded, key=lambda candidate: len(encoded[candidate]))
+            data = encoded[output_format]
+        else:
+            data = encode_atlas(atlas, output_format, deterministic)
+
+        os.makedirs(output_folder, exist_ok=True)
+        image_name = atlas_name + ATLAS_FORMATS[output_format]
+        write_output(data, os.path.join(output_folder, image_name))
+
+        document = {"image": image_name, "format": output_format, "width": atlas_size[0],
+                    "height": atlas_size[1], "sprites": index}
+        json_text = json.dumps(document, indent=2, sort_keys=True) + "\n"
+        write_output(json_text.encode("utf-8"), os.path.join(output_folder, atlas_name + ".json"))
+        write_output(atlas_css(image_name, index).encode("utf-8"), os.path.join(output_folder, atlas_name + ".css"))
+    except Exception as e:
+        print(f"Error: Could not write the atlas: {e}")
+        return False
+
+    print(f"Created: {os.path.join(output_folder, image_name)} ({len(sprites)} sprites, "
+          f"{atlas_size[0]}x{atlas_size[1]}, {len(data)} bytes)")
+    if aliases:
+        print(f"  {len(aliases)} upscale entries point at the nearest sprite")
+    print(f"Index: {atlas_name}.json, {atlas_name}.css")
+    return True
@@ -0,0 +1,107 @@
+import time
+from PIL import Image
+
+# Formats the AUTO mode chooses between, with their file extensions
+AUTO_FORMATS = {"PNG": ".png", "WEBP": ".webp"}
+
+# Outputs up to this size stay lossless: artifacts show most and headers dominate
+SMALL_SIZE = 32
+# Outputs from this size on compress far better lossy when the content is photographic
+LARGE_SIZE = 128
+# Images with at most this many colours compress best as palette PNG
+FLAT_COLOURS = 256
+# Modes every AUTO format can write
+AUTO_MODES = ("L", "LA", "RGB", "RGBA")
+
+def auto_mode(img):
+    """
+    Convert an image to a mode every AUTO format can write: L, LA, RGB or RGBA, keeping alpha.
+
+    16-bit greyscale is scaled down to 8 bits instead of being clipped.
+    """
+    if img.mode in AUTO_MODES:
+        return img
+
+    has_alpha = any(band in ("A", "a") for band in img.getbands()) or "transparency" in img.info
+    grey = Image.getmodebase(img.mode) == "L"
+    if img.mode.startswith("I;16"):
+        img = img.convert("I").point(lambda value: value * (1 / 257))
+    return img.convert(("LA" if has_alpha else "L") if grey else ("RGBA" if has_alpha else "RGB"))
+
+def predict_format(img, size):
+    """
+    Guess the smallest output format from cheap signals.
+
+    Args:
+        img: Resized image in one of AUTO_MODES
+        size: Target size
+
+    Returns:
+        Tuple of (format, reason). format is None when the signals do not
+        give a clear answer and a trial encode should decide.
+    """
+    if size <= SMALL_SIZE:
+        return "PNG", "small size"
+    if img.mode in ("1", "P") or img.getcolors(FLAT_COLOURS) is not None:
+        return "PNG", "few colours"
+    if size >= LARGE_SIZE:
+        return "WEBP", "photographic"
+    return None, "uncertain"
+
+class AutoFormatChooser:
+    """
+    Pick the output format of each size for the AUTO mode.
+
+    Formats are predicted from cheap signals. Only when the prediction is
+    uncertain are all candidates encoded and the smallest one kept. The
+    extra encodes of a job are limited by a CPU budget in seconds; once it
+    is used up, uncertain outputs fall back to WEBP. A budget of None
+    trial-encodes every uncertain output, so the choice never depends on
+    timing.
+    """
+
+    def __init__(self, budget=0.25):
+        self.budget = budget
+        self.spent = 0.0
+        self.bytes_saved = 0
+        self.trials = 0
+
+    def choose(self, img, size, encode):
+        """
+        Choose the format of one output and encode it.
+
+        Images in other modes than AUTO_MODES are converted first (see
+        auto_mode), and the converted image is what gets encoded.
+
+        Args:
+            img: Resized image
+            size: Target size
+            encode: Function encode(img, save_format) returning the encoded bytes
+
+        Returns:
+            Tuple of (save_format, data, reason, bytes_saved). bytes_saved is
+            measured against the largest candidate and is 0 when no trial
+            encode was made.
+        """
+        img = auto_mode(img)
+        save_format, reason = predict_format(img, size)
+        if save_format is not None:
+            return save_format, encode(img, save_format), reason, 0
+
+        if self.budget is not None and self.spent >= self.budget:
+            return "WEBP", encode(img, "WEBP"), "budget used up", 0
+
+        results = []
+        for candidate in AUTO_FORMATS:
+            start = time.perf_counter()
+            data = encode(img, candidate)
+            results.append((len(data), time.perf_counter() - start, candidate, data))
+        results.sort(key=lambda result: result[0])
+
+        # The winner had to be encoded anyway, only the other encodes count against the budget
+        self.spent += sum(result[1] for result in results[1:])
+        self.trials += 1
+
+        bytes_saved = results[-1][0] - results[0][0]
+        self.bytes_saved += bytes_saved
+        return results[0][2], results[0][3], "trial encode", bytes_saved
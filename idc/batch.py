@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from .engine import resize_image
+
+# Sources up to this size on their longest side are converted in parallel
+BATCH_MAX_SOURCE = 256
+
+# Threads converting small sources. Pillow releases the GIL while it decodes,
+# resizes and encodes, so they run on separate cores
+BATCH_WORKERS = os.cpu_count() or 1
+
+def is_small(input_path, max_source=BATCH_MAX_SOURCE):
+    """
+    Read the header of a source and decide whether it can be batched.
+
+    Returns:
+        True for still sources up to max_source on their longest side
+    """
+    try:
+        with Image.open(input_path) as img:
+            return max(img.size) <= max_source and not getattr(img, "is_animated", False)
+    except Exception:
+        # The per-file path reports unreadable sources
+        return False
+
+def resize_batched(input_paths, output_folder, sizes, naming_pattern=None, start_number=1,
+                   include_dimensions=True, output_format=None, outputs=None, workers=BATCH_WORKERS,
+                   max_source=BATCH_MAX_SOURCE, **resize_options):
+    """
+    Convert small sources on several threads at once.
+
+    For libraries of many small icons, one source is too little work to
+    keep more than one core busy. Here every small still source goes
+    through resize_image as usual, so outputs, reports and errors are the
+    same as one at a time, but workers sources are decoded, resized,
+    encoded and written at once. Large and animated sources, which would
+    hold much more memory per thread, are left to the caller. With a
+    single worker nothing is batched.
+
+    Args:
+        input_paths: Paths of the input images
+        output_folder: Folder to save resized images
+        sizes: List of sizes (width/height in pixels)
+        naming_pattern: Optional custom naming pattern
+        start_number: Starting number for sequential numbering
+        include_dimensions: Whether to include dimensions in filename
+        output_format: Output format, as passed to resize_image
+        outputs: Optional dict that receives the (size, number, output_path) entries of each source
+        workers: Number of threads converting sources
+        max_source: Longest side of the sources that are batched
+        resize_options: Other options of resize_image
+
+    Returns:
+        Dict of input path -> True or False for every source that was batched;
+        sources missing from it still need resize_image
+    """
+    if workers < 2:
+        return {}
+    small = [input_path for input_path in input_paths if is_small(input_path, max_source)]
+    if len(small) < 2:
+        # Nothing to share
+        return {}
+
+    def convert(input_path):
+        source_outputs = []
+        converted = resize_image(input_path, output_folder, sizes, naming_pattern, start_number,
+                                 include_dimensions, output_format, outputs=source_outputs, **resize_options)
+        return converted, source_outputs
+
+    done = {}
+    with ThreadPoolExecutor(min(workers, len(small))) as executor:
+        for input_path, (converted, source_outputs) in zip(small, executor.map(convert, small)):
+            done[input_path] = converted
+            if outputs is not None:
+                outputs[input_path] = source_outputs
+    print(f"Batch done: {sum(done.values())} of {len(small)} small sources converted on {workers} threads")
+    return done
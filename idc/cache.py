@@ -0,0 +1,173 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+from .engine import load_image
+from .resample import premultiply_alpha, unpremultiply_alpha
+
+# Modes a master can be resampled from
+MASTER_MODES = ("L", "LA", "RGB", "RGBA", "P")
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by item count and total bytes"""
+
+    def __init__(self, max_items=128, max_bytes=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=0):
+        with self.lock:
+            if key in self.items:
+                self.total_bytes -= self.items.pop(key)[1]
+
+            self.items[key] = (value, size)
+            self.total_bytes += size
+
+            # Evict least recently used entries until both limits hold
+            while self.items and (len(self.items) > self.max_items or
+                                  (self.max_bytes is not None and self.total_bytes > self.max_bytes)):
+                _, (_, evicted_size) = self.items.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def stats(self):
+        with self.lock:
+            return {
+                "items": len(self.items),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+def image_bytes(img):
+    """Approximate memory held by a decoded image"""
+    return img.width * img.height * len(img.getbands())
+
+def make_master(img, size):
+    """Downscale an image to size pixels on its longest side, without bleeding transparent colour"""
+    source_format = img.format
+    if img.mode == "P":
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    master = unpremultiply_alpha(premultiply_alpha(img).resize(size, Image.LANCZOS))
+    # Callers pick the output format from the source when none is given
+    master.format = source_format
+    return master
+
+class SourceCache:
+    """
+    Decoded source images shared by every job of a long-lived process.
+
+    Entries are keyed by path, modification time and file size, so a
+    changed source is decoded again and its old entries age out. With
+    master_size, jobs whose targets are small enough get a cached
+    downscale of the source (master_size pixels on its longest side)
+    instead of the full image; only jobs that need the full resolution
+    cache it. Animated sources are never cached, because reading their
+    frames changes the image.
+
+    Cached images are shared between threads and must not be modified.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, max_items=64, master_size=None):
+        self.cache = LRUCache(max_items, max_bytes)
+        self.master_size = master_size
+        self.counts = {"hits": 0, "master_hits": 0, "misses": 0, "uncacheable": 0}
+        self.lock = threading.Lock()
+        # Keys being decoded, so concurrent jobs for one source decode it once
+        self.loading = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def master_dimensions(self, input_path, min_size):
+        """Size of the master for a source, or None if the full image has to be used"""
+        if not self.master_size or not min_size:
+            return None
+        with Image.open(input_path) as img:
+            width, height = img.size
+            usable = img.mode in MASTER_MODES and not getattr(img, "is_animated", False)
+        scale = self.master_size / max(width, height)
+        if scale >= 1 or not usable:
+            return None
+        dimensions = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return dimensions if min(dimensions) >= min_size else None
+
+    def load(self, input_path, min_size=None):
+        """
+        Return a decoded source, like engine.load_image.
+
+        Args:
+            input_path: Path to the input image
+            min_size: Smallest width or height the job needs; None for the full image
+
+        Returns:
+            Tuple of (image, original (width, height))
+        """
+        stat = os.stat(input_path)
+        key = (os.path.realpath(input_path), stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            key_lock = self.loading.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                return self.load_locked(input_path, key, min_size)
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+
+    def load_locked(self, input_path, key, min_size):
+        # The full image serves every job
+        entry = self.cache.get(key + ("full",))
+        if entry is not None:
+            self.count("hits")
+            return entry
+
+        master_dimensions = self.master_dimensions(input_path, min_size)
+        if master_dimensions is not None:
+            entry = self.cache.get(key + ("master",))
+            if entry is not None:
+                self.count("master_hits")
+                return entry
+
+            # Only the master is kept, decoded with reduce-on-load where the format allows it
+            img, original_size = load_image(input_path, min(master_dimensions))
+            entry = (make_master(img, master_dimensions), original_size)
+            self.cache.put(key + ("master",), entry, image_bytes(entry[0]))
+            self.count("misses")
+            return entry
+
+        img, original_size = load_image(input_path)
+        if getattr(img, "is_animated", False):
+            self.count("uncacheable")
+            return img, original_size
+
+        entry = (img, original_size)
+        self.cache.put(key + ("full",), entry, image_bytes(img))
+        self.count("misses")
+        return entry
+
+    def stats(self):
+        """Hit, miss and memory counts"""
+        cache_stats = self.cache.stats()
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["master_hits"] + counts["misses"]
+        return dict(counts, items=cache_stats["items"], bytes=cache_stats["bytes"],
+                    max_bytes=self.cache.max_bytes,
+                    hit_ratio=round((counts["hits"] + counts["master_hits"]) / lookups, 4) if lookups else None)
@@ -0,0 +1,234 @@
+import os
+import sys
+import argparse
+from .formats import DEFAULT_SIZES, is_image_file
+
+def parse_sizes(value):
+    """Parse a comma separated list of sizes, e.g. "16,32,64" """
+    try:
+        return [int(size) for size in value.split(",") if size.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size list: {value}")
+
+def run(args, report=None):
+    """Run the mode selected on the command line"""
+    if args.serve:
+        from .server import serve
+        
+        success = serve(args.input_path, args.host, args.port, workers=args.workers)
+    elif args.watch:
+        from .watcher import watch_folder
+        
+        success = watch_folder(
+            args.input_path,
+            args.output_folder,
+            args.sizes,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            settle_time=args.settle,
+            use_inotify=not args.poll,
+            process_existing=args.existing,
+            output_format=args.output_format,
+            naming_pattern=args.naming_pattern,
+            start_number=args.start_number,
+            include_dimensions=args.include_dimensions,
+            linear_light=args.linear_light,
+            sharpen=args.sharpen,
+            pixel_snap=args.pixel_snap,
+            retries=args.retries,
+            resume=args.resume,
+            auto_budget=args.auto_budget,
+            deterministic=args.deterministic,
+            upscale=args.upscale,
+            report=report
+        )
+    elif args.atlas:
+        from .atlas import build_atlas
+        
+        # One atlas for a single image or for every image in the folder
+        if os.path.isdir(args.input_path):
+            input_paths = sorted(
+                os.path.join(args.input_path, name) for name in os.listdir(args.input_path)
+                if is_image_file(name)
+            )
+        else:
+            input_paths = [args.input_path]
+        success = build_atlas(
+            input_paths,
+            args.output_folder,
+            args.sizes,
+            args.atlas,
+            args.output_format or "PNG",
+            args.naming_pattern,
+            args.start_number,
+            args.include_dimensions,
+            padding=args.atlas_padding,
+            linear_light=args.linear_light,
+            sharpen=args.sharpen,
+            pixel_snap=args.pixel_snap,
+            deterministic=args.deterministic,
+            upscale=args.upscale
+        )
+    elif os.path.isdir(args.input_path):
+        from .engine import resize_images
+        
+        # Resize every image in the folder as one batch
+        input_paths = sorted(
+            os.path.join(args.input_path, name) for name in os.listdir(args.input_path)
+            if is_image_file(name)
+        )
+        converted_count = resize_images(
+            input_paths,
+            args.output_folder,
+            args.sizes,
+            args.naming_pattern,
+            args.start_number,
+            args.include_dimensions,
+            output_format=args.output_format,
+            dedup=args.dedup,
+            perceptual=args.perceptual,
+            perceptual_threshold=args.perceptual_threshold,
+            batch_small=args.batch_small,
+            preflight=args.preflight,
+            linear_light=args.linear_light,
+            sharpen=args.sharpen,
+            pixel_snap=args.pixel_snap,
+            retries=args.retries,
+            resume=args.resume,
+            auto_budget=args.auto_budget,
+            deterministic=args.deterministic,
+            upscale=args.upscale,
+            report=report
+        )
+        success = converted_count == len(input_paths)
+    else:
+        from .engine import resize_image
+        
+        if args.preflight:
+            from .preflight import check_input, print_preflight
+            
+            if print_preflight([check_input(args.input_path, args.sizes, args.output_format)]):
+                return False
+        
+        # Resize the image
+        success = resize_image(args.input_path, args.output_folder, args.sizes, args.naming_pattern,
+                               args.start_number, args.include_dimensions, output_format=args.output_format, linear_light=args.linear_light,
+                               sharpen=args.sharpen, pixel_snap=args.pixel_snap, retries=args.retries,
+                               resume=args.resume, auto_budget=args.auto_budget,
+                               deterministic=args.deterministic, upscale=args.upscale, report=report)
+    
+    return success
+
+def main(prog=None):
+    """Command line entry point; the engine and Pillow are only imported once a mode runs"""
+    parser = argparse.ArgumentParser(prog=prog, description="Resize images to multiple dimensions")
+    parser.add_argument("input_path",
+                        help="Image or folder of images to resize, or folder to watch with --watch "
+                             "or serve with --serve")
+    parser.add_argument("output_folder", nargs="?", default="resized_images",
+                        help="Folder to save resized images (default: resized_images)")
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES,
+                        help="Comma separated target sizes (default: 16,32,48,64,128,256,512)")
+    parser.add_argument("--format", dest="output_format", default=None,
+                        help="Output format (PNG, JPEG, GIF, ICO, WEBP, or AUTO to pick the smallest of PNG "
+                             "and WEBP per size). Defaults to the original format")
+    parser.add_argument("--auto-budget", type=float, default=0.25,
+                        help="Seconds of trial encoding --format AUTO may spend per image (default: 0.25)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="Byte-identical outputs for identical inputs (strips metadata, pins encoder settings)")
+    parser.add_argument("--upscale", choices=("allow", "skip", "copy-nearest"), default="allow",
+                        help="Sizes larger than the source: resize anyway (allow, the default), leave out (skip) "
+                             "or copy the largest output that needs no upscaling (copy-nearest)")
+    parser.add_argument("--linear", dest="linear_light", action="store_true",
+                        help="Resize in linear light (gamma correct, needs NumPy)")
+    parser.add_argument("--sharpen", action="store_true",
+                        help="Sharpen outputs with strength scaled by the reduction ratio")
+    parser.add_argument("--snap", dest="pixel_snap", action="store_true",
+                        help="Snap alpha edges of outputs up to 32px")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="Retry reads and writes that fail with transient I/O errors this many times (default: 0)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Keep outputs that already exist and are valid instead of writing them again")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Check every input from its header first and skip unreadable, truncated, oversized "
+                             "or unwritable ones before decoding anything")
+    
+    naming_group = parser.add_argument_group("naming")
+    naming_group.add_argument("--pattern", dest="naming_pattern", default=None,
+                              help="Output name pattern with {name}, {num} (e.g. {num:03}), {w}, {h}, {fmt} "
+                                   "and {hash} (default: {name}_{w}x{h})")
+    naming_group.add_argument("--start-number", type=int, default=1,
+                              help="First number used for {num} (default: 1)")
+    naming_group.add_argument("--no-dimensions", dest="include_dimensions", action="store_false",
+                              help="Do not append _WxH to names from --pattern")
+    
+    atlas_group = parser.add_argument_group("atlas mode")
+    atlas_group.add_argument("--atlas", default=None, metavar="NAME",
+                             help="Pack every size of every input into one image NAME.png (or .webp with "
+                                  "--format WEBP or AUTO) with a NAME.json and NAME.css index")
+    atlas_group.add_argument("--atlas-padding", type=int, default=1,
+                             help="Empty pixels around each sprite in the atlas (default: 1)")
+    
+    batch_group = parser.add_argument_group("batch mode")
+    batch_group.add_argument("--no-dedup", dest="dedup", action="store_false",
+                             help="Convert byte-identical images separately")
+    batch_group.add_argument("--perceptual", action="store_true",
+                             help="Also treat visually near-identical images as duplicates")
+    batch_group.add_argument("--perceptual-threshold", type=int, default=4,
+                             help="Maximum differing perceptual hash bits for near duplicates (default: 4)")
+    batch_group.add_argument("--batch-small", action="store_true",
+                             help="Convert small images (up to 256px) on one thread per CPU")
+    
+    watch_group = parser.add_argument_group("watch mode")
+    watch_group.add_argument("--watch", action="store_true",
+                             help="Keep running and convert images as they arrive in input_path")
+    watch_group.add_argument("--workers", type=int, default=2,
+                             help="Number of conversion or request workers (default: 2)")
+    watch_group.add_argument("--queue-size", type=int, default=64,
+                             help="Maximum number of files waiting for a worker (default: 64)")
+    watch_group.add_argument("--settle", type=float, default=1.0,
+                             help="Seconds a file must stay unchanged before converting (default: 1.0)")
+    watch_group.add_argument("--poll", action="store_true", help="Poll the folder instead of using inotify")
+    watch_group.add_argument("--existing", action="store_true", help="Also convert images already in the folder")
+    
+    report_group = parser.add_argument_group("reporting")
+    report_group.add_argument("--report", default=None,
+                              help="Append a JSON Lines record per source and output to this file")
+    report_group.add_argument("--metrics", default=None,
+                              help="Emit metrics to prom:<file> (Prometheus textfile) or statsd:<host>:<port>")
+    
+    serve_group = parser.add_argument_group("server mode")
+    serve_group.add_argument("--serve", action="store_true",
+                             help="Serve resized variants of the images in input_path over HTTP")
+    serve_group.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    serve_group.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    
+    args = parser.parse_args()
+    
+    if args.naming_pattern:
+        from .naming import compile_template
+        
+        try:
+            compile_template(args.naming_pattern, args.include_dimensions)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    # Structured run report and metrics, shared by every mode that converts files
+    report = None
+    if args.report or args.metrics:
+        from .report import RunReport, create_metrics
+        
+        try:
+            metrics = create_metrics(args.metrics) if args.metrics else None
+        except ValueError as e:
+            parser.error(str(e))
+        report = RunReport(args.report, metrics)
+    
+    try:
+        success = run(args, report)
+    finally:
+        if report is not None:
+            report.close()
+    
+    if not success:
+        sys.exit(1)
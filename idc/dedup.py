@@ -0,0 +1,147 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# Side length of the perceptual hash grid
+HASH_SIZE = 8
+# Bits of the code for the mean of one channel
+MEAN_LEVELS = 16
+# Horizontal and vertical differences each contribute HASH_SIZE * HASH_SIZE bits,
+# followed by the mean red, green, blue and alpha
+HASH_BITS = 2 * HASH_SIZE * HASH_SIZE + 4 * MEAN_LEVELS
+
+# Modes whose images can share outputs, apart from their alpha
+MODE_FAMILIES = {"1": "L", "LA": "L", "La": "L", "PA": "P", "RGBA": "RGB", "RGBa": "RGB"}
+
+def content_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes, for finding exact duplicates"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def image_traits(img):
+    """
+    What images need to have in common before their outputs can be shared:
+    whether they are animated, their frame count, alpha and mode family.
+    """
+    has_alpha = img.mode in ("RGBA", "RGBa", "LA", "La", "PA") or "transparency" in img.info
+    return (getattr(img, "is_animated", False), getattr(img, "n_frames", 1), has_alpha,
+            MODE_FAMILIES.get(img.mode, img.mode))
+
+def thermometer(value, levels=MEAN_LEVELS):
+    """Code a 0-255 value as a run of set bits, so close values differ in few bits"""
+    return (1 << round(value * levels / 255)) - 1
+
+def perceptual_hash(path, hash_size=HASH_SIZE):
+    """
+    Difference hash (dHash) computed from a tiny downscale, with the image's traits.
+
+    Combines horizontal and vertical neighbour differences, so images that
+    look alike get hashes that differ in only a few bits, even after
+    re-encoding or small resizes. The differences are taken on
+    premultiplied brightness, so transparency counts, and the mean colour
+    and alpha are added so flat images do not all get the same hash.
+
+    Returns:
+        Tuple of (image_traits, hash)
+    """
+    with Image.open(path) as img:
+        traits = image_traits(img)
+        # Let JPEG decode at a reduced scale when possible
+        img.draft("RGB", (hash_size * 8, hash_size * 8))
+        small = img.convert("RGBA").convert("RGBa").resize((hash_size + 1, hash_size + 1), Image.BOX)
+
+    red, green, blue, alpha = small.split()
+    pixels = list(Image.merge("RGB", (red, green, blue)).convert("L").getdata())
+    stride = hash_size + 1
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            pixel = pixels[row * stride + col]
+            value = (value << 1) | (pixel > pixels[row * stride + col + 1])
+            value = (value << 1) | (pixel > pixels[(row + 1) * stride + col])
+
+    for band in (red, green, blue, alpha):
+        band_pixels = list(band.getdata())
+        value = (value << MEAN_LEVELS) | thermometer(sum(band_pixels) / len(band_pixels))
+    return traits, value
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def hash_chunks(value, chunk_count, bits=HASH_BITS):
+    """Split a hash into chunk_count bit ranges, tagged with their position"""
+    chunk_bits = -(-bits // chunk_count)
+    return [(index, (value >> (index * chunk_bits)) & ((1 << chunk_bits) - 1)) for index in range(chunk_count)]
+
+def find_duplicate_groups(paths, perceptual=False, threshold=4, key=None, workers=None):
+    """
+    Group input paths whose outputs would be identical.
+
+    Exact duplicates are found by content hash. With perceptual=True,
+    images whose perceptual hashes differ in at most threshold bits are
+    grouped too, as long as their image_traits match.
+
+    Args:
+        paths: Input image paths
+        perceptual: Also group near duplicates by perceptual hash
+        threshold: Maximum differing bits for near duplicates
+        key: Optional function; paths are only grouped when key(path) matches
+        workers: Number of hashing threads
+
+    Returns:
+        List of groups in input order. The first path of each group is the
+        one to convert, the rest are its duplicates.
+    """
+    key = key or (lambda path: None)
+    workers = workers or min(8, os.cpu_count() or 1)
+
+    def hash_file(path):
+        try:
+            return content_hash(path), perceptual_hash(path) if perceptual else None
+        except Exception as e:
+            print(f"Warning: Could not hash {path}: {e}")
+            return None, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(hash_file, paths))
+
+    groups = []
+    exact_groups = {}
+    # Pigeonhole index: near duplicates share at least one of threshold + 1 chunks exactly
+    chunk_index = {}
+
+    for path, (digest, phash) in zip(paths, hashes):
+        if digest is None:
+            groups.append([path])
+            continue
+
+        group_key = key(path)
+        group = exact_groups.get((group_key, digest))
+
+        if group is None and phash is not None:
+            traits, value = phash
+            for chunk in hash_chunks(value, threshold + 1):
+                for candidate_hash, candidate in chunk_index.get((group_key, traits, chunk), []):
+                    if hamming_distance(value, candidate_hash) <= threshold:
+                        group = candidate
+                        break
+                if group is not None:
+                    break
+
+        if group is None:
+            group = [path]
+            groups.append(group)
+            if phash is not None:
+                traits, value = phash
+                for chunk in hash_chunks(value, threshold + 1):
+                    chunk_index.setdefault((group_key, traits, chunk), []).append((value, group))
+        else:
+            group.append(path)
+
+        exact_groups[(group_key, digest)] = group
+
+    return groups
@@ -0,0 +1,839 @@
+import io
+import os
+import time
+import errno
+import shutil
+from PIL import Image
+from .formats import ANIMATED_FORMATS, DETERMINISTIC_PARAMS, VALID_ICO_SIZES, get_output_format, strip_metadata
+from .resample import ResizeChain, prepare_source, post_filter
+from .rawinput import REDUCING_GAP, open_reduced
+from .autoformat import AUTO_FORMATS, AutoFormatChooser
+from .naming import compile_template, find_collisions
+from .planning import plan_targets, unique_sizes
+
+# I/O errors worth retrying, as seen on flaky network and removable storage
+TRANSIENT_ERRNOS = {errno.EIO, errno.EAGAIN, errno.EBUSY, errno.EINTR, errno.ETIMEDOUT, errno.ESTALE,
+                    errno.ECONNRESET, errno.ECONNABORTED}
+
+def resize_to_size(img, size, save_format=None):
+    """Create a size x size copy of an image, ready to be saved in save_format"""
+    if save_format == "ICO" and img.mode not in ("RGBA", "RGB", "RGBa"):
+        # Convert to RGBA for ICO format if needed
+        return img.convert("RGBA").resize((size, size), Image.LANCZOS)
+    return img.resize((size, size), Image.LANCZOS)
+
+def save_resized_image(resized_img, output, save_format, size, file_format=None, deterministic=False):
+    """
+    Save a resized image with format specific settings.
+    
+    Args:
+        resized_img: The resized image
+        output: Output path or writable file object
+        save_format: Pillow format name, or None to use the path's extension
+        size: Target size, used for ICO headers
+        file_format: Format to write with default settings when save_format is None
+            and output is a file object
+        deterministic: Strip non-essential metadata and pin every encoder setting,
+            so identical inputs give byte-identical files
+    """
+    # Keep embedded colour profiles (JPEG and WEBP only write them when asked)
+    icc_profile = resized_img.info.get("icc_profile")
+    params = {}
+    
+    if save_format == "JPEG":
+        # JPEG doesn't support transparency, convert to RGB and use quality setting
+        if resized_img.mode in ('RGBA', 'LA') or (resized_img.mode == 'P' and 'transparency' in resized_img.info):
+            resized_img = resized_img.convert('RGB')
+        params = {"quality": 95, "icc_profile": icc_profile}
+    elif save_format == "WEBP" and icc_profile:
+        params = {"icc_profile": icc_profile}
+    elif save_format == "PNG":
+        params = {"optimize": True}
+    elif save_format == "ICO":
+        params = {"sizes": [(size, size)]}
+    
+    # Other formats use default settings
+    format_name = save_format or file_format
+    if deterministic:
+        strip_metadata(resized_img)
+        params = dict(DETERMINISTIC_PARAMS.get(format_name, {}), **params)
+    
+    resized_img.save(output, format=format_name, **params)
+
+def encode_image(resized_img, save_format, size, file_format=None, deterministic=False):
+    """Encode a resized image in memory with format specific settings and return the bytes"""
+    buffer = io.BytesIO()
+    save_resized_image(resized_img, buffer, save_format, size, file_format, deterministic)
+    return buffer.getvalue()
+
+def build_output_path(output_folder, filename, ext, size, number, naming_pattern=None,
+                      include_dimensions=True, content_hash=None):
+    """
+    Build the output path of one resized copy.
+    
+    Args:
+        output_folder: Folder to save resized images
+        filename: Original filename without extension
+        ext: Output file extension including the dot
+        size: Target size
+        number: Sequential number for the {num} placeholder
+        naming_pattern: Optional custom naming pattern (see naming.FIELDS)
+        include_dimensions: Whether to include dimensions in filename
+        content_hash: Hex digest of the source, for the {hash} placeholder
+    """
+    template = compile_template(naming_pattern, include_dimensions)
+    return os.path.join(output_folder, template.render(filename, number, size, ext, content_hash))
+
+def plan_outputs(input_path, output_folder, sizes, naming_pattern=None, start_number=1,
+                 include_dimensions=True, output_format=None):
+    """
+    Work out the output path of every size of one image, without decoding it.
+    
+    Args:
+        input_path: Path to the input image
+        output_folder: Folder to save resized images
+        sizes: List of sizes (width/height in pixels); repeated sizes and sizes ICO cannot
+            hold are left out
+        naming_pattern: Optional custom naming pattern
+        start_number: Starting number for sequential numbering
+        include_dimensions: Whether to include dimensions in filename
+        output_format: Output format, as passed to resize_image
+    
+    Returns:
+        List of (size, number, output_path). AUTO paths have no extension yet.
+    
+    Raises:
+        ValueError: if the naming pattern is invalid or cannot be used with the format
+    """
+    filename = os.path.splitext(os.path.basename(input_path))[0]
+    ext, save_format = get_output_format(input_path, output_format)
+    template = compile_template(naming_pattern, include_dimensions)
+    
+    if save_format == "AUTO" and "fmt" in template.fields:
+        raise ValueError("{fmt} cannot be used with the AUTO format, which is only picked while encoding")
+    sizes = unique_sizes(sizes)
+    if save_format == "ICO":
+        sizes = [size for size in sizes if size in VALID_ICO_SIZES]
+    
+    source_hash = None
+    if template.uses_hash:
+        from .dedup import content_hash
+        source_hash = content_hash(input_path)
+    
+    return [
+        (size, start_number + index,
+         os.path.join(output_folder, template.render(filename, start_number + index, size, ext, source_hash)))
+        for index, size in enumerate(sizes)
+    ]
+
+def add_content_keys(planned):
+    """
+    Add a content key to the planned outputs of every path claimed more than once.
+    
+    Byte-identical sources give identical outputs, e.g. under a {hash} pattern,
+    so only the sources of paths that would collide are hashed.
+    
+    Args:
+        planned: List of (output_path, owner, input_path, size)
+    
+    Returns:
+        List of (output_path, owner, content) for find_collisions, where content
+        is (source hash, size), or None if the path is not shared
+    """
+    from .dedup import content_hash
+    
+    shared = {os.path.normcase(os.path.abspath(output_path))
+              for output_path in find_collisions((output_path, owner) for output_path, owner, _, _ in planned)}
+    hashes = {}
+    
+    def content(input_path, size):
+        if input_path not in hashes:
+            try:
+                hashes[input_path] = content_hash(input_path)
+            except OSError:
+                # Unreadable sources fail later, keep them apart for now
+                hashes[input_path] = None
+        return None if hashes[input_path] is None else (hashes[input_path], size)
+    
+    return [(output_path, owner,
+             content(input_path, size) if os.path.normcase(os.path.abspath(output_path)) in shared else None)
+            for output_path, owner, input_path, size in planned]
+
+def check_collisions(planned):
+    """
+    Report output paths that several outputs would be written to.
+    
+    Args:
+        planned: Iterable of (output_path, owner) pairs or (output_path, owner, content)
+            triples, see naming.find_collisions
+    
+    Returns:
+        True if every output gets its own path, False otherwise
+    """
+    collisions = find_collisions(planned)
+    if not collisions:
+        return True
+    
+    print("Error: These output paths would be written more than once. "
+          "Change the naming pattern or include the dimensions:")
+    for output_path, owners in list(collisions.items())[:10]:
+        print(f"  {output_path}: {', '.join(owners)}")
+    if len(collisions) > 10:
+        print(f"  ... and {len(collisions) - 10} more")
+    return False
+
+def is_transient_error(error):
+    """Check whether an error looks like a passing I/O failure that is worth retrying"""
+    if isinstance(error, (TimeoutError, ConnectionError, InterruptedError, BlockingIOError)):
+        return True
+    return isinstance(error, OSError) and error.errno in TRANSIENT_ERRNOS
+
+def with_retries(action, retries=0, retry_delay=0.5, description="Operation"):
+    """
+    Run action() and retry transient I/O errors with exponential backoff.
+    
+    Args:
+        action: Function without arguments to run
+        retries: How many times to retry after the first attempt
+        retry_delay: Seconds to wait before the first retry, doubled for each further retry
+        description: What the action does, for the warning printed before each retry
+    """
+    for attempt in range(retries + 1):
+        try:
+            return action()
+        except OSError as e:
+            if attempt >= retries or not is_transient_error(e):
+                raise
+            delay = retry_delay * 2 ** attempt
+            print(f"Warning: {description} failed ({e}). Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def load_image(input_path, min_size=None):
+    """
+    Open and fully decode an image.
+    
+    With min_size, large uncompressed sources are read from a memory map
+    and box-reduced while loading, so the full-size image is never held
+    in memory.
+    
+    Returns:
+        Tuple of (image, original (width, height))
+    """
+    if min_size:
+        reduced = open_reduced(input_path, min_size)
+        if reduced is not None:
+            return reduced
+    
+    img = Image.open(input_path)
+    img.load()
+    return img, img.size
+
+def write_output(data, output_path):
+    """Write an encoded output atomically, so a failed write never leaves a partial file behind"""
+    temp_path = output_path + ".part"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, output_path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def output_matches(output_path, data):
+    """Check whether an existing output already holds exactly these bytes"""
+    try:
+        if os.path.getsize(output_path) != len(data):
+            return False
+        with open(output_path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+def is_valid_output(output_path, size, file_format, source_mtime):
+    """
+    Check whether an existing output can be kept when resuming.
+    
+    The output must be newer than the source, decode completely and have
+    the expected size and format.
+    """
+    try:
+        if os.path.getmtime(output_path) < source_mtime:
+            return False
+        with Image.open(output_path) as img:
+            if img.size != (size, size) or (file_format and img.format != file_format):
+                return False
+            img.load()
+        return True
+    except Exception:
+        return False
+
+def read_source_size(input_path):
+    """Read the dimensions of an image from its header, without decoding the pixels"""
+    with Image.open(input_path) as img:
+        return img.size
+
+def find_kept_output(output_path, size, file_format, source_mtime):
+    """
+    Find a valid output a previous run already wrote, for resuming.
+    
+    Returns:
+        (path, format) of the output, or None. A file_format of None means AUTO,
+        whose outputs may exist in any of the formats it chooses from.
+    """
+    if file_format is None:
+        candidates = [(output_path + candidate_ext, candidate_format)
+                      for candidate_format, candidate_ext in AUTO_FORMATS.items()]
+    else:
+        candidates = [(output_path, file_format)]
+    
+    for candidate_path, candidate_format in candidates:
+        if is_valid_output(candidate_path, size, candidate_format, source_mtime):
+            return candidate_path, candidate_format
+    return None
+
+def write_copies(copy_targets, source_path, input_path, auto=False, outputs=None, report=None,
+                 retries=0, retry_delay=0.5, deterministic=False):
+    """
+    Write an output again under the names of the upscale targets that reuse it (copy-nearest).
+    
+    Args:
+        copy_targets: (size, number, output_path) entries; AUTO paths have no extension yet
+        source_path: The output that is copied
+        input_path: Source image, for the report
+        auto: Whether the paths still need the extension AUTO chose for source_path
+        outputs: Optional list that receives (size, number, output_path) for each copy
+        report: Optional report.RunReport that records the copies
+        retries: How many times to retry a write after a transient I/O error
+        retry_delay: Seconds to wait before the first retry
+        deterministic: Leave identical existing copies untouched
+    
+    Returns:
+        (copied_count, failed_count, bytes_written)
+    """
+    ext = os.path.splitext(source_path)[1] if auto else ""
+    copied_count = 0
+    failed_count = 0
+    bytes_written = 0
+    
+    try:
+        with open(source_path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Error: Could not read {source_path} to copy it: {e}")
+        return 0, len(copy_targets), 0
+    
+    for size, number, output_path in copy_targets:
+        output_path += ext
+        try:
+            unchanged = deterministic and output_matches(output_path, data)
+            if not unchanged:
+                with_retries(lambda: write_output(data, output_path), retries, retry_delay,
+                             f"Writing {output_path}")
+        except Exception as e:
+            failed_count += 1
+            print(f"Error: Could not create {output_path}: {e}")
+            if report is not None:
+                from .report import error_details
+                
+                report.record_output(input_path, output_path, size, None, status="error",
+                                     error=error_details(e, size))
+            continue
+        
+        print(f"{'Unchanged' if unchanged else 'Copied'}: {output_path} (nearest size without upscaling)")
+        copied_count += 1
+        bytes_written += len(data)
+        if outputs is not None:
+            outputs.append((size, number, output_path))
+        if report is not None:
+            report.record_output(input_path, output_path, size, None, len(data), status="copied",
+                                 copy_of=source_path)
+    return copied_count, failed_count, bytes_written
+
+def resize_image(input_path, output_folder, sizes, naming_pattern=None, start_number=1, 
+                include_dimensions=True, output_format=None, linear_light=False, sharpen=False,
+                pixel_snap=False, outputs=None, report=None, retries=0, retry_delay=0.5, resume=False,
+                auto_budget=0.25, deterministic=False, upscale="allow", cancel=None, source_cache=None,
+                results=None):
+    """
+    Resize an image to multiple dimensions and save each copy with custom naming and format.
+    
+    The targets are planned before anything is decoded: repeated sizes are
+    dropped, the upscale policy is applied and sizes are resized largest
+    first, so smaller sizes can be resampled from larger results. Each
+    output succeeds or fails on its own: an error in one size is reported
+    and the remaining sizes are still written.
+    
+    Args:
+        input_path: Path to the input image
+        output_folder: Folder to save resized images
+        sizes: List of sizes (width/height in pixels)
+        naming_pattern: Optional custom naming pattern, e.g. "{name}_{num:03}" (see naming.FIELDS)
+        start_number: Starting number for sequential numbering
+        include_dimensions: Whether to include dimensions in filename
+        output_format: Output format (e.g., 'PNG', 'JPEG', 'GIF', 'ICO', etc.), or 'AUTO' to pick
+            the smallest of PNG and WEBP for each output
+        linear_light: Resize in linear light (gamma correct) instead of on sRGB values
+        sharpen: Sharpen each output with strength scaled by the reduction ratio
+        pixel_snap: Snap alpha edges of outputs up to 32px for crisper small icons
+        outputs: Optional list that receives (size, number, output_path) for each file written or kept
+        report: Optional report.RunReport that records timings, bytes and errors
+        retries: How many times to retry reading the source or writing an output after a transient I/O error
+        retry_delay: Seconds to wait before the first retry, doubled for each further retry
+        resume: Keep outputs that already exist and are valid instead of writing them again
+        auto_budget: Seconds of extra trial encoding AUTO may spend on this image
+        deterministic: Byte-identical outputs for identical inputs: strip non-essential metadata,
+            pin encoder settings, let AUTO choose without a time budget and leave identical
+            existing outputs untouched
+        upscale: What to do with sizes larger than the source: "allow" resizes them anyway,
+            "skip" leaves them out and "copy-nearest" copies the largest output that needs
+            no upscaling to their names (see planning.plan_targets)
+        cancel: Optional threading.Event; once set, no further size is started
+        source_cache: Optional cache.SourceCache shared between calls, so popular sources
+            are decoded once
+        results: Optional list that receives a dict per encoded output with its source, size,
+            path, format, encoded bytes ("data") and their length ("bytes"), and resize and
+            encode seconds, so callers can show outputs without reading them back from disk
+    
+    Returns:
+        True if every planned output was written or kept, False otherwise
+    """
+    started = time.perf_counter()
+    bytes_in = 0
+    decode_seconds = None
+    bytes_out = 0
+    success_count = 0
+    failed_count = 0
+    skipped_count = 0
+    
+    try:
+        bytes_in = os.path.getsize(input_path)
+        
+        # Create output folder if it doesn't exist
+        os.makedirs(output_folder, exist_ok=True)
+        
+        # Get the file extension based on output format or use original
+        ext, save_format = get_output_format(input_path, output_format)
+        
+        # Outputs are encoded in memory, which needs an explicit format
+        auto = save_format == "AUTO"
+        file_format = None if auto else save_format or Image.registered_extensions().get(ext.lower())
+        
+        # For ICO format, validate sizes (ICO has specific size requirements)
+        if save_format == "ICO":
+            valid_sizes = []
+            for size in sizes:
+                if size in VALID_ICO_SIZES:
+                    valid_sizes.append(size)
+                else:
+                    print(f"Warning: Size {size}x{size} is not valid for ICO format. Skipping.")
+            
+            if not valid_sizes:
+                print("Error: No valid sizes for ICO format. Please select from: 16, 24, 32, 48, 64, 128, 256")
+                if report is not None:
+                    report.record_source(input_path, bytes_in, status="error",
+                                         error={"type": "InvalidSizes", "message": "No valid sizes for ICO format"})
+                return False
+                
+            sizes = valid_sizes
+        
+        # Generate output filenames based on pattern, and refuse to let sizes overwrite each other
+        targets = plan_outputs(input_path, output_folder, sizes, naming_pattern, start_number,
+                               include_dimensions, output_format)
+        if not check_collisions((output_path, f"{size}x{size}") for size, _, output_path in targets):
+            if report is not None:
+                report.record_source(input_path, bytes_in, status="error",
+                                     error={"type": "NameCollision",
+                                            "message": "Several sizes map to the same output path"})
+            return False
+        
+        # Decide what to resize, copy or skip; only the header is read to know the source size
+        source_size = None
+        if upscale != "allow":
+            source_size = with_retries(lambda: read_source_size(input_path), retries, retry_delay,
+                                       f"Reading {input_path}")
+        plan = plan_targets(targets, source_size, upscale, requested=len(sizes))
+        print(f"Plan for {os.path.basename(input_path)}: {plan.summary()}")
+        if report is not None:
+            for size, _, output_path in plan.skipped:
+                report.record_output(input_path, output_path, size, save_format, status="skipped",
+                                     reason="upscale")
+        targets = plan.work
+        
+        # Every size would upscale a small source, so there is nothing to decode
+        if not targets:
+            print(f"No size of {input_path} is left to create. Skipping.")
+            if report is not None:
+                report.record_source(input_path, bytes_in, total_seconds=time.perf_counter() - started,
+                                     status="skipped", planned=0, upscale_skipped=len(plan.skipped),
+                                     duplicate_sizes=plan.duplicates)
+            return True
+        
+        # When resuming, keep the outputs a previous run already finished
+        if resume:
+            source_mtime = os.path.getmtime(input_path)
+            pending = []
+            for size, number, output_path in targets:
+                kept = find_kept_output(output_path, plan.render_size(size), file_format, source_mtime)
+                copy_targets = plan.copies.get(output_path, [])
+                if kept is None:
+                    pending.append((size, number, output_path))
+                    continue
+                
+                kept_path, kept_format = kept
+                skipped_count += 1
+                if outputs is not None:
+                    outputs.append((size, number, kept_path))
+                if report is not None:
+                    report.record_output(input_path, kept_path, size, kept_format, status="skipped")
+                
+                # Copies of a kept output are checked, and made again from it if needed
+                missing = []
+                copy_ext = os.path.splitext(kept_path)[1] if auto else ""
+                for copy_size, copy_number, copy_path in copy_targets:
+                    if not is_valid_output(copy_path + copy_ext, plan.render_size(size), kept_format, source_mtime):
+                        missing.append((copy_size, copy_number, copy_path))
+                        continue
+                    skipped_count += 1
+                    if outputs is not None:
+                        outputs.append((copy_size, copy_number, copy_path + copy_ext))
+                    if report is not None:
+                        report.record_output(input_path, copy_path + copy_ext, copy_size, kept_format,
+                                             status="skipped")
+                copied, copy_failed, copy_bytes = write_copies(missing, kept_path, input_path, auto, outputs,
+                                                               report, retries, retry_delay, deterministic)
+                success_count += copied
+                failed_count += copy_failed
+                bytes_out += copy_bytes
+            targets = pending
+            
+            if not targets:
+                print(f"All {skipped_count} outputs of {input_path} already exist. Skipping.")
+                if success_count:
+                    print(f"Copied {success_count} missing outputs from existing ones")
+                if report is not None:
+                    report.record_source(input_path, bytes_in, bytes_out, total_seconds=time.perf_counter() - started,
+                                         outputs=success_count, failed=failed_count,
+                                         status="skipped" if not failed_count else "partial",
+                                         skipped=skipped_count)
+                return failed_count == 0
+        
+        if cancel is not None and cancel.is_set():
+            print(f"Cancelled: {input_path}")
+            if report is not None:
+                report.record_source(input_path, bytes_in, total_seconds=time.perf_counter() - started,
+                                     status="cancelled", skipped=skipped_count)
+            return False
+        
+        # Open and decode the image
+        decode_start = time.perf_counter()
+        # Reducing while loading averages sRGB values, so linear light needs the full image
+        min_size = None if linear_light else max(plan.render_size(size) for size, _, _ in targets) * REDUCING_GAP
+        load = load_image if source_cache is None else source_cache.load
+        img, source_size = with_retries(lambda: load(input_path, min_size), retries, retry_delay,
+                                        f"Reading {input_path}")
+        decode_seconds = time.perf_counter() - decode_start
+        
+        # Of the AUTO formats, WEBP keeps animations small at every size
+        if auto and getattr(img, "is_animated", False):
+            auto, save_format, file_format = False, "WEBP", "WEBP"
+            targets = [(size, number, output_path + AUTO_FORMATS["WEBP"]) for size, number, output_path in targets]
+            plan.copies = {
+                output_path + AUTO_FORMATS["WEBP"]: [(size, number, copy_path + AUTO_FORMATS["WEBP"])
+                                                     for size, number, copy_path in copy_targets]
+                for output_path, copy_targets in plan.copies.items()
+            }
+        # A time budget would make AUTO's choice depend on machine load
+        chooser = AutoFormatChooser(None if deterministic else auto_budget) if auto else None
+        
+        # Animated sources keep all their frames when the output format can hold them
+        effective_format = save_format or img.format
+        animated = getattr(img, "is_animated", False) and effective_format in ANIMATED_FORMATS
+        if animated:
+            from .animation import resize_animation, save_animation
+            
+            frames, durations, disposals, loop = resize_animation(
+                img, [plan.render_size(size) for size, _, _ in targets], linear_light, sharpen, pixel_snap
+            )
+        else:
+            # Prepare the source once so every target size shares the work:
+            # either linear light, or premultiplied alpha for sources with transparency.
+            # Targets come largest first, so smaller ones resample earlier results
+            source = ResizeChain(prepare_source(img, save_format, linear_light), REDUCING_GAP)
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        if report is not None:
+            from .report import error_details
+            
+            report.record_source(input_path, bytes_in, bytes_out, decode_seconds, time.perf_counter() - started,
+                                 failed=len(sizes), status="error", error=error_details(e))
+        return False
+    
+    # Resize and save each target dimension on its own, so one bad output does not cost the others
+    cancelled = False
+    for index, (size, number, output_path) in enumerate(targets):
+        # Cancellation is checked between sizes, never in the middle of writing one
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+            if animated:
+                for size_frames in frames[index:]:
+                    size_frames.close()
+            break
+        resize_start = time.perf_counter()
+        render_size = plan.render_size(size)
+        copy_targets = plan.copies.get(output_path, [])
+        output_format_used = effective_format
+        auto_details = {}
+        unchanged = False
+        try:
+            if animated:
+                encode_start = resize_start
+                buffer = io.BytesIO()
+                try:
+                    save_animation(frames[index], buffer, effective_format, durations, disposals, loop,
+                                   deterministic)
+                finally:
+                    # Drop the spilled frames as soon as their animation is encoded
+                    frames[index].close()
+                data = buffer.getvalue()
+            else:
+                # Create a resized copy
+                resized_img = source.resize(render_size)
+                
+                # Post-filter in memory before encoding
+                if sharpen or pixel_snap:
+                    resized_img = post_filter(resized_img, source_size, render_size, sharpen, pixel_snap)
+                encode_start = time.perf_counter()
+                
+                # Encode the resized image with format settings
+                if chooser is not None:
+                    output_format_used, data, reason, bytes_saved = chooser.choose(
+                        resized_img, render_size,
+                        lambda img, candidate: encode_image(img, candidate, render_size, None, deterministic)
+                    )
+                    output_path += AUTO_FORMATS[output_format_used]
+                    auto_details = {"auto_reason": reason, "bytes_saved": bytes_saved}
+                else:
+                    data = encode_image(resized_img, save_format, render_size, file_format, deterministic)
+            encode_seconds = time.perf_counter() - encode_start
+            
+            # Leave identical outputs alone, so their modification time does not change either
+            unchanged = deterministic and output_matches(output_path, data)
+            if not unchanged:
+                with_retries(lambda: write_output(data, output_path), retries, retry_delay,
+                             f"Writing {output_path}")
+        except Exception as e:
+            # Copies of this output cannot be made either
+            failed_count += 1 + len(copy_targets)
+            print(f"Error: Could not create {output_path}: {e}")
+            if report is not None:
+                from .report import error_details
+                
+                report.record_output(input_path, output_path, size, effective_format, status="error",
+                                     error=error_details(e, size))
+            continue
+        
+        action = "Unchanged" if unchanged else "Created"
+        if auto_details:
+            saved_text = f", {auto_details['bytes_saved']} bytes saved" if auto_details["bytes_saved"] else ""
+            print(f"{action}: {output_path} (AUTO: {output_format_used}, {auto_details['auto_reason']}{saved_text})")
+        else:
+            print(f"{action}: {output_path}")
+        success_count += 1
+        bytes_out += len(data)
+        if outputs is not None:
+            outputs.append((size, number, output_path))
+        if report is not None:
+            extra = {"animated": True} if animated else dict(auto_details)
+            if unchanged:
+                extra["unchanged"] = True
+            if render_size != size:
+                extra["rendered_size"] = render_size
+            report.record_output(input_path, output_path, size, output_format_used, len(data),
+                                 encode_start - resize_start, encode_seconds, **extra)
+        if results is not None:
+            results.append({"source": input_path, "size": size, "rendered_size": render_size,
+                            "path": output_path, "format": output_format_used, "data": data, "bytes": len(data),
+                            "resize_seconds": encode_start - resize_start, "encode_seconds": encode_seconds})
+        
+        if copy_targets:
+            copied, copy_failed, copy_bytes = write_copies(copy_targets, output_path, input_path, auto, outputs,
+                                                           report, retries, retry_delay, deterministic)
+            success_count += copied
+            failed_count += copy_failed
+            bytes_out += copy_bytes
+    
+    kind = "animations" if animated else "images"
+    if cancelled:
+        print(f"Cancelled: {input_path} after {success_count} resized {kind}")
+    elif failed_count:
+        print(f"Created {success_count} of {success_count + failed_count} resized {kind} in {output_folder}, "
+              f"{failed_count} failed")
+    else:
+        print(f"Successfully created {success_count} resized {kind} in {output_folder}")
+    if skipped_count:
+        print(f"Kept {skipped_count} existing outputs")
+    if chooser is not None:
+        print(f"AUTO format: {chooser.trials} trial encodes, {chooser.bytes_saved} bytes saved")
+    
+    if report is not None:
+        if cancelled:
+            status = "cancelled"
+        else:
+            status = "ok" if not failed_count else "partial" if success_count or skipped_count else "error"
+        extra = {"frames": img.n_frames} if animated else {}
+        extra.update(planned=len(plan.work) + plan.copy_count(), upscale_skipped=len(plan.skipped),
+                     duplicate_sizes=plan.duplicates)
+        report.record_source(input_path, bytes_in, bytes_out, decode_seconds, time.perf_counter() - started,
+                             success_count, failed_count, status, skipped=skipped_count, **extra)
+    return failed_count == 0 and not cancelled
+
+def copy_outputs(outputs, input_path, output_folder, output_format=None, naming_pattern=None,
+                 include_dimensions=True, report=None):
+    """
+    Copy the outputs of one image to the names another image would get.
+    
+    Args:
+        outputs: (size, number, output_path) entries written for the original
+        input_path: Path of the duplicate input image
+        output_folder: Folder to save resized images
+        output_format: Output format, as passed to resize_image
+        naming_pattern: Optional custom naming pattern
+        include_dimensions: Whether to include dimensions in filename
+        report: Optional report.RunReport that records the copies
+    """
+    filename = os.path.splitext(os.path.basename(input_path))[0]
+    
+    source_hash = None
+    if compile_template(naming_pattern, include_dimensions).uses_hash:
+        from .dedup import content_hash
+        source_hash = content_hash(input_path)
+    
+    for size, number, source_path in outputs:
+        # Take the extension from the copied output, as AUTO picks it per output
+        ext = os.path.splitext(source_path)[1]
+        output_path = build_output_path(output_folder, filename, ext, size, number,
+                                        naming_pattern, include_dimensions, source_hash)
+        if os.path.abspath(output_path) != os.path.abspath(source_path):
+            shutil.copyfile(source_path, output_path)
+            print(f"Copied: {output_path}")
+        if report is not None:
+            report.record_output(input_path, output_path, size, output_format,
+                                 os.path.getsize(output_path), status="copied", duplicate_of=source_path)
+
+def resize_images(input_paths, output_folder, sizes, naming_pattern=None, start_number=1,
+                  include_dimensions=True, output_format=None, dedup=True, perceptual=False,
+                  perceptual_threshold=4, batch_small=False, preflight=False, **resize_options):
+    """
+    Resize a batch of images to multiple dimensions in one go.
+    
+    Every output path of the batch is planned first, so a naming pattern
+    that would make different outputs overwrite each other stops the batch
+    before anything is decoded. Duplicate inputs are converted once and
+    their outputs copied to the names each duplicate would get; under a
+    {hash} pattern, those are the same names.
+    
+    With batch_small, small still sources are converted on several
+    threads at once (see batch.resize_batched) and only the rest one by
+    one. With preflight, every input is first checked from its header
+    (see preflight.preflight) and inputs that would fail are left out
+    before anything is decoded.
+    
+    Args:
+        input_paths: Paths of the input images
+        output_folder: Folder to save resized images
+        sizes: List of sizes (width/height in pixels)
+        naming_pattern: Optional custom naming pattern
+        start_number: Starting number for sequential numbering
+        include_dimensions: Whether to include dimensions in filename
+        output_format: Output format (e.g., 'PNG', 'JPEG', 'GIF', 'ICO', etc.)
+        dedup: Convert byte-identical inputs only once
+        perceptual: Also treat visually near-identical inputs as duplicates
+        perceptual_threshold: Maximum differing perceptual hash bits for near duplicates
+        batch_small: Convert small sources on several threads
+        preflight: Reject unreadable, truncated, oversized and unwritable inputs up front
+        resize_options: Extra keyword arguments passed to resize_image
+    
+    Returns:
+        Number of images that were converted successfully
+    """
+    input_count = len(input_paths)
+    if preflight:
+        from .preflight import preflight as preflight_inputs, print_preflight
+        
+        results = preflight_inputs(input_paths, sizes, output_format)
+        print_preflight(results)
+        report = resize_options.get("report")
+        if report is not None:
+            for result in results:
+                if not result.ok:
+                    report.record_source(result.path, result.file_size, status="rejected",
+                                         error={"type": "Preflight", "message": "; ".join(result.errors)},
+                                         preflight=result.to_record())
+        input_paths = [result.path for result in results if result.ok]
+    
+    planned = []
+    try:
+        for input_path in input_paths:
+            for size, _, output_path in plan_outputs(input_path, output_folder, sizes, naming_pattern,
+                                                     start_number, include_dimensions, output_format):
+                planned.append((output_path, f"{os.path.basename(input_path)} at {size}x{size}", input_path, size))
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 0
+    if not check_collisions(add_content_keys(planned)):
+        return 0
+    
+    if dedup:
+        from .dedup import find_duplicate_groups
+        
+        # Only group inputs whose outputs get the same extension
+        groups = find_duplicate_groups(
+            input_paths, perceptual, perceptual_threshold,
+            key=lambda path: get_output_format(path, output_format)[0].lower()
+        )
+    else:
+        groups = [[input_path] for input_path in input_paths]
+    
+    batched = {}
+    batched_outputs = {}
+    if batch_small:
+        from .batch import resize_batched
+        
+        batched = resize_batched([group[0] for group in groups], output_folder, sizes, naming_pattern,
+                                 start_number, include_dimensions, output_format, outputs=batched_outputs,
+                                 **resize_options)
+    
+    converted_count = 0
+    for group in groups:
+        input_path = group[0]
+        if input_path in batched:
+            if not batched[input_path]:
+                continue
+            outputs = batched_outputs.get(input_path, [])
+        else:
+            print(f"Processing: {input_path}")
+            
+            outputs = []
+            if not resize_image(input_path, output_folder, sizes, naming_pattern, start_number,
+                                include_dimensions, output_format, outputs=outputs, **resize_options):
+                continue
+        converted_count += 1
+        
+        # Fan the outputs out to every duplicate instead of converting it again
+        for duplicate_path in group[1:]:
+            print(f"Duplicate of {input_path}: {duplicate_path}")
+            try:
+                copy_outputs(outputs, duplicate_path, output_folder, output_format,
+                             naming_pattern, include_dimensions, resize_options.get("report"))
+                converted_count += 1
+            except OSError as e:
+                print(f"Error: {e}")
+    
+    duplicate_count = len(input_paths) - len(groups)
+    if duplicate_count:
+        print(f"Skipped converting {duplicate_count} duplicate images")
+    print(f"Converted {converted_count} of {input_count} images")
+    return converted_count
+
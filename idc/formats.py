@@ -0,0 +1,74 @@
+import os
+
+# Default target sizes for the command line and watch mode
+DEFAULT_SIZES = [16, 32, 48, 64, 128, 256, 512]
+
+# ICO format has specific size requirements
+VALID_ICO_SIZES = [16, 24, 32, 48, 64, 128, 256]
+
+# File extensions picked up when converting or watching a folder
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".ico", ".tif", ".tiff", ".ppm"}
+
+# Output formats that can store more than one frame
+ANIMATED_FORMATS = {"GIF", "WEBP", "PNG"}
+
+# Image info kept in deterministic mode: only what changes how the pixels look
+ESSENTIAL_INFO = ("icc_profile", "transparency")
+
+# Encoder settings spelled out in deterministic mode, so a Pillow upgrade
+# changing a default cannot change the bytes. They match the settings used
+# when a format is chosen explicitly.
+DETERMINISTIC_PARAMS = {
+    "PNG": {"optimize": True, "compress_level": 9},
+    "JPEG": {"quality": 95, "subsampling": 2, "optimize": False, "progressive": False},
+    "WEBP": {"quality": 80, "alpha_quality": 100, "method": 4, "lossless": False, "exact": False},
+    "ICO": {"bitmap_format": "png"},
+    "GIF": {"optimize": False, "interlace": False},
+}
+
+def strip_metadata(img):
+    """Drop comments, EXIF, XMP, text chunks and the like from an image's info, in place"""
+    img.info = {key: value for key, value in img.info.items() if key in ESSENTIAL_INFO}
+    return img
+
+def is_image_file(path):
+    """Check whether a path looks like a finished image file worth converting"""
+    name = os.path.basename(path)
+    
+    # Skip hidden files and the usual temporary names of in-flight uploads
+    if name.startswith(".") or name.endswith(("~", ".part", ".tmp", ".crdownload")):
+        return False
+    
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+def get_output_format(input_path, output_format=None):
+    """
+    Work out the file extension and Pillow save format for an output.
+    
+    Returns:
+        Tuple of (extension, save_format). save_format is None when the
+        original format is kept and PIL should pick it from the extension.
+        For AUTO the extension is empty, as it depends on the format chosen
+        for each output.
+    """
+    if output_format and output_format.upper() == "AUTO":
+        ext = ""
+        save_format = "AUTO"
+    elif output_format:
+        # Convert format to lowercase for extension
+        ext = f".{output_format.lower()}"
+        # Special case for JPG vs JPEG
+        if ext == ".jpg":
+            save_format = "JPEG"
+        elif ext == ".jpeg":
+            save_format = "JPEG"
+            ext = ".jpg"  # Standardize to .jpg
+        else:
+            save_format = output_format.upper()
+    else:
+        # Use original extension and format
+        ext = os.path.splitext(input_path)[1]
+        save_format = None  # PIL will determine from extension
+    
+    return ext, save_format
+
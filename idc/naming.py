@@ -0,0 +1,134 @@
+import os
+import string
+from functools import lru_cache
+
+# Fields a naming pattern can use, with the help text shown for them
+FIELDS = {
+    "name": "original filename",
+    "num": "sequential number, {num:03} pads to 3 digits",
+    "w": "output width",
+    "h": "output height",
+    "fmt": "output format, e.g. png",
+    "hash": "start of the source's SHA-256, {hash:12} for 12 characters",
+}
+
+# Pattern used when no custom pattern is given
+DEFAULT_PATTERN = "{name}"
+
+# Characters of the content hash used by a plain {hash}
+DEFAULT_HASH_LENGTH = 8
+
+class NamingTemplate:
+    """
+    A naming pattern compiled once into literal text and fields.
+
+    Rendering a name joins the parsed parts instead of running a chain of
+    str.replace calls for every output. Literal braces are written as
+    {{ and }}.
+    """
+
+    def __init__(self, pattern, include_dimensions=True):
+        self.pattern = pattern
+        self.parts = []
+        self.fields = set()
+
+        try:
+            parsed = list(string.Formatter().parse(pattern))
+        except ValueError as e:
+            raise ValueError(f"Invalid naming pattern {pattern!r}: {e}")
+
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                self.parts.append((literal, None, None))
+            if field is None:
+                continue
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field {{{field}}} in naming pattern. "
+                                 f"Use {', '.join('{' + name + '}' for name in FIELDS)}")
+            if conversion:
+                raise ValueError(f"Conversions like {{{field}!{conversion}}} are not supported in naming patterns")
+            self.check_spec(field, spec)
+
+            self.parts.append((None, field, spec))
+            self.fields.add(field)
+
+        # Patterns without {w} or {h} get the dimensions appended, as before
+        self.append_dimensions = include_dimensions and not self.fields & {"w", "h"}
+        self.uses_hash = "hash" in self.fields
+
+    @staticmethod
+    def check_spec(field, spec):
+        """Reject format specs that would fail later, when the first output is named"""
+        if field == "hash":
+            if spec and not spec.isdigit():
+                raise ValueError(f"{{hash:{spec}}} needs a number of characters, e.g. {{hash:12}}")
+            return
+
+        sample = "sample" if field in ("name", "fmt") else 1
+        try:
+            format(sample, spec)
+        except ValueError as e:
+            raise ValueError(f"Invalid format {{{field}:{spec}}} in naming pattern: {e}")
+
+    def render(self, name, number, size, ext, content_hash=None):
+        """
+        Build the filename of one output.
+
+        Args:
+            name: Original filename without extension
+            number: Sequential number for {num}
+            size: Target size, for {w}, {h} and the appended dimensions
+            ext: Output file extension including the dot
+            content_hash: Hex digest of the source, needed when the pattern uses {hash}
+        """
+        values = {"name": name, "num": number, "w": size, "h": size, "fmt": ext.lstrip(".").lower()}
+
+        pieces = []
+        for literal, field, spec in self.parts:
+            if field is None:
+                pieces.append(literal)
+            elif field == "hash":
+                pieces.append(content_hash[:int(spec or DEFAULT_HASH_LENGTH)])
+            else:
+                pieces.append(format(values[field], spec))
+
+        if self.append_dimensions:
+            pieces.append(f"_{size}x{size}")
+        pieces.append(ext)
+        return "".join(pieces)
+
+@lru_cache(maxsize=64)
+def compile_template(pattern=None, include_dimensions=True):
+    """
+    Compile a naming pattern, or the default one (which always includes the dimensions).
+
+    Raises:
+        ValueError: if the pattern uses unknown fields or invalid format specs
+    """
+    if not pattern:
+        return NamingTemplate(DEFAULT_PATTERN)
+    return NamingTemplate(pattern, include_dimensions)
+
+def find_collisions(planned):
+    """
+    Find output paths that more than one output would be written to.
+
+    Args:
+        planned: Iterable of (output_path, owner) pairs, where owner describes the output,
+            or (output_path, owner, content) triples. Outputs with equal content, e.g.
+            the same size of byte-identical sources, would write the same file, so
+            they only collide with outputs of other content.
+
+    Returns:
+        Dict of output path -> owners, for every path claimed by different outputs
+    """
+    claims = {}
+    for entry in planned:
+        output_path, owner = entry[:2]
+        # Without a content key, every output counts as different
+        content = entry[2] if len(entry) > 2 and entry[2] is not None else object()
+        # Compare the way the file system does, e.g. case-insensitively on Windows
+        claim = claims.setdefault(os.path.normcase(os.path.abspath(output_path)), (output_path, [], set()))
+        claim[1].append(owner)
+        claim[2].add(content)
+    return {output_path: owners for output_path, owners, contents in claims.values() if len(contents) > 1}
@@ -0,0 +1,89 @@
+# What to do with target sizes larger than the source
+UPSCALE_POLICIES = ("allow", "skip", "copy-nearest")
+
+class TargetPlan:
+    """
+    The outputs of one source, worked out before anything is decoded.
+
+    work holds the (size, number, output_path) entries to resize, largest
+    first, so smaller sizes can be resampled from larger results. Sizes in
+    render are rendered at a smaller size instead (copy-nearest). copies
+    maps the output path of a work entry to the targets that get a copy of
+    that output, and skipped holds the targets that are left out.
+    """
+
+    def __init__(self, work, render=None, copies=None, skipped=None, duplicates=0):
+        self.work = work
+        self.render = render or {}
+        self.copies = copies or {}
+        self.skipped = skipped or []
+        self.duplicates = duplicates
+
+    def render_size(self, size):
+        """Size a target is actually rendered at"""
+        return self.render.get(size, size)
+
+    def copy_count(self):
+        return sum(len(copy_targets) for copy_targets in self.copies.values())
+
+    def summary(self):
+        """Describe the planned and skipped work in one line"""
+        rendered = ", ".join(str(self.render_size(size)) for size, _, _ in self.work)
+        parts = [f"{len(self.work)} to resize ({rendered})" if self.work else "nothing to resize"]
+        if self.copy_count():
+            parts.append(f"{self.copy_count()} upscales copied from the nearest size")
+        if self.skipped:
+            parts.append(f"{len(self.skipped)} upscales skipped "
+                         f"({', '.join(str(size) for size, _, _ in self.skipped)})")
+        if self.duplicates:
+            parts.append(f"{self.duplicates} duplicate sizes dropped")
+        return ", ".join(parts)
+
+def unique_sizes(sizes):
+    """Drop repeated sizes, keeping the first occurrence of each"""
+    return list(dict.fromkeys(sizes))
+
+def plan_targets(targets, source_size=None, upscale="allow", requested=None):
+    """
+    Decide which targets of one source are resized, copied or skipped, and in which order.
+
+    Args:
+        targets: (size, number, output_path) entries with unique sizes, e.g. from engine.plan_outputs
+        source_size: (width, height) of the source, needed unless upscale is "allow"
+        upscale: What to do with sizes larger than the longest side of the source:
+            "allow" resizes them anyway, "skip" leaves them out and "copy-nearest" writes
+            the largest output that needs no upscaling under their names
+        requested: Number of sizes requested before duplicates were dropped
+
+    Returns:
+        TargetPlan
+
+    Raises:
+        ValueError: for an unknown upscale policy
+    """
+    if upscale not in UPSCALE_POLICIES:
+        raise ValueError(f"Unknown upscale policy {upscale!r}. Use one of: {', '.join(UPSCALE_POLICIES)}")
+
+    duplicates = (requested or len(targets)) - len(targets)
+    limit = max(source_size) if upscale != "allow" else None
+
+    work = [target for target in targets if limit is None or target[0] <= limit]
+    upscales = sorted((target for target in targets if limit is not None and target[0] > limit),
+                      key=lambda target: target[0])
+    # Largest first, so every later size has a larger result to be resampled from
+    work.sort(key=lambda target: target[0], reverse=True)
+
+    if upscale == "skip" or not upscales:
+        return TargetPlan(work, skipped=upscales, duplicates=duplicates)
+
+    render = {}
+    if work:
+        nearest = work[0]
+    else:
+        # No size fits, so the smallest one is rendered at the source size and copied to the others
+        nearest = upscales.pop(0)
+        render[nearest[0]] = limit
+        work.append(nearest)
+
+    copies = {nearest[2]: upscales} if upscales else {}
+    return TargetPlan(work, render, copies, duplicates=duplicates)
@@ -0,0 +1,239 @@
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from PIL import Image, UnidentifiedImageError
+from .formats import ANIMATED_FORMATS, VALID_ICO_SIZES, get_output_format
+from .rawinput import REDUCING_GAP, raw_layout
+
+# Largest source accepted, in pixels per frame; Pillow warns above the same limit
+DEFAULT_MAX_PIXELS = Image.MAX_IMAGE_PIXELS
+
+# Bytes read from the end of a file to look for its trailer
+TAIL_BYTES = 1024
+
+class PreflightResult:
+    """
+    What a header-only check found out about one input.
+
+    errors hold the reasons the input would fail, so it should not be
+    decoded at all; warnings describe outputs that will be left out and
+    input data that will be ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = None
+        self.mode = None
+        self.size = None
+        self.animated = False
+        self.file_size = 0
+        self.errors = []
+        self.warnings = []
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def decode_memory(self):
+        """Estimated bytes held while the input is converted: the decoded source plus its prepared copy"""
+        if self.size is None:
+            return 0
+        return self.size[0] * self.size[1] * Image.getmodebands(self.mode) * 2
+
+    def to_record(self):
+        """The result as a dict for JSON reports"""
+        return {"source": self.path, "ok": self.ok, "format": self.format, "mode": self.mode,
+                "size": list(self.size) if self.size else None, "animated": self.animated,
+                "bytes_in": self.file_size, "errors": self.errors, "warnings": self.warnings,
+                "check_ms": round(self.seconds * 1000, 3)}
+
+# End markers of formats whose trailer is looked for in the last TAIL_BYTES
+END_MARKERS = {"PNG": (b"IEND", "IEND chunk"), "JPEG": (b"\xff\xd9", "end-of-image marker")}
+
+def find_truncation(img, path, result):
+    """
+    Look for signs that a file ends before its image data does, without decoding it.
+
+    PNG and JPEG files may carry data after their end marker, such as the
+    video of a Motion Photo. If the marker is not in the tail, the image is
+    decoded (a JPEG at its smallest DCT scale) to tell trailing data from a
+    truncated file, and only a failed decode is an error.
+
+    Args:
+        img: The opened, not yet loaded image
+        path: Path of the image file
+        result: PreflightResult whose errors and warnings are extended
+    """
+    file_size = result.file_size
+    layout = raw_layout(img)
+    if layout is not None:
+        offset, _, stride, _ = layout
+        if file_size < offset + stride * img.height:
+            result.errors.append(f"truncated: {offset + stride * img.height - file_size} bytes of pixel data missing")
+        return
+
+    if img.format == "WEBP":
+        with open(path, "rb") as f:
+            header = f.read(8)
+        riff_size = int.from_bytes(header[4:8], "little")
+        if file_size < riff_size + 8:
+            result.errors.append(f"truncated: {riff_size + 8 - file_size} bytes missing")
+        return
+
+    if img.format in END_MARKERS:
+        marker, name = END_MARKERS[img.format]
+        with open(path, "rb") as f:
+            f.seek(max(0, file_size - TAIL_BYTES))
+            tail = f.read()
+        if marker in tail:
+            return
+        try:
+            img.draft(img.mode, (1, 1))
+            img.load()
+        except Exception:
+            result.errors.append(f"truncated: the {img.format} has no {name}")
+            return
+        result.warnings.append(f"data after the {name} is ignored")
+
+@lru_cache(maxsize=128)
+def probe_mode(mode, save_format, file_format):
+    """
+    Check that the engine can resize an image of this mode and encode it as file_format.
+
+    A 4x4 image goes through the same preparation, resize and encoder
+    settings as a real source, so only the mode and format matter.
+
+    Returns:
+        The error the engine would run into, or None
+    """
+    from .engine import encode_image
+    from .resample import ResizeChain, prepare_source
+
+    try:
+        img = Image.new(mode, (4, 4))
+        resized = ResizeChain(prepare_source(img, save_format), REDUCING_GAP).resize(2)
+        encode_image(resized, save_format, 2, file_format)
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+def check_input(input_path, sizes=None, output_format=None, max_pixels=DEFAULT_MAX_PIXELS):
+    """
+    Check one input from its header, without decoding the pixels.
+
+    Args:
+        input_path: Path to the input image
+        sizes: Requested sizes, for the ICO size check
+        output_format: Output format, as passed to resize_image
+        max_pixels: Largest accepted width x height; None for no limit
+
+    Returns:
+        PreflightResult
+    """
+    result = PreflightResult(input_path)
+    started = time.perf_counter()
+    try:
+        result.file_size = os.path.getsize(input_path)
+        if not result.file_size:
+            result.errors.append("empty file")
+            return result
+
+        # The pixel limit below replaces Pillow's warning
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            with Image.open(input_path) as img:
+                result.format = img.format
+                result.mode = img.mode
+                result.size = img.size
+                result.animated = getattr(img, "is_animated", False)
+                find_truncation(img, input_path, result)
+    except Image.DecompressionBombError as e:
+        result.errors.append(f"too many pixels: {e}")
+        return result
+    except UnidentifiedImageError:
+        result.errors.append("not an image format Pillow can read")
+        return result
+    except Exception as e:
+        result.errors.append(f"unreadable: {e}")
+        return result
+    finally:
+        result.seconds = time.perf_counter() - started
+
+    width, height = result.size
+    if not width or not height:
+        result.errors.append(f"empty image ({width}x{height})")
+    elif max_pixels and width * height > max_pixels:
+        result.errors.append(f"too many pixels: {width}x{height} is over the limit of {max_pixels}")
+
+    ext, save_format = get_output_format(input_path, output_format)
+    if save_format == "ICO" and sizes:
+        invalid = [size for size in sizes if size not in VALID_ICO_SIZES]
+        if len(invalid) == len(sizes):
+            result.errors.append(f"no size is valid for ICO (use {', '.join(map(str, VALID_ICO_SIZES))})")
+        elif invalid:
+            result.warnings.append(f"sizes not valid for ICO are skipped: {', '.join(map(str, invalid))}")
+
+    # Animations kept in an animated format are converted frame by frame
+    if not (result.animated and (save_format or result.format) in ANIMATED_FORMATS):
+        mode = result.mode
+        if save_format == "AUTO":
+            from .autoformat import AUTO_FORMATS, auto_mode
+
+            candidates = list(AUTO_FORMATS)
+            # AUTO converts the resized image before it is encoded
+            mode = auto_mode(Image.new(mode, (1, 1))).mode
+        else:
+            candidates = [save_format or Image.registered_extensions().get(ext.lower())]
+        for candidate in candidates:
+            problem = probe_mode(mode, candidate if save_format else None, candidate)
+            if problem:
+                result.errors.append(f"mode {result.mode} cannot be written as {candidate}: {problem}")
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+def preflight(input_paths, sizes=None, output_format=None, max_pixels=DEFAULT_MAX_PIXELS, workers=8):
+    """
+    Check a batch of inputs from their headers, in parallel.
+
+    Args:
+        input_paths: Paths of the input images
+        sizes: Requested sizes, for the ICO size check
+        output_format: Output format, as passed to resize_image
+        max_pixels: Largest accepted width x height; None for no limit
+        workers: Number of threads reading headers
+
+    Returns:
+        List of PreflightResult in the order of input_paths
+    """
+    if len(input_paths) < 2:
+        return [check_input(input_path, sizes, output_format, max_pixels) for input_path in input_paths]
+
+    # Reading headers is mostly waiting on the disk, so threads overlap well
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda input_path: check_input(input_path, sizes, output_format, max_pixels),
+                             input_paths))
+
+def print_preflight(results):
+    """
+    Print the rejected inputs and warnings of a preflight.
+
+    Returns:
+        Number of rejected inputs
+    """
+    rejected = [result for result in results if not result.ok]
+    for result in results:
+        for problem in result.errors:
+            print(f"Rejected: {result.path}: {problem}")
+        if result.ok:
+            for warning in result.warnings:
+                print(f"Warning: {result.path}: {warning}")
+
+    seconds = sum(result.seconds for result in results)
+    print(f"Preflight: {len(results) - len(rejected)} of {len(results)} inputs OK, {len(rejected)} rejected "
+          f"({seconds * 1000:.1f} ms of header checks)")
+    return len(rejected)
@@ -0,0 +1,109 @@
+import os
+import mmap
+from PIL import Image
+
+# Formats whose uncompressed pixel data can be read straight from the file
+RAW_FORMATS = {"BMP", "DIB", "PPM", "TIFF"}
+
+# Bytes per pixel of the raw layouts we know how to slice into bands
+RAW_PIXEL_BYTES = {"L": 1, "RGB": 3, "BGR": 3, "RGBX": 4, "BGRX": 4}
+
+# Modes that can be box-reduced band by band (no alpha to premultiply)
+REDUCE_MODES = ("L", "RGB")
+
+# Reduced images stay at least this many times larger than the largest target
+REDUCING_GAP = 3
+
+# Amount of mapped file data decoded per band
+BAND_BYTES = 16 * 1024 * 1024
+
+def raw_layout(img):
+    """
+    Describe the pixel layout of an opened, not yet loaded image.
+
+    Returns:
+        Tuple of (offset, rawmode, stride, orientation) when all pixels are
+        stored uncompressed in one contiguous block, otherwise None
+    """
+    if img.format not in RAW_FORMATS or getattr(img, "n_frames", 1) > 1 or len(img.tile) != 1:
+        return None
+
+    codec_name, extents, offset, args = img.tile[0]
+    if codec_name != "raw" or tuple(extents) != (0, 0) + img.size:
+        return None
+
+    # PPM stores just the raw mode; the others add stride and orientation
+    if isinstance(args, str):
+        args = (args, 0, 1)
+    rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+
+    if rawmode not in RAW_PIXEL_BYTES or orientation not in (1, -1):
+        return None
+    if not stride:
+        stride = img.width * RAW_PIXEL_BYTES[rawmode]
+
+    return offset, rawmode, stride, orientation
+
+def open_reduced(path, min_size):
+    """
+    Load a large uncompressed image from a memory map, box-reduced by an integer factor.
+
+    The mapped file is decoded in bands of rows and each band is reduced
+    right away, so the full-size image is never held in memory. The factor
+    keeps both sides at least min_size; with min_size of REDUCING_GAP times
+    the largest target, the following Lanczos resize looks the same as one
+    from the full image.
+
+    Args:
+        path: Path to a BMP, PPM or TIFF file
+        min_size: Smallest width or height the reduced image may have
+
+    Returns:
+        Tuple of (reduced image, original (width, height)), or None if the
+        file is compressed, small or has a layout that needs the regular decoder
+    """
+    img = Image.open(path)
+    try:
+        layout = raw_layout(img) if img.mode in REDUCE_MODES else None
+        factor = min(img.width, img.height) // min_size if min_size else 0
+        if layout is None or factor < 2:
+            return None
+
+        offset, rawmode, stride, orientation = layout
+        width, height = img.size
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < offset + stride * height:
+                # Truncated file: let the regular decoder report it
+                return None
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        img.close()
+
+    try:
+        reduced = Image.new(img.mode, (-(-width // factor), -(-height // factor)))
+        band_rows = max(factor, BAND_BYTES // stride // factor * factor)
+
+        for top in range(0, height, band_rows):
+            bottom = min(height, top + band_rows)
+
+            # Bottom-up files store the last row first
+            if orientation == 1:
+                start, end = offset + top * stride, offset + bottom * stride
+            else:
+                start, end = offset + (height - bottom) * stride, offset + (height - top) * stride
+
+            with memoryview(mapped)[start:end] as view:
+                band = Image.frombuffer(img.mode, (width, bottom - top), view, "raw", rawmode, stride, orientation)
+                reduced.paste(band.reduce(factor), (0, top // factor))
+                del band
+
+            # Drop the band's pages from this process; they stay in the page cache
+            if hasattr(mapped, "madvise"):
+                page_start = start - start % mmap.PAGESIZE
+                mapped.madvise(mmap.MADV_DONTNEED, page_start, end - page_start)
+    finally:
+        mapped.close()
+
+    reduced.format = img.format
+    reduced.info.update(img.info)
+    return reduced, img.size
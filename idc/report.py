@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import socket
+import threading
+
+class PrometheusTextfile:
+    """
+    Collect counters and timing summaries and write them in the Prometheus
+    text format, e.g. for the node_exporter textfile collector.
+    """
+
+    def __init__(self, path, prefix="idc", interval=10.0):
+        self.path = path
+        self.prefix = prefix
+        self.interval = interval
+        self.counters = {}
+        self.summaries = {}
+        self.last_flush = 0.0
+        self.lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            total, count = self.summaries.get(key, (0.0, 0))
+            self.summaries[key] = (total + seconds, count + 1)
+
+    def format_metric(self, name, labels, suffix=""):
+        label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+        return f"{self.prefix}_{name}{suffix}" + (f"{{{label_text}}}" if label_text else "")
+
+    def flush(self, force=False):
+        """Rewrite the metrics file, at most once per interval unless forced"""
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_flush < self.interval:
+                return
+            self.last_flush = now
+
+            lines = []
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"{self.format_metric(name, labels, '_total')} {value}")
+            for (name, labels), (total, count) in sorted(self.summaries.items()):
+                lines.append(f"{self.format_metric(name, labels, '_seconds_sum')} {total:.6f}")
+                lines.append(f"{self.format_metric(name, labels, '_seconds_count')} {count}")
+
+        # Write atomically so scrapers never see a half-written file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.path)
+
+    def close(self):
+        self.flush(force=True)
+
+class StatsDClient:
+    """Send counters and timings to a StatsD server over UDP"""
+
+    def __init__(self, host="127.0.0.1", port=8125, prefix="idc"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def metric_name(self, name, labels):
+        # Plain StatsD has no tags, so label values become name segments
+        return ".".join([self.prefix, name] + [str(value) for _, value in sorted(labels.items())])
+
+    def send(self, payload):
+        try:
+            self.sock.sendto(payload.encode("utf-8"), self.address)
+        except OSError:
+            # Metrics must never break a conversion
+            pass
+
+    def count(self, name, value=1, **labels):
+        self.send(f"{self.metric_name(name, labels)}:{value}|c")
+
+    def observe(self, name, seconds, **labels):
+        self.send(f"{self.metric_name(name, labels)}:{seconds * 1000:.3f}|ms")
+
+    def flush(self, force=False):
+        pass
+
+    def close(self):
+        self.sock.close()
+
+def create_metrics(spec):
+    """
+    Create a metrics emitter from a command line spec.
+
+    Supported specs:
+        prom:/path/to/file.prom
+        statsd:host:port
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "prom" and target:
+        return PrometheusTextfile(target)
+    if kind == "statsd":
+        host, _, port = target.partition(":")
+        return StatsDClient(host or "127.0.0.1", int(port or 8125))
+    raise ValueError(f"Unknown metrics spec: {spec}. Use prom:<file> or statsd:<host>:<port>")
+
+def error_details(error, size=None):
+    """Describe an exception for the report"""
+    details = {"type": type(error).__name__, "message": str(error)}
+    if size is not None:
+        details["size"] = size
+    return details
+
+class RunReport:
+    """
+    Machine-readable run report written as JSON Lines.
+
+    Each source image and each output gets one record with timings, byte
+    counts and error details. A summary record is written on close. The
+    report is thread-safe, so batch, watch and server workers can share it.
+    """
+
+    def __init__(self, path=None, metrics=None):
+        self.file = open(path, "a", encoding="utf-8") if path else None
+        self.metrics = metrics
+        self.started = time.perf_counter()
+        self.totals = {"sources": 0, "failed_sources": 0, "outputs": 0, "failed_outputs": 0,
+                       "skipped_outputs": 0, "bytes_in": 0, "bytes_out": 0}
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        record = dict(record, time=round(time.time(), 3))
+        if self.file is not None:
+            line = json.dumps(record, sort_keys=True)
+            with self.lock:
+                self.file.write(line + "\n")
+                self.file.flush()
+
+    def record_output(self, source, path, size, save_format, bytes_out=0, resize_seconds=None,
+                      encode_seconds=None, status="ok", error=None, **extra):
+        """Record one output file"""
+        record = {
+            "type": "output",
+            "source": source,
+            "path": path,
+            "size": size,
+            "format": save_format,
+            "bytes_out": bytes_out,
+            "resize_ms": None if resize_seconds is None else round(resize_seconds * 1000, 3),
+            "encode_ms": None if encode_seconds is None else round(encode_seconds * 1000, 3),
+            "status": status,
+        }
+        if error is not None:
+            record["error"] = error
+        record.update(extra)
+        self.write(record)
+
+        with self.lock:
+            if status == "error":
+                self.totals["failed_outputs"] += 1
+            elif status == "skipped":
+                self.totals["skipped_outputs"] += 1
+            else:
+                self.totals["outputs"] += 1
+                self.totals["bytes_out"] += bytes_out
+
+        if self.metrics is not None:
+            self.metrics.count("outputs", status=status, format=save_format or "original")
+            self.metrics.count("bytes_out", bytes_out)
+            if encode_seconds is not None:
+                self.metrics.observe("encode", encode_seconds)
+
+    def record_source(self, source, bytes_in=0, bytes_out=0, decode_seconds=None, total_seconds=None,
+                      outputs=0, failed=0, status="ok", error=None, **extra):
+        """Record one source image once all of its outputs are done"""
+        record = {
+            "type": "source",
+            "source": source,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "compression_ratio": round(bytes_in / bytes_out, 4) if bytes_out else None,
+            "decode_ms": None if decode_seconds is None else round(decode_seconds * 1000, 3),
+            "total_ms": None if total_seconds is None else round(total_seconds * 1000, 3),
+            "outputs": outputs,
+            "failed": failed,
+            "status": status,
+        }
+        if error is not None:
+            record["error"] = error
+        record.update(extra)
+        self.write(record)
+
+        with self.lock:
+            self.totals["sources"] += 1
+            self.totals["bytes_in"] += bytes_in
+            if status in ("error", "partial", "rejected"):
+                self.totals["failed_sources"] += 1
+
+        if self.metrics is not None:
+            self.metrics.count("sources", status=status)
+            self.metrics.count("bytes_in", bytes_in)
+            if total_seconds is not None:
+                self.metrics.observe("source", total_seconds)
+            self.metrics.flush()
+
+    def close(self):
+        """Write the summary record and close the report"""
+        with self.lock:
+            summary = dict(self.totals, type="summary",
+                           elapsed_ms=round((time.perf_counter() - self.started) * 1000, 3))
+        self.write(summary)
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.metrics is not None:
+            self.metrics.close()
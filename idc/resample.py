@@ -0,0 +1,228 @@
+import math
+from PIL import Image, ImageFilter
+
+# Modes the linear-light path works on directly
+LINEAR_MODES = ("L", "LA", "RGB", "RGBA")
+
+# Premultiplied counterparts of the modes with straight alpha
+PREMULTIPLIED_MODES = {"RGBA": "RGBa", "LA": "La"}
+
+_srgb_to_linear = None
+
+def premultiply_alpha(img):
+    """
+    Premultiply colour by alpha once, so every target size only has to resample.
+
+    Transparent pixels then carry no colour and cannot bleed into edges.
+    Images without alpha are returned unchanged.
+    """
+    if img.mode == "P" and "transparency" in img.info:
+        img = img.convert("RGBA")
+    if img.mode in PREMULTIPLIED_MODES:
+        return img.convert(PREMULTIPLIED_MODES[img.mode])
+    return img
+
+def unpremultiply_alpha(img):
+    """Convert a resized premultiplied image back to straight alpha"""
+    for straight_mode, premultiplied_mode in PREMULTIPLIED_MODES.items():
+        if img.mode == premultiplied_mode:
+            return img.convert(straight_mode)
+    return img
+
+def srgb_to_linear_table():
+    """Lookup table mapping 8-bit sRGB values to linear-light floats (built once)"""
+    global _srgb_to_linear
+    if _srgb_to_linear is None:
+        import numpy as np
+
+        values = np.arange(256, dtype=np.float64) / 255.0
+        _srgb_to_linear = np.where(
+            values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4
+        ).astype(np.float32)
+    return _srgb_to_linear
+
+def linear_to_srgb(values):
+    """Convert linear-light floats (0-1) to 8-bit sRGB values"""
+    import numpy as np
+
+    values = np.clip(values, 0.0, 1.0)
+    encoded = np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1 / 2.4) - 0.055)
+    return np.rint(encoded * 255.0).astype(np.uint8)
+
+class LinearLightImage:
+    """
+    An image decoded once into linear-light float channels.
+
+    Resizing happens on the linear values, so averaging pixels does not
+    darken fine detail the way resampling sRGB-encoded values does. Colour
+    channels are premultiplied by alpha to keep transparent pixels from
+    bleeding into edges.
+    """
+
+    def __init__(self, img):
+        import numpy as np
+
+        if img.mode == "P":
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        if img.mode not in LINEAR_MODES:
+            raise ValueError(f"Linear-light resizing does not support mode {img.mode}")
+
+        self.mode = img.mode
+        self.size = img.size
+        self.info = {key: value for key, value in img.info.items() if key == "icc_profile"}
+
+        pixels = np.asarray(img)
+        if pixels.ndim == 2:
+            pixels = pixels[:, :, np.newaxis]
+
+        has_alpha = self.mode.endswith("A")
+        colour_count = pixels.shape[2] - 1 if has_alpha else pixels.shape[2]
+        table = srgb_to_linear_table()
+
+        alpha = pixels[:, :, -1].astype(np.float32) / 255.0 if has_alpha else None
+        self.channels = []
+        for index in range(colour_count):
+            # Table lookup gives a contiguous float32 plane per channel
+            channel = table[pixels[:, :, index]]
+            if alpha is not None:
+                channel *= alpha
+            self.channels.append(Image.fromarray(channel, "F"))
+
+        if alpha is not None:
+            self.channels.append(Image.fromarray(alpha, "F"))
+
+    def resize(self, size):
+        """Resize to size x size and convert back to an 8-bit image in the source mode"""
+        import numpy as np
+
+        planes = [np.asarray(channel.resize((size, size), Image.LANCZOS)) for channel in self.channels]
+
+        if self.mode.endswith("A"):
+            alpha = np.clip(planes[-1], 0.0, 1.0)
+            # Undo the premultiplication where there is coverage
+            safe_alpha = np.where(alpha > 0, alpha, 1.0)
+            colours = [linear_to_srgb(plane / safe_alpha) for plane in planes[:-1]]
+            bands = colours + [np.rint(alpha * 255.0).astype(np.uint8)]
+        else:
+            bands = [linear_to_srgb(plane) for plane in planes]
+
+        resized_img = Image.merge(self.mode, [Image.fromarray(band, "L") for band in bands])
+        resized_img.info.update(self.info)
+        return resized_img
+
+def prepare_source(img, save_format=None, linear_light=False):
+    """
+    Prepare a decoded image once so every target size shares the work.
+
+    Returns either a LinearLightImage or a (premultiplied) PIL image, to be
+    passed to resize_prepared for each target size.
+    """
+    # Convert to RGBA for ICO format if needed
+    if save_format == "ICO" and img.mode != "RGBA" and img.mode != "RGB":
+        img = img.convert("RGBA")
+
+    if linear_light:
+        linear_source = to_linear_light(img)
+        if linear_source is not None:
+            return linear_source
+
+    return premultiply_alpha(img)
+
+def resize_prepared(source, size):
+    """Resize a source from prepare_source to size x size with straight alpha"""
+    if isinstance(source, LinearLightImage):
+        return source.resize(size)
+    return unpremultiply_alpha(source.resize((size, size), Image.LANCZOS))
+
+class ResizeChain:
+    """
+    Resizes a prepared source to several sizes, given largest first.
+
+    Each size is resampled from the smallest earlier result that is still
+    at least gap times larger, instead of from the full source, the way
+    Pillow's reducing_gap works. Linear-light sources are always resized
+    from the source.
+    """
+
+    def __init__(self, source, gap):
+        self.source = source
+        self.gap = gap
+        self.results = []
+
+    def resize(self, size):
+        """Resize to size x size with straight alpha, like resize_prepared"""
+        if isinstance(self.source, LinearLightImage):
+            return self.source.resize(size)
+
+        base = self.source
+        for result in self.results:
+            if result.width >= size * self.gap and result.width < base.width:
+                base = result
+
+        # Keep the premultiplied result, it is what smaller sizes resample from
+        resized = base.resize((size, size), Image.LANCZOS)
+        self.results.append(resized)
+        return unpremultiply_alpha(resized)
+
+def to_linear_light(img):
+    """Prepare an image for linear-light resizing, or return None if that is not possible"""
+    try:
+        return LinearLightImage(img)
+    except ImportError:
+        print("Warning: Linear-light resizing needs NumPy (pip install numpy). Using standard resizing.")
+    except ValueError as e:
+        print(f"Warning: {e}. Using standard resizing.")
+    return None
+
+# Largest output size that gets pixel snapping
+SNAP_MAX_SIZE = 32
+
+# Modes ImageFilter.UnsharpMask works on; other modes, such as I;16, skip the post-filters
+FILTER_MODES = ("L", "LA", "RGB", "RGBA", "RGBa", "La")
+
+def sharpen_resized(img, reduction, size):
+    """
+    Apply an unsharp mask whose strength grows with the reduction ratio.
+
+    The filter runs on premultiplied colour so edges next to transparent
+    pixels do not pick up dark halos.
+    """
+    if reduction <= 1:
+        return img
+
+    # 2x reduction -> 50%, 4x -> 100%, 8x and more -> 150%
+    percent = int(min(150, 50 * math.log2(reduction)))
+    radius = 0.6 if size <= 48 else 1.0
+
+    sharpened = premultiply_alpha(img).filter(ImageFilter.UnsharpMask(radius=radius, percent=percent, threshold=2))
+    return unpremultiply_alpha(sharpened)
+
+def snap_alpha(img, low=24, high=232):
+    """Snap almost transparent and almost opaque pixels to crisp alpha values"""
+    if img.mode not in ("RGBA", "LA"):
+        return img
+
+    bands = list(img.split())
+    bands[-1] = bands[-1].point([0 if value < low else 255 if value > high else value for value in range(256)])
+    return Image.merge(img.mode, bands)
+
+def post_filter(img, source_size, size, sharpen=False, pixel_snap=False):
+    """
+    Per-size post-filter stage that runs between resize and encode.
+
+    Args:
+        img: Resized image with straight alpha
+        source_size: (width, height) of the source image
+        size: Target size
+        sharpen: Apply an unsharp mask scaled by the reduction ratio
+        pixel_snap: Snap alpha edges for outputs up to SNAP_MAX_SIZE pixels
+    """
+    if img.mode not in FILTER_MODES:
+        # Filters need 8-bit continuous-tone pixels
+        return img
+
+    if sharpen:
+        img = sharpen_resized(img, max(source_size) / size, size)
+    if pixel_snap and size <= SNAP_MAX_SIZE:
+        img = snap_alpha(img)
+    return img
@@ -0,0 +1,297 @@
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+from PIL import Image
+from .engine import resize_image
+from .preflight import DEFAULT_MAX_PIXELS, check_input, preflight as preflight_inputs
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "bulk")
+
+# Default cap on the estimated decode memory of all running jobs
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+def estimate_decode_memory(input_path):
+    """Estimate the bytes a job holds while it runs: the decoded source plus its prepared copy"""
+    try:
+        with Image.open(input_path) as img:
+            return img.width * img.height * len(img.getbands()) * 2
+    except Exception:
+        # Unreadable sources fail in resize_image before they decode anything
+        return 0
+
+class Job:
+    """
+    One resize_image call, queued on or running in a JobScheduler.
+
+    cancel_event is the job's cancellation token: once it is set, a queued
+    job never starts and a running job stops before its next size. With a
+    preflighting scheduler, preflight holds the header check of the input.
+    """
+
+    def __init__(self, job_id, tenant, priority, input_path, output_folder, sizes, options, memory):
+        self.id = job_id
+        self.tenant = tenant
+        self.priority = priority
+        self.input_path = input_path
+        self.output_folder = output_folder
+        self.sizes = sizes
+        self.options = options
+        self.memory = memory
+        self.preflight = None
+
+        self.status = "queued"
+        self.success = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+
+    def cancel(self):
+        """Request cancellation; see JobScheduler.cancel to also drop a queued job at once"""
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Wait until the job is finished; returns False on timeout"""
+        return self.done_event.wait(timeout)
+
+    @property
+    def queue_seconds(self):
+        """Seconds between submitting and starting the job"""
+        end = self.started if self.started is not None else self.finished
+        return None if end is None else end - self.submitted
+
+    @property
+    def latency(self):
+        """Seconds between submitting and finishing the job"""
+        return None if self.finished is None else self.finished - self.submitted
+
+class JobScheduler:
+    """
+    Runs resize_image jobs of several tenants on a pool of worker threads.
+
+    Interactive jobs always start before bulk jobs. Within a priority class
+    tenants take turns, one job each, so one tenant's large batch cannot
+    starve another tenant's jobs. A job only starts when its estimated
+    decode memory fits under memory_limit next to the running jobs; a job
+    larger than the limit runs on its own. With a source_cache (see
+    cache.SourceCache), jobs share decoded sources.
+    
+    With preflight, every input is checked from its header when it is
+    submitted (see preflight.check_input). Inputs that would fail are never
+    queued: their jobs finish as "rejected" right away, and on_reject(job)
+    is called so the caller can drop them or send them elsewhere, e.g. to
+    a quarantine folder.
+    """
+
+    def __init__(self, workers=2, memory_limit=DEFAULT_MEMORY_LIMIT, source_cache=None, preflight=False,
+                 max_pixels=DEFAULT_MAX_PIXELS, on_reject=None):
+        self.memory_limit = memory_limit
+        self.source_cache = source_cache
+        self.preflight = preflight
+        self.max_pixels = max_pixels
+        self.on_reject = on_reject
+        # Priority -> tenant -> queued jobs; tenant order is the round-robin order
+        self.queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self.condition = threading.Condition()
+        self.memory_used = 0
+        self.running_jobs = set()
+        self.closed = False
+        self.job_ids = itertools.count(1)
+        self.counts = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, input_path, output_folder, sizes, tenant="default", priority="bulk", **resize_options):
+        """
+        Queue one image for conversion.
+
+        Args:
+            input_path: Path to the input image
+            output_folder: Folder to save resized images
+            sizes: List of sizes (width/height in pixels)
+            tenant: Who the job belongs to, for fair sharing
+            priority: "interactive" or "bulk"
+            resize_options: Extra keyword arguments passed to resize_image
+
+        Returns:
+            The queued Job, or a rejected one if preflight found a problem
+        """
+        result = None
+        if self.preflight:
+            result = check_input(input_path, sizes, resize_options.get("output_format"), self.max_pixels)
+        return self.enqueue(input_path, output_folder, sizes, tenant, priority, resize_options, result)
+
+    def submit_batch(self, input_paths, output_folder, sizes, tenant="default", priority="bulk", **resize_options):
+        """
+        Queue several images, like submit. With preflight, their headers are checked in parallel first.
+
+        Returns:
+            List of Jobs in the order of input_paths
+        """
+        if self.preflight:
+            results = preflight_inputs(input_paths, sizes, resize_options.get("output_format"), self.max_pixels)
+        else:
+            results = [None] * len(input_paths)
+        return [self.enqueue(input_path, output_folder, sizes, tenant, priority, resize_options, result)
+                for input_path, result in zip(input_paths, results)]
+
+    def enqueue(self, input_path, output_folder, sizes, tenant, priority, resize_options, result=None):
+        """Queue a job, or finish it as rejected when its preflight result has errors"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}. Use one of: {', '.join(PRIORITIES)}")
+
+        memory = estimate_decode_memory(input_path) if result is None else result.decode_memory
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Scheduler is shut down")
+            job = Job(next(self.job_ids), tenant, priority, input_path, output_folder, list(sizes),
+                      resize_options, memory)
+            job.preflight = result
+            self.counts["submitted"] += 1
+            if result is None or result.ok:
+                self.queues[priority].setdefault(tenant, deque()).append(job)
+                self.condition.notify()
+                return job
+
+        print(f"Rejected: {input_path}: {'; '.join(result.errors)}")
+        self.finish(job, "rejected")
+        if self.on_reject is not None:
+            self.on_reject(job)
+        return job
+
+    def cancel(self, job):
+        """Cancel a job, dropping it from the queue if it has not started yet"""
+        job.cancel()
+        with self.condition:
+            jobs = self.queues[job.priority].get(job.tenant)
+            if jobs is None or job not in jobs:
+                return
+            jobs.remove(job)
+            if not jobs:
+                del self.queues[job.priority][job.tenant]
+        self.finish(job, "cancelled")
+
+    def cancel_tenant(self, tenant):
+        """Cancel every queued and running job of a tenant, and return how many there were"""
+        with self.condition:
+            jobs = [job for queues in self.queues.values() for job in queues.pop(tenant, ())]
+        for job in jobs:
+            job.cancel()
+            self.finish(job, "cancelled")
+
+        # Running jobs only see their token, at the next size
+        with self.condition:
+            running = [job for job in self.running_jobs if job.tenant == tenant]
+        for job in running:
+            job.cancel()
+        return len(jobs) + len(running)
+
+    def next_job(self):
+        """
+        Take the job that may start next, or None if there is none yet.
+
+        Must be called with the condition held.
+        """
+        for priority in PRIORITIES:
+            tenants = self.queues[priority]
+            while tenants:
+                tenant, jobs = next(iter(tenants.items()))
+                job = jobs[0]
+
+                # Jobs whose token was set directly are dropped here
+                if job.cancel_event.is_set():
+                    jobs.popleft()
+                    if not jobs:
+                        del tenants[tenant]
+                    self.finish(job, "cancelled")
+                    continue
+
+                # Wait for memory rather than let a lower priority job take it
+                if self.running_jobs and self.memory_used + job.memory > self.memory_limit:
+                    return None
+
+                jobs.popleft()
+                # The tenant goes to the back of the line
+                del tenants[tenant]
+                if jobs:
+                    tenants[tenant] = jobs
+                return job
+        return None
+
+    def worker(self):
+        while True:
+            with self.condition:
+                job = self.next_job()
+                while job is None:
+                    if self.closed and not any(self.queues.values()):
+                        return
+                    self.condition.wait()
+                    job = self.next_job()
+
+                self.memory_used += job.memory
+                self.running_jobs.add(job)
+
+            job.status = "running"
+            job.started = time.perf_counter()
+            try:
+                options = dict(job.options)
+                options.setdefault("source_cache", self.source_cache)
+                success = resize_image(job.input_path, job.output_folder, job.sizes,
+                                       cancel=job.cancel_event, **options)
+            except Exception as e:
+                print(f"Error: {e}")
+                success = False
+
+            with self.condition:
+                self.memory_used -= job.memory
+                self.running_jobs.discard(job)
+                self.condition.notify_all()
+
+            if job.cancel_event.is_set():
+                self.finish(job, "cancelled", success)
+            else:
+                self.finish(job, "done" if success else "failed", success)
+
+    def finish(self, job, status, success=False):
+        """Mark a job finished and wake up whoever waits for it"""
+        job.status = status
+        job.success = success
+        job.finished = time.perf_counter()
+        with self.condition:
+            self.counts[status] += 1
+        job.done_event.set()
+
+    def stats(self):
+        """Job counts, queue lengths and memory in use"""
+        with self.condition:
+            queued = {priority: sum(len(jobs) for jobs in tenants.values())
+                      for priority, tenants in self.queues.items()}
+            stats = dict(self.counts, queued=queued, running=len(self.running_jobs), memory_used=self.memory_used,
+                         memory_limit=self.memory_limit)
+        if self.source_cache is not None:
+            stats["source_cache"] = self.source_cache.stats()
+        return stats
+
+    def shutdown(self, cancel_pending=False):
+        """
+        Stop accepting jobs and wait for the workers to finish.
+
+        Args:
+            cancel_pending: Cancel queued and running jobs instead of finishing them
+        """
+        with self.condition:
+            self.closed = True
+            tenants = {tenant for queues in self.queues.values() for tenant in queues}
+            tenants.update(job.tenant for job in self.running_jobs)
+            self.condition.notify_all()
+
+        if cancel_pending:
+            for tenant in tenants:
+                self.cancel_tenant(tenant)
+        for thread in self.threads:
+            thread.join()
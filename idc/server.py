@@ -0,0 +1,210 @@
+import io
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+from PIL import Image
+from .cache import LRUCache
+from .engine import resize_to_size, save_resized_image
+from .formats import VALID_ICO_SIZES, get_output_format
+from .resample import premultiply_alpha, unpremultiply_alpha
+
+# Largest size variant the server will render
+MAX_SIZE = 4096
+
+CONTENT_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "GIF": "image/gif",
+    "ICO": "image/x-icon",
+    "WEBP": "image/webp",
+    "BMP": "image/bmp",
+    "TIFF": "image/tiff",
+}
+
+class ResizeRequestHandler(BaseHTTPRequestHandler):
+    """Serve /<image>?size=64&format=webp from the server's image folder"""
+
+    server_version = "ImageDimensionConverter/2.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/_stats":
+            self.send_json(200, self.server.stats())
+            return
+
+        # Resolve the image path and keep it inside the served folder
+        image_path = os.path.realpath(os.path.join(self.server.image_folder, unquote(url.path).lstrip("/")))
+        if not image_path.startswith(self.server.image_folder + os.sep) or not os.path.isfile(image_path):
+            self.send_json(404, {"error": "Image not found"})
+            return
+
+        query = parse_qs(url.query)
+        try:
+            size = int(query.get("size", ["64"])[0])
+        except ValueError:
+            self.send_json(400, {"error": "size must be an integer"})
+            return
+
+        if not 1 <= size <= MAX_SIZE:
+            self.send_json(400, {"error": f"size must be between 1 and {MAX_SIZE}"})
+            return
+
+        _, save_format = get_output_format(image_path, query.get("format", [None])[0])
+        if save_format is not None and save_format not in CONTENT_TYPES:
+            self.send_json(400, {"error": f"Unsupported format: {save_format}"})
+            return
+
+        if save_format == "ICO" and size not in VALID_ICO_SIZES:
+            self.send_json(400, {"error": f"ICO size must be one of {VALID_ICO_SIZES}"})
+            return
+
+        try:
+            status, body, content_type, etag = self.server.render(
+                image_path, size, save_format, self.headers.get("If-None-Match")
+            )
+        except Exception as e:
+            self.log_error("Error rendering %s: %s", image_path, e)
+            self.send_json(500, {"error": str(e)})
+            return
+
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"public, max-age={self.server.max_age}")
+        if status == 304:
+            self.end_headers()
+            return
+
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class ResizeServer(HTTPServer):
+    """HTTP server that renders size variants on the fly from a pool of worker threads"""
+
+    def __init__(self, address, image_folder, workers=8, source_cache_items=32,
+                 source_cache_bytes=512 * 1024 * 1024, output_cache_bytes=64 * 1024 * 1024,
+                 max_age=86400, verbose=False):
+        super().__init__(address, ResizeRequestHandler)
+        self.image_folder = os.path.realpath(image_folder)
+        self.max_age = max_age
+        self.verbose = verbose
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+        # Decoded sources, so different sizes of one image skip decoding
+        self.source_cache = LRUCache(source_cache_items, source_cache_bytes)
+        # Encoded responses keyed by source version, size and format
+        self.output_cache = LRUCache(100000, output_cache_bytes)
+
+    def process_request(self, request, client_address):
+        # Hand each connection to the worker pool instead of a new thread
+        self.pool.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+    def load_source(self, image_path, source_key):
+        """
+        Return the decoded, premultiplied source image and its format, using the source cache.
+        """
+        source = self.source_cache.get(source_key)
+        if source is None:
+            img = Image.open(image_path)
+            img.load()
+            source_format = img.format
+
+            # Premultiply once per source rather than once per requested size
+            img = premultiply_alpha(img)
+            source = (img, source_format)
+            self.source_cache.put(source_key, source, img.width * img.height * len(img.getbands()))
+        return source
+
+    def render(self, image_path, size, save_format, if_none_match=None):
+        """
+        Render one size variant of an image.
+
+        Returns:
+            Tuple of (status, body, content_type, etag)
+        """
+        stat = os.stat(image_path)
+        source_key = (image_path, stat.st_mtime_ns, stat.st_size)
+        output_key = source_key + (size, save_format)
+
+        # The ETag only depends on the source version and variant, so a
+        # revalidation can be answered without decoding or encoding
+        etag = '"' + hashlib.sha1(repr(output_key).encode("utf-8")).hexdigest()[:20] + '"'
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return 304, b"", None, etag
+
+        cached = self.output_cache.get(output_key)
+        if cached is not None:
+            return 200, cached[0], cached[1], etag
+
+        img, source_format = self.load_source(image_path, source_key)
+        encode_format = save_format or source_format or "PNG"
+
+        resized_img = unpremultiply_alpha(resize_to_size(img, size, encode_format))
+        buffer = io.BytesIO()
+        save_resized_image(resized_img, buffer, encode_format, size)
+        body = buffer.getvalue()
+        content_type = CONTENT_TYPES.get(encode_format, "application/octet-stream")
+
+        self.output_cache.put(output_key, (body, content_type), len(body))
+        return 200, body, content_type, etag
+
+    def stats(self):
+        return {
+            "source_cache": self.source_cache.stats(),
+            "output_cache": self.output_cache.stats(),
+        }
+
+def serve(image_folder, host="127.0.0.1", port=8080, workers=8, verbose=True):
+    """
+    Serve resized variants of the images in a folder over HTTP.
+
+    Args:
+        image_folder: Folder with the source images
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of request worker threads
+        verbose: Whether to log each request
+    """
+    if not os.path.isdir(image_folder):
+        print(f"Error: Image folder does not exist: {image_folder}")
+        return False
+
+    server = ResizeServer((host, port), image_folder, workers=workers, verbose=verbose)
+    print(f"Serving {server.image_folder} on http://{host}:{port}/<image>?size=64&format=webp")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server...")
+    finally:
+        server.server_close()
+
+    return True
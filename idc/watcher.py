@@ -0,0 +1,234 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import threading
+from .engine import resize_image
+from .formats import DEFAULT_SIZES, is_image_file
+
+# inotify event flags (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+
+class InotifyWatcher:
+    """Report changed file names in a folder using Linux inotify"""
+
+    def __init__(self, folder):
+        import ctypes
+        import ctypes.util
+
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+
+    def read(self, timeout):
+        """Wait up to timeout seconds and return the names of changed files"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, name_length = struct.unpack_from("iIII", data, offset)
+            offset += 16
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, fall back to a full listing
+                names.update(os.listdir(self.folder))
+            elif name:
+                names.add(os.fsdecode(name))
+
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Report changed file names in a folder by comparing directory listings"""
+
+    def __init__(self, folder, interval=1.0):
+        self.folder = folder
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout):
+        """Wait up to timeout seconds and return the names of changed files"""
+        time.sleep(min(timeout, self.interval))
+
+        snapshot = self.scan()
+        names = {name for name, signature in snapshot.items() if self.snapshot.get(name) != signature}
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+def create_watcher(folder, use_inotify=True, poll_interval=1.0):
+    """Create an inotify watcher on Linux, or a polling watcher elsewhere"""
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify unavailable ({e}). Falling back to polling.")
+
+    return PollingWatcher(folder, poll_interval)
+
+def watch_folder(input_folder, output_folder, sizes=DEFAULT_SIZES, workers=2, queue_size=64,
+                 settle_time=1.0, poll_interval=1.0, use_inotify=True, process_existing=False,
+                 stop_event=None, **resize_options):
+    """
+    Watch a folder and convert new or changed images as they arrive.
+
+    Args:
+        input_folder: Folder to watch for images
+        output_folder: Folder to save resized images
+        sizes: List of sizes (width/height in pixels)
+        workers: Number of conversion worker threads
+        queue_size: Maximum number of files waiting for a worker
+        settle_time: Seconds a file must stay unchanged before it is converted
+        poll_interval: Seconds between scans when polling
+        use_inotify: Whether to use inotify when it is available
+        process_existing: Whether to convert images already in the folder
+        stop_event: Optional threading.Event that stops the watcher when set
+        resize_options: Extra keyword arguments passed to resize_image
+    """
+    input_folder = os.path.abspath(input_folder)
+    output_folder = os.path.abspath(output_folder)
+
+    if not os.path.isdir(input_folder):
+        print(f"Error: Watch folder does not exist: {input_folder}")
+        return False
+
+    if input_folder == output_folder:
+        print("Error: Output folder must differ from the watched folder")
+        return False
+
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    # Bounded queue - the watcher blocks when workers fall behind
+    work_queue = queue.Queue(maxsize=queue_size)
+    queued = set()
+    queued_lock = threading.Lock()
+    stats = {"converted": 0, "failed": 0}
+
+    def worker():
+        while True:
+            path = work_queue.get()
+            if path is None:
+                work_queue.task_done()
+                break
+
+            with queued_lock:
+                queued.discard(path)
+
+            try:
+                success = resize_image(path, output_folder, sizes, **resize_options)
+            except Exception as e:
+                print(f"Error: {e}")
+                success = False
+
+            with queued_lock:
+                stats["converted" if success else "failed"] += 1
+            work_queue.task_done()
+
+    def enqueue(path):
+        with queued_lock:
+            if path in queued:
+                return
+            queued.add(path)
+
+        # Apply backpressure but keep honouring the stop event
+        warned = False
+        while not stop_event.is_set():
+            try:
+                work_queue.put(path, timeout=0.5)
+                return
+            except queue.Full:
+                if not warned:
+                    print("Queue full, waiting for workers...")
+                    warned = True
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    watcher = create_watcher(input_folder, use_inotify, poll_interval)
+    print(f"Watching {input_folder} ({type(watcher).__name__}). Press Ctrl+C to stop.")
+
+    # Files seen changing, mapped to (time of last change, (size, mtime))
+    pending = {}
+    if process_existing:
+        for name in os.listdir(input_folder):
+            pending[os.path.join(input_folder, name)] = None
+
+    try:
+        while not stop_event.is_set():
+            for name in watcher.read(timeout=max(0.05, settle_time / 2)):
+                pending[os.path.join(input_folder, name)] = None
+
+            # Debounce: only convert files whose size and mtime have settled
+            now = time.monotonic()
+            for path, entry in list(pending.items()):
+                if not is_image_file(path):
+                    del pending[path]
+                    continue
+
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    del pending[path]
+                    continue
+
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if entry is None or entry[1] != signature:
+                    pending[path] = (now, signature)
+                elif now - entry[0] >= settle_time:
+                    del pending[path]
+                    enqueue(path)
+    except KeyboardInterrupt:
+        print("\nStopping watcher...")
+    finally:
+        watcher.close()
+
+        # Let queued work finish, then stop the workers
+        for _ in threads:
+            work_queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    print(f"Watcher stopped. Converted {stats['converted']} images, {stats['failed']} failed")
+    return True